@@ -0,0 +1,82 @@
+"""
+Materialization benchmark — pydantic MemoryEntry/SearchResult vs slotted records.
+
+Builds N synthetic chromadb-shaped rows and times turning them into
+the boundary models (what Cortex used to do) and into MemoryRecord /
+ScoredRecord (what the brain uses now).
+
+    python benchmarks/bench_models.py --rows 50000
+"""
+from __future__ import annotations
+import argparse
+import time
+from onememory.models import MemoryEntry, SearchResult
+from onememory.brain.records import MemoryRecord, ScoredRecord
+
+
+def _rows(n: int) -> tuple[list[str], list[str], list[dict]]:
+    ids = [f"{i:012x}" for i in range(n)]
+    documents = [f"I prefer tool number {i} for my side projects" for i in range(n)]
+    metadatas = [
+        {
+            "category": ("identity", "preference", "knowledge")[i % 3],
+            "source": "openai:gpt-4o",
+            "tags": "openai",
+            "importance": 0.5,
+            "timestamp": "2026-01-01T00:00:00+00:00",
+        }
+        for i in range(n)
+    ]
+    return ids, documents, metadatas
+
+
+def _pydantic(ids, documents, metadatas) -> list[SearchResult]:
+    out = []
+    for i, doc_id in enumerate(ids):
+        meta = metadatas[i]
+        entry = MemoryEntry(
+            id=doc_id,
+            content=documents[i],
+            category=meta.get("category", "general"),
+            source=meta.get("source", ""),
+            tags=meta.get("tags", "").split(",") if meta.get("tags") else [],
+            importance=meta.get("importance", 0.5),
+            timestamp=meta.get("timestamp", ""),
+        )
+        out.append(SearchResult(entry=entry, score=0.5))
+    return out
+
+
+def _records(ids, documents, metadatas) -> list[ScoredRecord]:
+    return [
+        ScoredRecord(entry=MemoryRecord.from_row(doc_id, documents[i], metadatas[i]), score=0.5)
+        for i, doc_id in enumerate(ids)
+    ]
+
+
+def _best_of(fn, args, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = _rows(args.rows)
+    pyd = _best_of(_pydantic, rows, args.repeat)
+    rec = _best_of(_records, rows, args.repeat)
+    print(f"rows={args.rows}")
+    print(f"pydantic  {pyd * 1000:9.1f} ms  {args.rows / pyd:12,.0f} rows/s")
+    print(f"records   {rec * 1000:9.1f} ms  {args.rows / rec:12,.0f} rows/s")
+    print(f"speedup   {pyd / rec:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+MCP load test — many simulated clients against a real MCP server.
+
+    python benchmarks/mcp_load.py                              # 32 clients, streamable HTTP
+    python benchmarks/mcp_load.py --clients 64 --calls 50 --transport sse
+    python benchmarks/mcp_load.py --url http://localhost:8765/mcp   # an already running server
+
+Without --url, a server is started in a throwaway HOME over a synthetic
+corpus of --corpus memories, exactly as `onememory mcp-serve --http` would
+run it. Each client opens its own MCP session, then makes --calls tool
+calls back to back: recall with a query, or — a --remember fraction of the
+time — remember. Latency is measured per call on the client, so it
+includes the transport and any time spent queued behind other clients.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import synthetic
+from run import summarize
+
+SERVER = """
+from onememory.mcp_server import server
+server.pool.config.mcp_workers = {workers}
+server.main(transport={transport!r}, port={port})
+"""
+PATHS = {"sse": "/sse", "streamable-http": "/mcp"}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(port: int, proc: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"MCP server exited with {proc.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"MCP server did not listen on {port} within {timeout:.0f}s")
+
+
+def _populate(home: Path, corpus: int) -> None:
+    """Synthetic memories + a few days of conversations in a subprocess, so this process holds no chromadb client."""
+    code = (
+        "import sys; sys.path.insert(0, %r)\n"
+        "import synthetic\n"
+        "from run import _bulk_load\n"
+        "from onememory.brain import create_brain\n"
+        "from onememory.config import Config\n"
+        "brain = create_brain(Config())\n"
+        "_bulk_load(brain.cortex, synthetic.memories(%d))\n"
+        "for convo in synthetic.conversations(20):\n"
+        "    brain.hippocampus.capture(convo)\n"
+        "brain.close()\n"
+    ) % (str(Path(__file__).parent), corpus)
+    subprocess.run([sys.executable, "-c", code], env={**os.environ, "HOME": str(home)}, check=True)
+
+
+# ---------------------------------------------------------------------------
+# Clients
+# ---------------------------------------------------------------------------
+
+def _connect(url: str, transport: str):
+    if transport == "sse":
+        from mcp.client.sse import sse_client
+        return sse_client(url)
+    from mcp.client.streamable_http import streamablehttp_client
+    return streamablehttp_client(url)
+
+
+async def _client(n: int, args, laps: dict[str, list[float]], errors: dict[str, int]) -> None:
+    from mcp import ClientSession
+    rng = random.Random(synthetic.SEED + n)
+    queries = synthetic.queries(args.calls, seed=synthetic.SEED + n)
+    async with _connect(args.url, args.transport) as streams:
+        async with ClientSession(streams[0], streams[1]) as session:
+            start = time.perf_counter()
+            await session.initialize()
+            laps["initialize"].append(time.perf_counter() - start)
+            for i, query in enumerate(queries):
+                if rng.random() < args.remember:
+                    tool, arguments = "remember", {"content": f"client {n} note {i}", "category": "general"}
+                else:
+                    tool, arguments = "recall", {"query": query}
+                start = time.perf_counter()
+                try:
+                    result = await session.call_tool(tool, arguments)
+                    failed = result.isError
+                except Exception:
+                    failed = True
+                laps[tool].append(time.perf_counter() - start)
+                if failed:
+                    errors[tool] = errors.get(tool, 0) + 1
+
+
+async def _drive(args) -> dict:
+    laps: dict[str, list[float]] = {"initialize": [], "recall": [], "remember": []}
+    errors: dict[str, int] = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(n, args, laps, errors) for n in range(args.clients)))
+    wall = time.perf_counter() - start
+    calls = len(laps["recall"]) + len(laps["remember"])
+    results = {}
+    for tool, values in laps.items():
+        if values:
+            results[tool] = summarize(values)
+            results[tool]["errors"] = errors.get(tool, 0)
+    all_calls = summarize(laps["recall"] + laps["remember"])
+    all_calls["errors"] = sum(errors.values())
+    all_calls["ops_per_sec"] = round(calls / wall, 1)  # wall-clock throughput across all clients
+    all_calls["seconds"] = round(wall, 3)
+    results["all"] = all_calls
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Drive an MCP server with many concurrent clients")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--calls", type=int, default=20, help="Tool calls per client")
+    parser.add_argument("--remember", type=float, default=0.1, help="Fraction of calls that are remember()")
+    parser.add_argument("--transport", choices=sorted(PATHS), default="streamable-http")
+    parser.add_argument("--url", help="Drive this server instead of starting one")
+    parser.add_argument("--corpus", type=int, default=1_000, help="Memories in the started server's store")
+    parser.add_argument("--workers", type=int, default=16, help="mcp_workers of the started server")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    proc = None
+    with tempfile.TemporaryDirectory(prefix="onememory-mcp-load-") as tmp:
+        try:
+            if args.url is None:
+                home = Path(tmp)
+                _populate(home, args.corpus)
+                port = _free_port()
+                proc = subprocess.Popen(
+                    [sys.executable, "-c", SERVER.format(workers=args.workers, transport=args.transport, port=port)],
+                    env={**os.environ, "HOME": str(home)},
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+                _wait_for(port, proc)
+                args.url = f"http://127.0.0.1:{port}{PATHS[args.transport]}"
+            results = asyncio.run(_drive(args))
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait(timeout=10)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{args.clients} clients x {args.calls} calls over {args.transport} ({args.url})")
+    for name, r in results.items():
+        print(f"{name:12s} {r['ops']:>7,} calls  {r['ops_per_sec']:>9,.1f} ops/s  "
+              f"p50 {r['p50_ms']:>9.3f} ms  p95 {r['p95_ms']:>9.3f} ms  p99 {r['p99_ms']:>9.3f} ms  "
+              f"errors {r['errors']}")
+    return 1 if results["all"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+"""
+Replay harness — recorded or synthetic flows through OneMemoryAddon, offline.
+
+    python benchmarks/replay.py                             # synthetic chatgpt.com flows + the provider fixtures
+    python benchmarks/replay.py flows.mitm                  # flows recorded with `mitmdump -w flows.mitm`
+    python benchmarks/replay.py fixtures/providers/*.json --check   # the parser regression check only
+    python benchmarks/replay.py flows.mitm --update-golden  # accept the current parse as flows.expected.json
+    python benchmarks/replay.py --flows 500 --save synthetic.mitm   # write the synthetic flows as a .mitm file
+
+Inputs are .mitm flow files and provider fixtures (.json: host, method,
+path, request, raw response, expected parse). Record flows with plain
+`mitmdump -w` — with the OneMemory addon loaded, matched responses are
+streamed and their bodies never saved. Without inputs, --flows synthetic
+chatgpt.com exchanges (benchmarks/synthetic.py) and every provider fixture
+are used.
+
+First every flow is checked: its routed parser must give the same user
+message, reply and model whether the response is parsed whole or fed in
+1-, 7- and 4096-byte chunks, and that must match the expected parse — the
+fixture's, the synthetic exchange's, or for a recording its golden file
+(`<name>.expected.json`, flow id → parse, written by --update-golden).
+chatgpt.com flows are parsed whole with the addon's own
+_extract_user_message / _extract_assistant_response.
+
+Then each flow is replayed, back to back, in a throwaway HOME through the
+addon's hooks exactly as mitmdump would call them — requestheaders,
+responseheaders, the response streamed through its tee in --chunk pieces,
+response — which parses, appends to the hippocampus WAL, publishes to the
+change feed and auto-consolidates facts into the cortex. Timed per flow:
+
+    capture      the hooks, start to finish (the proxy's own cost)
+    searchable   capture, plus a second brain in this process learning of
+                 the conversation and its memories from the change feed
+                 and finding each memory with a search for its text
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import synthetic
+from run import FIXTURES, summarize
+
+CHUNKS = (1, 7, 4096)  # parse-equivalence chunk sizes
+CHATGPT_HOST = "chatgpt.com"
+CHATGPT_PATH = "/backend-api/f/conversation"
+
+
+@dataclass
+class Replay:
+    name: str
+    flow: object               # mitmproxy.http.HTTPFlow
+    expected: dict | None      # {"parser", "user", "assistant", "model"}, when known
+
+
+# ---------------------------------------------------------------------------
+# Inputs
+# ---------------------------------------------------------------------------
+
+def _flow(host: str, method: str, path: str, request: bytes, response: bytes, content_type: str):
+    from mitmproxy import http
+    from mitmproxy.test import tflow
+    return tflow.tflow(
+        req=http.Request.make(method, f"https://{host}{path}", request, {"content-type": "application/json"}),
+        resp=http.Response.make(200, response, {"content-type": content_type}),
+    )
+
+
+def synthetic_flows(n: int) -> list[Replay]:
+    return [
+        Replay(f"synthetic#{i}", _flow(CHATGPT_HOST, "POST", CHATGPT_PATH, json.dumps(body).encode(), sse.encode(), "text/event-stream"), expected)
+        for i, (body, sse, expected) in enumerate(synthetic.exchanges(n))
+    ]
+
+
+def fixture_flows(path: Path) -> list[Replay]:
+    fixture = json.loads(path.read_text())
+    streamed = fixture["response"].startswith(("event:", "data:"))
+    flow = _flow(
+        fixture["host"], fixture["method"], fixture["path"], json.dumps(fixture["request"]).encode(),
+        fixture["response"].encode(), "text/event-stream" if streamed else "application/json",
+    )
+    return [Replay(path.stem, flow, fixture.get("expected"))]
+
+
+def _golden_path(path: Path) -> Path:
+    return path.with_name(f"{path.stem}.expected.json")
+
+
+def recorded_flows(path: Path) -> tuple[list[Replay], int]:
+    """The HTTP flows of a .mitm file that have both bodies, and how many were skipped."""
+    from mitmproxy import http, io
+    golden = json.loads(_golden_path(path).read_text()) if _golden_path(path).exists() else {}
+    replays, skipped = [], 0
+    with path.open("rb") as f:
+        for flow in io.FlowReader(f).stream():
+            if not isinstance(flow, http.HTTPFlow) or flow.response is None or flow.response.raw_content is None:
+                skipped += 1
+                continue
+            replays.append(Replay(f"{path.name}#{flow.id[:8]}", flow, golden.get(flow.id)))
+    return replays, skipped
+
+
+# ---------------------------------------------------------------------------
+# Regression check
+# ---------------------------------------------------------------------------
+
+def parse(flow) -> dict:
+    """What the routed parser makes of a flow, response parsed whole — {"parser": None} if none claims it."""
+    from onememory.interceptor import parsers
+    from onememory.interceptor.addon import _extract_assistant_response, _extract_user_message
+    parser = parsers.route(flow.request.pretty_host, flow.request.method, flow.request.path)
+    if parser is None:
+        return {"parser": None}
+    request = json.loads(flow.request.get_text() or "{}")
+    if parser is parsers.PARSERS["chatgpt-web"]:
+        user = _extract_user_message(request)
+        assistant, model = _extract_assistant_response(flow.response.get_text() or "")
+    else:
+        user = parser.user_message(request)
+        assistant, model = parser.parse_response(flow.response.get_text() or "")
+    return {"parser": parser.name, "user": user, "assistant": assistant, "model": model or parser.request_model(request)}
+
+
+def _parse_streamed(flow, chunk: int) -> dict:
+    from onememory.interceptor import parsers
+    parser = parsers.route(flow.request.pretty_host, flow.request.method, flow.request.path)
+    request = json.loads(flow.request.get_text() or "{}")
+    raw = flow.response.content or b""  # decoded: a compressed response is parsed after decoding
+    stream = parser.stream()
+    for i in range(0, len(raw), chunk):
+        stream.feed(raw[i:i + chunk])
+    assistant, model = stream.finish()
+    return {"parser": parser.name, "user": parser.user_message(request), "assistant": assistant, "model": model or parser.request_model(request)}
+
+
+def _differs(got: dict, want: dict) -> str:
+    fields = [k for k in sorted(set(got) | set(want)) if got.get(k) != want.get(k)]
+    return ", ".join(f"{k}: {str(got.get(k))[:60]!r} != {str(want.get(k))[:60]!r}" for k in fields)
+
+
+def check(replays: list[Replay]) -> tuple[list[str], dict[str, dict]]:
+    """(failures, flow id → whole parse). A flow fails when chunked parsing disagrees with whole
+    parsing, or the parse differs from its expected one."""
+    failures: list[str] = []
+    parsed: dict[str, dict] = {}
+    for item in replays:
+        whole = parsed[item.flow.id] = parse(item.flow)
+        if whole["parser"] is not None:
+            for chunk in CHUNKS:
+                streamed = _parse_streamed(item.flow, chunk)
+                if streamed != whole:
+                    failures.append(f"{item.name} (chunk={chunk}): {_differs(streamed, whole)}")
+                    break
+        if item.expected is not None and whole != item.expected:
+            failures.append(f"{item.name}: {_differs(whole, item.expected)}")
+    return failures, parsed
+
+
+# ---------------------------------------------------------------------------
+# Replay
+# ---------------------------------------------------------------------------
+
+def _searchable(reader, cursor: int) -> tuple[int, int, int]:
+    """(conversations, memories, memories a search didn't find) written after `cursor`, as `reader` sees them."""
+    from onememory.brain.facts import SUPERSEDED
+    conversations, _ = reader.conversations_since(cursor)
+    memories, _ = reader.memories_since(cursor)
+    missed = 0
+    for memory in memories:
+        if memory.category != SUPERSEDED and memory.id not in {r.entry.id for r in reader.search(memory.content, 5)}:
+            missed += 1
+    return len(conversations), len(memories), missed
+
+
+def replay(replays: list[Replay], repeat: int = 1, chunk: int = 4096, consolidate: bool = True, searchable: bool = True) -> dict:
+    """Every flow through a fresh addon, `repeat` times over (~/.onememory must already be a throwaway)."""
+    from onememory.brain import create_brain
+    from onememory.config import Config
+    with open(os.devnull, "w") as quiet, contextlib.redirect_stdout(quiet):  # the addon narrates every capture
+        from onememory.interceptor.addon import OneMemoryAddon
+        addon = OneMemoryAddon()
+        if not consolidate:
+            addon._cortex = None
+        reader = create_brain(Config())
+        capture, e2e = [], []
+        captured = memories = missed = total = 0
+        for _ in range(repeat):
+            for item in replays:
+                flow = item.flow.copy()
+                flow.metadata.clear()
+                body = flow.response.raw_content or b""
+                total += len(body)
+                cursor = reader.sequence()
+                start = time.perf_counter()
+                addon.requestheaders(flow)
+                addon.responseheaders(flow)
+                tee = flow.response.stream if callable(flow.response.stream) else None
+                if tee is not None:
+                    for i in range(0, len(body), chunk):
+                        tee(body[i:i + chunk])
+                    tee(b"")
+                addon.response(flow)
+                capture.append(time.perf_counter() - start)
+                if searchable:
+                    conversations, stored, unfound = _searchable(reader, cursor)
+                    e2e.append(time.perf_counter() - start)
+                    captured += conversations
+                    memories += stored
+                    missed += unfound
+        addon.done()
+        reader.close()
+    result = {"capture": summarize(capture)}
+    result["capture"]["mb_per_sec"] = round(total / sum(capture) / 1e6, 2) if capture else 0.0
+    if searchable:
+        result["searchable"] = summarize(e2e)
+        result["searchable"].update(captured=captured, memories=memories, unsearchable=missed)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay recorded or synthetic flows through the OneMemory addon")
+    parser.add_argument("inputs", nargs="*", type=Path, help=".mitm flow files and provider fixture .json files")
+    parser.add_argument("--flows", type=int, default=200, help="Synthetic chatgpt.com flows when no inputs are given")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay every flow this many times")
+    parser.add_argument("--chunk", type=int, default=4096, help="Bytes per streamed response chunk")
+    parser.add_argument("--check", action="store_true", help="Only run the parser regression check")
+    parser.add_argument("--update-golden", action="store_true", help="Write each .mitm input's current parse as its golden file")
+    parser.add_argument("--no-consolidate", action="store_true", help="Capture only, no fact extraction into the cortex")
+    parser.add_argument("--no-search", action="store_true", help="Time capture only, not capture-to-searchable")
+    parser.add_argument("--save", type=Path, help="Also write the loaded flows to this .mitm file")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="onememory-replay-") as tmp:
+        os.environ["HOME"] = tmp  # the addon resolves ~/.onememory at import time
+        replays, skipped, recordings = [], 0, []
+        inputs = args.inputs or sorted(FIXTURES.glob("*.json"))
+        if not args.inputs:
+            replays += synthetic_flows(args.flows)
+        for path in inputs:
+            if path.suffix == ".mitm":
+                found, dropped = recorded_flows(path)
+                replays += found
+                skipped += dropped
+                recordings.append((path, found))
+            else:
+                replays += fixture_flows(path)
+
+        if args.save:
+            from mitmproxy import io
+            with args.save.open("wb") as f:
+                writer = io.FlowWriter(f)
+                for item in replays:
+                    writer.add(item.flow)
+
+        with open(os.devnull, "w") as quiet, contextlib.redirect_stdout(quiet):  # importing the addon starts one
+            failures, parsed = check(replays)
+        if args.update_golden:
+            for path, found in recordings:
+                _golden_path(path).write_text(json.dumps({r.flow.id: parsed[r.flow.id] for r in found}, indent=2) + "\n")
+            failures = [f for f in failures if "chunk=" in f]  # the golden files now agree by definition
+        results = {
+            "flows": len(replays),
+            "skipped": skipped,
+            "checked": sum(1 for r in replays if r.expected is not None or args.update_golden),
+            "failures": failures,
+        }
+        if not args.check and replays:
+            results.update(replay(replays, args.repeat, args.chunk, not args.no_consolidate, not args.no_search))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 1 if failures or results.get("searchable", {}).get("unsearchable") else 0
+    print(f"{results['flows']} flows ({results['skipped']} skipped), {results['checked']} with an expected parse")
+    for line in failures:
+        print(f"  FAIL {line}")
+    for name in ("capture", "searchable"):
+        if name in results:
+            r = results[name]
+            print(f"{name:12s} {r['ops']:>7,} flows  {r['ops_per_sec']:>9,.1f} flows/s  "
+                  f"p50 {r['p50_ms']:>9.3f} ms  p95 {r['p95_ms']:>9.3f} ms  p99 {r['p99_ms']:>9.3f} ms")
+    if "searchable" in results:
+        r = results["searchable"]
+        print(f"{r['captured']} conversations, {r['memories']} memories stored, {r['unsearchable']} not found by search; "
+              f"{results['capture']['mb_per_sec']} MB/s of responses through capture")
+    return 1 if failures or results.get("searchable", {}).get("unsearchable") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,663 @@
+"""
+OneMemory benchmark suite.
+
+    python benchmarks/run.py                      # 1k scale, compare against the baseline
+    python benchmarks/run.py --scale 100k -k search -k recall
+    python benchmarks/run.py --save-baseline      # record this run as the new baseline
+
+Every run works in a throwaway HOME so it never touches ~/.onememory, is
+appended to benchmarks/history.jsonl, and — if benchmarks/baseline.json has
+numbers for the same scale — compared case by case. A case whose throughput
+fell by more than --tolerance is a regression and the run exits non-zero.
+
+Per-op cases are capped (see CAPS) where one operation is expensive enough
+that timing scale.ops of them would take hours; the cap is part of the
+result so baselines stay comparable.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterable
+from datetime import datetime, timezone
+from pathlib import Path
+
+import synthetic
+
+HERE = Path(__file__).parent
+BASELINE_PATH = HERE / "baseline.json"
+HISTORY_PATH = HERE / "history.jsonl"
+FIXTURES = HERE / "fixtures" / "providers"
+BATCH = 5000  # chromadb's max upsert batch is a little above this
+DISTINCT_LIKES = 50  # fact_versioning: likes of different things, all of which stay current
+
+CAPS = {
+    "proxy_throughput": 2_000,
+    "capture": 2_000,
+    "amygdala_score": 2_000,
+    "dream": 1_000,
+    "store_memory": 2_000,
+    "remember_burst": 2_000,
+    "search": 500,
+    "index_recall": 500,
+    "flat_search": 500,
+    "change_feed": 200,
+    "fact_versioning": 500,
+    "get_context": 20,
+    "recall": 50,
+    "recall_churn": 500,
+    "history_query": 1_000,
+}
+
+CASES: dict[str, Callable[[Bench], dict]] = {}
+
+
+def case(name: str):
+    def register(fn):
+        CASES[name] = fn
+        return fn
+    return register
+
+
+# ---------------------------------------------------------------------------
+# Harness
+# ---------------------------------------------------------------------------
+
+class Bench:
+    """Per-run state: scale, scratch directories and the shared populated corpus."""
+
+    def __init__(self, scale: synthetic.Scale, root: Path) -> None:
+        self.scale = scale
+        self.root = root
+        self._corpus_brain = None
+        self._hnsw_cortex = None
+
+    def ops(self, name: str) -> int:
+        return min(self.scale.ops, CAPS.get(name, self.scale.ops))
+
+    def config(self, name: str):
+        from onememory.config import Config
+        config = Config(base_dir=self.root / name)
+        config.ensure_dirs()
+        return config
+
+    def corpus_brain(self):
+        """A brain at $HOME/.onememory holding scale.corpus memories — shared by the read cases."""
+        if self._corpus_brain is None:
+            from onememory.brain import create_brain
+            from onememory.config import Config
+            brain = create_brain(Config())
+            _bulk_load(brain.cortex, synthetic.memories(self.scale.corpus))
+            for convo in synthetic.conversations(20):
+                brain.hippocampus.capture(convo)
+            self._corpus_brain = brain
+        return self._corpus_brain
+
+    def hnsw_cortex(self):
+        """The corpus in HNSW shards: the corpus brain's cortex if it outgrew the flat store, else a copy."""
+        cortex = self.corpus_brain().cortex
+        if cortex.backend == "hnsw":
+            return cortex
+        if self._hnsw_cortex is None:
+            from dataclasses import replace
+            from onememory.brain.cortex import Cortex
+            self._hnsw_cortex = Cortex(replace(self.config("hnsw"), flat_max_memories=0))
+            rows = list(cortex.iter_records(embeddings=True))
+            for start in range(0, len(rows), BATCH):
+                batch = rows[start:start + BATCH]
+                self._hnsw_cortex.store_many([r for r, _ in batch], embeddings=[v for _, v in batch])
+        return self._hnsw_cortex
+
+
+def _bulk_load(cortex, records: Iterable) -> int:
+    batch, total = [], 0
+    for record in records:
+        batch.append(record)
+        if len(batch) >= BATCH:
+            total += len(cortex.store_many(batch))
+            batch = []
+    if batch:
+        total += len(cortex.store_many(batch))
+    return total
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def measure(fn: Callable, items: Iterable) -> dict:
+    """Time fn(item) per item; report throughput and latency percentiles."""
+    laps = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        laps.append(time.perf_counter() - start)
+    return summarize(laps)
+
+
+def summarize(laps: list[float], ops: int | None = None) -> dict:
+    total = sum(laps)
+    ops = ops if ops is not None else len(laps)
+    laps = sorted(laps)
+    return {
+        "ops": ops,
+        "seconds": round(total, 4),
+        "ops_per_sec": round(ops / total, 1) if total else 0.0,
+        "p50_ms": round(_percentile(laps, 0.50) * 1000, 3),
+        "p95_ms": round(_percentile(laps, 0.95) * 1000, 3),
+        "p99_ms": round(_percentile(laps, 0.99) * 1000, 3),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Cases
+# ---------------------------------------------------------------------------
+
+@case("extract_assistant_response")
+def bench_extract(b: Bench) -> dict:
+    from onememory.interceptor.addon import _extract_assistant_response
+    payloads = [sse for _, sse in synthetic.flows(b.ops("extract_assistant_response"))]
+    result = measure(_extract_assistant_response, payloads)
+    result["mb_per_sec"] = round(sum(len(p) for p in payloads) / result["seconds"] / 1e6, 2)
+    return result
+
+
+@case("extract_user_message")
+def bench_extract_user(b: Bench) -> dict:
+    from onememory.interceptor.addon import _extract_user_message
+    return measure(_extract_user_message, [body for body, _ in synthetic.flows(b.ops("extract_user_message"))])
+
+
+def _parse_fixture(fixture: dict, chunk: int) -> dict:
+    """Route one provider fixture and feed its response through the parser `chunk` bytes at a time."""
+    from onememory.interceptor import parsers
+    parser = parsers.route(fixture["host"], fixture["method"], fixture["path"])
+    if parser is None:
+        return {"parser": None}
+    raw = fixture["response"].encode()
+    stream = parser.stream()
+    for i in range(0, len(raw), chunk):
+        stream.feed(raw[i:i + chunk])
+    text, model = stream.finish()
+    return {
+        "parser": parser.name,
+        "user": parser.user_message(fixture["request"]),
+        "assistant": text,
+        "model": model or parser.request_model(fixture["request"]),
+    }
+
+
+@case("parse_providers")
+def bench_parse_providers(b: Bench) -> dict:
+    """Every fixture must parse identically whole and split at awkward chunk sizes; then time it."""
+    from onememory.interceptor import parsers
+    fixtures = [(path.stem, json.loads(path.read_text())) for path in sorted(FIXTURES.glob("*.json"))]
+    for name, fixture in fixtures:
+        for chunk in (1, 7, 1 << 20):
+            got = _parse_fixture(fixture, chunk)
+            if got != fixture["expected"]:
+                raise AssertionError(f"fixture {name} (chunk={chunk}): {got} != {fixture['expected']}")
+    items = [fixtures[i % len(fixtures)][1] for i in range(b.ops("parse_providers"))]
+    result = measure(lambda fixture: _parse_fixture(fixture, 512), items)
+
+    misses = 100_000
+    start = time.perf_counter()
+    for _ in range(misses):
+        parsers.route("fonts.gstatic.com", "GET", "/s/inter/v12/font.woff2")
+    result["route_miss_ns"] = round((time.perf_counter() - start) / misses * 1e9, 1)
+    result["fixtures"] = len(fixtures)
+    return result
+
+
+@case("proxy_throughput")
+def bench_proxy_throughput(b: Bench) -> dict:
+    """Proxied bytes/sec through the addon's relay path for a browsing-like traffic mix.
+
+    Each op is one connection: tls_clienthello, then — unless it was passed
+    through — the HTTP hooks with the response streamed in CHUNK-byte pieces.
+    Capture itself (response()) is timed by the capture/extract cases.
+    """
+    import random
+    from types import SimpleNamespace
+    from mitmproxy import http
+    from mitmproxy.test import tflow, tutils
+    from onememory.interceptor.addon import OneMemoryAddon
+    chunk = 4096
+    addon = OneMemoryAddon()
+    rng = random.Random(synthetic.SEED)
+    assets = ["cdn.oaistatic.com", "fonts.gstatic.com", "www.google.com", "github.com", "i.ytimg.com"]
+    conns = []
+    for body, sse in synthetic.flows(b.ops("proxy_throughput")):
+        if rng.random() < 0.1:
+            host, path, method, content = "chatgpt.com", "/backend-api/f/conversation", b"POST", sse.encode()
+        else:
+            host, path, method, content = rng.choice(assets), f"/static/{rng.getrandbits(32):08x}.js", b"GET", rng.randbytes(rng.randint(2_000, 200_000))
+        flow = tflow.tflow(
+            req=tutils.treq(host=host, port=443, method=method, path=path.encode(), headers=http.Headers(host=host)),
+            resp=tutils.tresp(content=b""),
+        )
+        hello = SimpleNamespace(client_hello=SimpleNamespace(sni=host), ignore_connection=False)
+        conns.append((hello, flow, content))
+
+    def relay(conn) -> None:
+        hello, flow, content = conn
+        addon.tls_clienthello(hello)
+        if hello.ignore_connection:
+            return  # raw TCP passthrough — mitmproxy copies bytes, the addon never sees them
+        addon.requestheaders(flow)
+        addon.responseheaders(flow)
+        stream = flow.response.stream if callable(flow.response.stream) else None
+        for i in range(0, len(content), chunk):
+            if stream:
+                stream(content[i:i + chunk])
+        if stream:
+            stream(b"")
+
+    result = measure(relay, conns)
+    result["mb_per_sec"] = round(sum(len(c) for _, _, c in conns) / result["seconds"] / 1e6, 1)
+    result["passthrough"] = sum(1 for hello, _, _ in conns if hello.ignore_connection)
+    return result
+
+
+@case("materialize")
+def bench_materialize(b: Bench) -> dict:
+    import bench_models
+    rows = bench_models._rows(b.scale.ops)
+    start = time.perf_counter()
+    bench_models._records(*rows)
+    return summarize([time.perf_counter() - start], ops=b.scale.ops)
+
+
+@case("extract_facts")
+def bench_extract_facts(b: Bench) -> dict:
+    import random
+    from onememory.consolidation.extraction import facts_from_message
+    rng = random.Random(synthetic.SEED)
+    messages = [synthetic.long_message(rng) for _ in range(min(b.scale.ops, 500))]
+    spans = 0
+
+    def extract(text: str) -> None:
+        nonlocal spans
+        spans += sum(1 for _ in facts_from_message(text, "c0", "openai", "gpt-4o"))
+
+    result = measure(extract, messages)
+    result["mb_per_sec"] = round(sum(len(m) for m in messages) / result["seconds"] / 1e6, 2)
+    result["facts_per_message"] = round(spans / len(messages), 1)
+    return result
+
+
+@case("capture")
+def bench_capture(b: Bench) -> dict:
+    from onememory.brain.hippocampus import Hippocampus
+    hippocampus = Hippocampus(b.config("capture"))
+    return measure(hippocampus.capture, list(synthetic.conversations(b.ops("capture"))))
+
+
+@case("history_query")
+def bench_history_query(b: Bench) -> dict:
+    """Filtered, paginated history over scale.corpus conversations on disk (50 per daily log)."""
+    from onememory.brain.hippocampus import Hippocampus
+    from onememory.brain.repository import FileStore
+    config = b.config("history")
+    store = FileStore()
+    for log in synthetic.daily_logs(b.scale.corpus):
+        store.save(config.hippocampus_dir / f"{log.date}.json", log)
+    hippocampus = Hippocampus(config)
+    start = time.perf_counter()
+    hippocampus.index.refresh()
+    build = time.perf_counter() - start
+    filters = [
+        {},
+        {"text": "python"},
+        {"text": "prefer fastapi"},
+        {"model": "gpt-4"},
+        {"start": "2026-01-10", "end": "2026-01-12"},
+        {"text": "rust", "model": "o3", "offset": 40},
+    ]
+    items = [filters[i % len(filters)] for i in range(b.ops("history_query"))]
+    result = measure(lambda f: hippocampus.history(limit=20, **f), items)
+    result["index_build_s"] = round(build, 3)
+    return result
+
+
+@case("amygdala_score")
+def bench_score(b: Bench) -> dict:
+    from onememory.brain.amygdala import Amygdala
+    amygdala = Amygdala(b.config("amygdala"))
+    return measure(amygdala.score, list(synthetic.conversations(b.ops("amygdala_score"))))
+
+
+@case("dream")
+def bench_dream(b: Bench) -> dict:
+    from onememory.brain.amygdala import Amygdala
+    from onememory.brain.cortex import Cortex
+    from onememory.brain.hippocampus import Hippocampus
+    from onememory.consolidation.dreamer import Dreamer
+    config = b.config("dream")
+    hippocampus = Hippocampus(config)
+    log = hippocampus._load_daily(hippocampus._today_file())
+    log.conversations.extend(synthetic.conversations(b.ops("dream")))
+    hippocampus._save_daily(hippocampus._today_file(), log)
+    dreamer = Dreamer(config, hippocampus, Cortex(config), Amygdala(config))
+    start = time.perf_counter()
+    outcome = dreamer.dream()
+    result = summarize([time.perf_counter() - start], ops=outcome["conversations"])
+    result["memories_created"] = outcome["memories_created"]
+    return result
+
+
+@case("summarize")
+def bench_summarize(b: Bench) -> dict:
+    from onememory.consolidation.summarizer import summarize
+    return measure(summarize, list(synthetic.conversations(b.ops("summarize"))))
+
+
+@case("store_memory")
+def bench_store(b: Bench) -> dict:
+    from onememory.brain.cortex import Cortex
+    cortex = Cortex(b.config("store"))
+    cortex.count()  # open the client outside the timed region
+    return measure(cortex.store_memory, list(synthetic.memories(b.ops("store_memory"), seed=7)))
+
+
+@case("remember_burst")
+def bench_remember_burst(b: Bench) -> dict:
+    """Back-to-back remember() calls through the write-behind buffer; the final flush is timed too."""
+    from dataclasses import replace
+    from onememory.brain import create_brain
+
+    def burst(config) -> dict:
+        brain = create_brain(config)
+        brain.cortex.count()  # open the client outside the timed region
+        contents = [r.content for r in synthetic.memories(b.ops("remember_burst"), seed=11)]
+        result = measure(brain.remember, contents)
+        start = time.perf_counter()
+        brain.flush()
+        flush = time.perf_counter() - start
+        result["seconds"] = round(result["seconds"] + flush, 4)
+        result["ops_per_sec"] = round(result["ops"] / result["seconds"], 1)
+        return result
+
+    result = burst(b.config("remember"))
+    result["write_through_ops_per_sec"] = burst(replace(b.config("remember_through"), remember_batch=1))["ops_per_sec"]
+    return result
+
+
+@case("bulk_load")
+def bench_bulk_load(b: Bench) -> dict:
+    start = time.perf_counter()
+    b.corpus_brain()
+    return summarize([time.perf_counter() - start], ops=b.scale.corpus)
+
+
+@case("search")
+def bench_search(b: Bench) -> dict:
+    brain = b.corpus_brain()  # the cortex directly: the vector query itself, not the recall cache
+    return measure(lambda q: brain.cortex.search(q, 10), synthetic.queries(b.ops("search")))
+
+
+@case("get_all")
+def bench_get_all(b: Bench) -> dict:
+    brain = b.corpus_brain()
+    start = time.perf_counter()
+    rows = len(brain.get_all_memories())
+    return summarize([time.perf_counter() - start], ops=rows)
+
+
+@case("index_recall")
+def bench_index_recall(b: Bench) -> dict:
+    """Search latency at each shard's tuned ef_search, plus recall@10 against brute force across an ef sweep."""
+    from onememory.brain import index
+    cortex = b.hnsw_cortex()
+    shards = cortex.shards()
+    queries = synthetic.queries(b.ops("index_recall"))
+
+    def set_ef(ef: int | None) -> float:
+        """Apply ef (None → each shard's tier) and return the count-weighted recall@10."""
+        for collection in shards.values():
+            wanted = ef or index.tier(collection.count())["ef_search"]
+            collection.modify(configuration={"hnsw": {"ef_search": wanted}})
+        stats = index.stats(cortex, k=10, sample=50)
+        total = sum(s["count"] for s in stats)
+        return round(sum(s["recall"] * s["count"] for s in stats if s["recall"] is not None) / total, 4)
+
+    sweep = {}
+    for ef in (10, 25, 50, 100, 200):
+        recall = set_ef(ef)
+        sweep[str(ef)] = {"recall": recall, "p50_ms": measure(lambda q: cortex.search(q, 10), queries[:100])["p50_ms"]}
+    recall = set_ef(None)
+    result = measure(lambda q: cortex.search(q, 10), queries)
+    result["recall"] = recall
+    result["sweep"] = sweep
+    return result
+
+
+FIRST_QUERY = """
+import json, sys, time
+from onememory.brain.cortex import Cortex
+from onememory.config import Config
+start = time.perf_counter()
+Cortex(Config(base_dir=__import__("pathlib").Path(sys.argv[1]))).search("", 10, embedding=json.loads(sys.argv[2]))
+print(time.perf_counter() - start)
+"""
+
+
+@case("flat_search")
+def bench_flat_search(b: Bench) -> dict:
+    """The flat store's brute-force search vs HNSW shards over the same memories, query embedding excluded.
+    Also the cost of a fresh process's first query: opening the store plus one search."""
+    brain = b.corpus_brain()
+    if brain.cortex.backend != "flat":
+        return summarize([], ops=0)  # the corpus is past flat_max_memories: nothing to compare
+    hnsw = b.hnsw_cortex()
+    embeddings = [brain.cortex.embed_query(q) for q in synthetic.queries(b.ops("flat_search"))]
+    result = measure(lambda e: brain.cortex.search("", 10, embedding=e), embeddings)
+    other = measure(lambda e: hnsw.search("", 10, embedding=e), embeddings)
+    result["hnsw_ops_per_sec"], result["hnsw_p50_ms"] = other["ops_per_sec"], other["p50_ms"]
+    vector = json.dumps([float(x) for x in embeddings[0]])
+    for key, base_dir in (("first_query_ms", brain.config.base_dir), ("hnsw_first_query_ms", hnsw.config.base_dir)):
+        out = subprocess.run(
+            [sys.executable, "-c", FIRST_QUERY, str(base_dir), vector], capture_output=True, text=True, check=True,
+        ).stdout
+        result[key] = round(float(out.split()[-1]) * 1000, 3)
+    return result
+
+
+@case("rescore")
+def bench_rescore(b: Bench) -> dict:
+    """A first importance re-scoring pass over the corpus, then an incremental one after 1% new memories."""
+    from onememory.consolidation.reconsolidation import Reconsolidator
+    brain = b.corpus_brain()
+    for query in synthetic.queries(200):  # some recalls for the access feature
+        brain.search(query)
+    rescorer = Reconsolidator(brain.config, brain.cortex, brain.amygdala)
+    start = time.perf_counter()
+    first = rescorer.run()
+    result = summarize([time.perf_counter() - start], ops=first["memories"])
+    brain.cortex.store_many(list(synthetic.memories(max(1, b.scale.corpus // 100), seed=13)))
+    start = time.perf_counter()
+    rescorer.run()
+    result["incremental_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    result["updated"] = first["updated"]
+    return result
+
+
+@case("change_feed")
+def bench_change_feed(b: Bench) -> dict:
+    """Incremental sync: a memory written, then fetched by feed cursor — against re-reading every memory."""
+    from onememory.brain.records import MemoryRecord
+    brain = b.corpus_brain()
+    cursor = brain.sequence()
+    laps = []
+    for i in range(b.ops("change_feed")):
+        brain.cortex.store_memory(MemoryRecord(content=f"change feed note {i}", source="bench"))
+        start = time.perf_counter()
+        changed, cursor = brain.memories_since(cursor)
+        laps.append(time.perf_counter() - start)
+        assert len(changed) == 1
+    result = summarize(laps)
+    start = time.perf_counter()
+    brain.get_memories()
+    result["full_read_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+
+@case("fact_versioning")
+def bench_fact_versioning(b: Bench) -> dict:
+    """Identity facts restated over and over (moves, job changes, renames): the write with slot
+    resolution, and how many of them recall's context still lists — against no versioning.
+    Then DISTINCT_LIKES likes of different things, which must all stay current, and one
+    contradiction ("I hate" what was liked), which must replace exactly its own like."""
+    from dataclasses import replace
+    from onememory.brain import create_brain
+    from onememory.brain.records import MemoryRecord
+    signals = ("I live in", "I work at", "My name is")
+    facts = [
+        MemoryRecord(content=f"{signals[i % 3]} place {i}", category="identity", timestamp=f"2026-01-01T00:00:{i:06d}")
+        for i in range(b.ops("fact_versioning"))
+    ]
+    likes = [
+        MemoryRecord(content=f"I like topic number {i}", category="preference", timestamp=f"2026-01-02T00:00:{i:06d}")
+        for i in range(DISTINCT_LIKES)
+    ] + [MemoryRecord(content="I hate topic number 0", category="preference", timestamp="2026-01-03T00:00:00")]
+
+    def restate(config) -> tuple[dict, int]:
+        brain = create_brain(config)
+        brain.cortex.count()  # open the store outside the timed region
+        result = measure(brain.cortex.store_memory, facts)
+        return result, len(brain.get_context()["identity"])
+
+    result, context = restate(b.config("facts"))
+    result["context_identity"] = context
+    unversioned, result["unversioned_context_identity"] = restate(replace(b.config("facts_off"), fact_versioning=False))
+    result["unversioned_p50_ms"] = unversioned["p50_ms"]
+
+    brain = create_brain(b.config("likes"))
+    for like in likes:
+        brain.cortex.store_memory(like)
+    preferences = brain.get_context()["preferences"]
+    if len(preferences) != DISTINCT_LIKES or "I like topic number 0" in preferences:
+        raise AssertionError(f"distinct likes: {len(preferences)} current of {DISTINCT_LIKES}, expected the hate to replace one")
+    result["context_likes"] = len(preferences)
+    return result
+
+
+@case("get_context")
+def bench_get_context(b: Bench) -> dict:
+    brain = b.corpus_brain()
+    return measure(lambda _: brain.get_context(), range(b.ops("get_context")))
+
+
+@case("recall")
+def bench_recall(b: Bench) -> dict:
+    b.corpus_brain()
+    from onememory.mcp_server import server  # builds its own brain over the same $HOME store
+    return measure(server._recall, synthetic.queries(b.ops("recall")))  # the tool's body, minus the worker hop
+
+
+@case("recall_churn")
+def bench_recall_churn(b: Bench) -> dict:
+    """Repeated agent queries with a remember() every WRITE_EVERY calls, each write invalidating the cache."""
+    from onememory import metrics
+    from onememory.mcp_server import server
+    b.corpus_brain()
+    hits, misses = metrics.counter("cache_hits_total"), metrics.counter("cache_misses_total")
+    before = hits.value(cache="recall", kind="exact"), misses.value(cache="recall", kind="exact")
+    write_every = 10
+    categories = ["preference", "knowledge", "general"]
+
+    def call(i_query):
+        i, query = i_query
+        if i % write_every == write_every - 1:
+            with server.pool.lease() as brain:
+                brain.remember(f"bench note {i}", category=categories[i % len(categories)])
+        server._recall(query)
+
+    result = measure(call, enumerate(synthetic.queries(b.ops("recall_churn"))))
+    h = hits.value(cache="recall", kind="exact") - before[0]
+    m = misses.value(cache="recall", kind="exact") - before[1]
+    result["hit_rate"] = round(h / (h + m), 3) if h + m else 0.0
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Baseline + history
+# ---------------------------------------------------------------------------
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return ""
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or not base.get("ops_per_sec"):
+            continue
+        ratio = result["ops_per_sec"] / base["ops_per_sec"]
+        if ratio < 1 - tolerance:
+            regressions.append(f"{name}: {result['ops_per_sec']:,} ops/s vs baseline {base['ops_per_sec']:,} ({ratio:.0%})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="OneMemory benchmark suite")
+    parser.add_argument("--scale", choices=sorted(synthetic.SCALES), default="1k")
+    parser.add_argument("-k", "--case", action="append", choices=sorted(CASES), help="Run only these cases")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline for its scale")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed throughput drop before flagging")
+    args = parser.parse_args()
+
+    scale = synthetic.SCALES[args.scale]
+    names = args.case or list(CASES)
+    with tempfile.TemporaryDirectory(prefix="onememory-bench-") as tmp:
+        os.environ["HOME"] = tmp  # addon + MCP server resolve ~/.onememory at import time
+        bench = Bench(scale, Path(tmp))
+        results = {}
+        for name in names:
+            results[name] = CASES[name](bench)
+            r = results[name]
+            print(f"{name:28s} {r['ops']:>9,} ops  {r['ops_per_sec']:>12,.1f} ops/s  "
+                  f"p50 {r['p50_ms']:>9.3f} ms  p95 {r['p95_ms']:>9.3f} ms", flush=True)
+
+    run = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": _commit(),
+        "scale": args.scale,
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+    with HISTORY_PATH.open("a") as f:
+        f.write(json.dumps(run) + "\n")
+
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    if args.save_baseline:
+        baseline.setdefault(args.scale, {}).update(results)
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"\nBaseline saved to {BASELINE_PATH}")
+        return 0
+
+    regressions = compare(results, baseline.get(args.scale, {}), args.tolerance)
+    if regressions:
+        print("\nRegressions:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    if baseline.get(args.scale):
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Deterministic synthetic data for the benchmark suite.
+
+Everything is driven by a seeded ``random.Random`` so the same seed and size
+always produce byte-identical payloads, logs and corpora — results are
+comparable across runs and machines.
+
+    ChatGPT request bodies + v1 delta-encoded SSE responses  (interceptor)
+    Conversations / DailyLogs                                 (hippocampus, dreamer)
+    MemoryRecords                                             (cortex)
+"""
+from __future__ import annotations
+import json
+import random
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+from onememory.models import Conversation, DailyLog, Message, Provider
+from onememory.brain.records import MemoryRecord
+
+SEED = 1337
+
+
+@dataclass(frozen=True)
+class Scale:
+    corpus: int  # memories in the cortex / conversations on disk
+    ops: int     # operations timed per case
+
+
+SCALES = {
+    "1k": Scale(corpus=1_000, ops=1_000),
+    "100k": Scale(corpus=100_000, ops=5_000),
+    "1m": Scale(corpus=1_000_000, ops=10_000),
+}
+
+NAMES = ["Ana", "Piyush", "Mina", "Jonas", "Lea", "Tomás", "Yuki", "Omar", "Sara", "Kofi"]
+CITIES = ["Berlin", "Lisbon", "Bangalore", "Toronto", "Osaka", "Nairobi", "Austin", "Lyon"]
+TOOLS = ["Python", "Rust", "FastAPI", "Postgres", "vim", "React", "Go", "Kubernetes", "SQLite"]
+TOPICS = [
+    "vector databases", "sourdough baking", "marathon training", "home automation",
+    "distributed tracing", "type theory", "indoor climbing", "film photography",
+]
+FILLER = (
+    "the of and to in is it that for on with as this was but be at by not are from or have an "
+    "they which one you were all we when there can more if out so what about up into than them"
+).split()
+MODELS = ["gpt-4o", "gpt-4o-mini", "gpt-5", "o3"]
+
+
+def _user_text(rng: random.Random) -> str:
+    """A user turn — roughly a third carry identity/preference signals."""
+    kind = rng.randrange(6)
+    if kind == 0:
+        return f"My name is {rng.choice(NAMES)} and I live in {rng.choice(CITIES)}."
+    if kind == 1:
+        return f"I prefer {rng.choice(TOOLS)} over {rng.choice(TOOLS)} for most side projects."
+    if kind == 2:
+        return f"Can you explain {rng.choice(TOPICS)} like I'm new to it?"
+    return " ".join(rng.choice(FILLER) for _ in range(rng.randint(8, 40))).capitalize() + "?"
+
+
+def long_message(rng: random.Random, sentences: int = 150) -> str:
+    """A long paste — mostly filler and questions, a few first-person facts, a code block."""
+    parts = []
+    for i in range(sentences):
+        if i == sentences // 2:
+            parts.append("\n```python\nfor x in range(10):\n    print(x)\n```\n")
+        parts.append(_user_text(rng) if rng.random() < 0.3 else _assistant_text(rng, rng.randint(6, 30)))
+    return " ".join(parts)
+
+
+def _assistant_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(FILLER + TOOLS) for _ in range(words)).capitalize() + "."
+
+
+# ---------------------------------------------------------------------------
+# Interceptor payloads
+# ---------------------------------------------------------------------------
+
+def request_body(rng: random.Random, text: str | None = None) -> dict:
+    """A ChatGPT web `/f/conversation` request payload."""
+    return {
+        "action": "next",
+        "messages": [{
+            "id": f"{rng.getrandbits(64):016x}",
+            "author": {"role": "user"},
+            "content": {"content_type": "text", "parts": [text or _user_text(rng)]},
+        }],
+        "model": "auto",
+    }
+
+
+def sse_payload(rng: random.Random, words: int = 120, chunk: int = 3) -> str:
+    """A v1 delta-encoded SSE stream, shaped like chatgpt.com's, for `words` words of reply."""
+    return _sse(rng, words, chunk)[0]
+
+
+def _sse(rng: random.Random, words: int, chunk: int) -> tuple[str, str, str]:
+    """(SSE stream, the reply it spells out, its model)."""
+    model = rng.choice(MODELS)
+    reply = _assistant_text(rng, words)
+    tokens = reply.split(" ")
+    lines = [
+        "event: delta_encoding",
+        'data: "v1"',
+        "",
+        "data: " + json.dumps({"v": {"message": {
+            "author": {"role": "assistant"},
+            "content": {"content_type": "text", "parts": [""]},
+            "metadata": {"model_slug": model},
+        }}, "o": "add"}),
+        "",
+    ]
+    for i in range(0, len(tokens), chunk):
+        piece = " ".join(tokens[i:i + chunk]) + (" " if i + chunk < len(tokens) else "")
+        lines.append("data: " + json.dumps({"v": [{"p": "/message/content/parts/0", "o": "append", "v": piece}]}))
+        lines.append("")
+    lines += ["data: [DONE]", ""]
+    return "\n".join(lines), reply, model
+
+
+def flows(n: int, seed: int = SEED) -> Iterator[tuple[dict, str]]:
+    """(request body, SSE response) pairs."""
+    for body, sse, _ in exchanges(n, seed):
+        yield body, sse
+
+
+def exchanges(n: int, seed: int = SEED) -> Iterator[tuple[dict, str, dict]]:
+    """flows(), each with what parsing it must give: {"parser", "user", "assistant", "model"}
+    as in the provider fixtures."""
+    rng = random.Random(seed)
+    for _ in range(n):
+        body = request_body(rng)
+        sse, reply, model = _sse(rng, rng.randint(20, 400), 3)
+        user = body["messages"][0]["content"]["parts"][0]
+        yield body, sse, {"parser": "chatgpt-web", "user": user, "assistant": reply, "model": model}
+
+
+# ---------------------------------------------------------------------------
+# Hippocampus
+# ---------------------------------------------------------------------------
+
+def conversations(n: int, seed: int = SEED) -> Iterator[Conversation]:
+    rng = random.Random(seed)
+    for i in range(n):
+        turns = rng.randint(1, 4)
+        messages = []
+        for _ in range(turns):
+            messages.append(Message(role="user", content=_user_text(rng)))
+            messages.append(Message(role="assistant", content=_assistant_text(rng, rng.randint(20, 200))))
+        yield Conversation(
+            id=f"c{i:011d}",
+            provider=Provider.OPENAI,
+            model=rng.choice(MODELS),
+            messages=messages,
+            timestamp=f"2026-01-{1 + i % 28:02d}T{i % 24:02d}:00:00+00:00",
+            metadata={"agent": "chatgpt", "source": "chatgpt-web", "provider": "openai"},
+        )
+
+
+def daily_logs(n: int, per_day: int = 50, seed: int = SEED) -> Iterator[DailyLog]:
+    """`n` conversations spread over consecutive days, `per_day` at a time."""
+    log: DailyLog | None = None
+    for i, convo in enumerate(conversations(n, seed)):
+        if i % per_day == 0:
+            if log is not None:
+                yield log
+            day = i // per_day
+            log = DailyLog(date=f"{2000 + day // 336}-{1 + day // 28 % 12:02d}-{1 + day % 28:02d}")
+        log.conversations.append(convo)
+    if log is not None:
+        yield log
+
+
+# ---------------------------------------------------------------------------
+# Cortex
+# ---------------------------------------------------------------------------
+
+def memories(n: int, seed: int = SEED) -> Iterator[MemoryRecord]:
+    rng = random.Random(seed)
+    for i in range(n):
+        text = _user_text(rng)
+        lower = text.lower()
+        category = "identity" if "my name" in lower else "preference" if "i prefer" in lower else "knowledge"
+        yield MemoryRecord(
+            content=f"{text} (#{i})",
+            id=f"m{i:011d}",
+            category=category,
+            source=f"openai:{rng.choice(MODELS)}",
+            tags=["openai"],
+            importance=round(rng.random(), 2),
+            timestamp=f"2026-01-{1 + i % 28:02d}T00:00:00+00:00",
+        )
+
+
+def queries(n: int, seed: int = SEED) -> list[str]:
+    rng = random.Random(seed + 1)
+    pool = [f"where does {name} live" for name in NAMES] + [f"favorite {t}" for t in TOOLS] + TOPICS
+    return [rng.choice(pool) for _ in range(n)]
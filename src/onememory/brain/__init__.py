@@ -2,7 +2,7 @@
 from onememory.brain.hippocampus import Hippocampus
 from onememory.brain.cortex import Cortex
 from onememory.brain.amygdala import Amygdala
-from onememory.brain.prefrontal import PrefrontalCortex
+from onememory.brain.prefrontal import PrefrontalCortex, QuotaExceededError
 from onememory.config import Config
 
 
@@ -11,6 +11,7 @@ def create_brain(config: Config | None = None) -> PrefrontalCortex:
     config = config or Config()
     config.ensure_dirs()
     hippocampus = Hippocampus(config)
+    hippocampus.recover()
     amygdala = Amygdala(config)
     cortex = Cortex(config)
     return PrefrontalCortex(config, hippocampus, cortex, amygdala)
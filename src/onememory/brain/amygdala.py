@@ -1,7 +1,18 @@
-"""Amygdala — importance scoring, like the brain's emotional salience filter."""
+"""Amygdala — importance scoring, like the brain's emotional salience filter.
+
+Besides scoring conversations as they are captured, it keeps the access
+log: the ids of memories searches returned (amygdala/access.log, appended
+in batches by every process), which importance re-scoring counts — see
+consolidation/reconsolidation.py.
+"""
 from __future__ import annotations
+import atexit
 import json
+import os
+import threading
+from onememory import metrics
 from onememory.config import Config
+from onememory.journal import atomic_write
 from onememory.models import Conversation
 
 HIGH_IMPORTANCE_KEYWORDS = {
@@ -11,6 +22,10 @@ HIGH_IMPORTANCE_KEYWORDS = {
     "i want", "i need", "birthday", "email",
 }
 
+ACCESS_FLUSH = 256  # buffered accesses per append to the access log
+
+_SCORE_SECONDS = metrics.histogram("amygdala_score_seconds", "Amygdala importance scoring latency")
+
 
 class Amygdala:
     """Scores conversations by personal importance."""
@@ -18,6 +33,10 @@ class Amygdala:
     def __init__(self, config: Config) -> None:
         self.config = config
         self._scores_path = config.amygdala_dir / "salience.json"
+        self._access_path = config.amygdala_dir / "access.log"
+        self._accessed: list[str] = []
+        self._access_lock = threading.Lock()
+        atexit.register(self.flush_access)
 
     def _load_scores(self) -> dict[str, float]:
         if self._scores_path.exists():
@@ -25,20 +44,69 @@ class Amygdala:
         return {}
 
     def _save_scores(self, scores: dict[str, float]) -> None:
-        self._scores_path.parent.mkdir(parents=True, exist_ok=True)
-        self._scores_path.write_text(json.dumps(scores, indent=2))
+        atomic_write(self._scores_path, json.dumps(scores, indent=2))
 
     def score(self, conversation: Conversation) -> float:
-        text = " ".join(m.content.lower() for m in conversation.messages)
-        base = 0.3
-        hits = sum(1 for kw in HIGH_IMPORTANCE_KEYWORDS if kw in text)
-        importance = min(1.0, base + hits * 0.1)
-        msg_bonus = min(0.2, len(conversation.messages) * 0.02)
-        importance = min(1.0, importance + msg_bonus)
-        scores = self._load_scores()
-        scores[conversation.id] = importance
-        self._save_scores(scores)
-        return importance
+        with _SCORE_SECONDS.time():
+            text = " ".join(m.content.lower() for m in conversation.messages)
+            base = 0.3
+            hits = sum(1 for kw in HIGH_IMPORTANCE_KEYWORDS if kw in text)
+            importance = min(1.0, base + hits * 0.1)
+            msg_bonus = min(0.2, len(conversation.messages) * 0.02)
+            importance = min(1.0, importance + msg_bonus)
+            scores = self._load_scores()
+            scores[conversation.id] = importance
+            self._save_scores(scores)
+            return importance
 
     def get_score(self, conversation_id: str) -> float:
         return self._load_scores().get(conversation_id, 0.5)
+
+    def all_scores(self) -> dict[str, float]:
+        return self._load_scores()
+
+    def merge_scores(self, scores: dict[str, float]) -> None:
+        """Bulk import — one load and one save, existing scores overwritten."""
+        if scores:
+            merged = self._load_scores()
+            merged.update(scores)
+            self._save_scores(merged)
+
+    # -- access log -----------------------------------------------------------
+
+    def record_access(self, ids: list[str]) -> None:
+        """Note memories a search returned. Buffered; written every ACCESS_FLUSH ids and on close."""
+        with self._access_lock:
+            self._accessed.extend(ids)
+            full = len(self._accessed) >= ACCESS_FLUSH
+        if full:
+            self.flush_access()
+
+    def flush_access(self) -> None:
+        with self._access_lock:
+            ids, self._accessed = self._accessed, []
+        if not ids:
+            return
+        self._access_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self._access_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, "".join(f"{i}\n" for i in ids).encode())  # one append: never interleaved with another process's
+        finally:
+            os.close(fd)
+
+    def drain_access(self) -> list[str]:
+        """Every access logged since the last drain, by any process; the log starts over."""
+        self.flush_access()
+        taken = self._access_path.with_name(f".access.{os.getpid()}.log")
+        try:
+            os.replace(self._access_path, taken)
+        except FileNotFoundError:
+            return []
+        try:
+            return taken.read_text().split()
+        finally:
+            taken.unlink()
+
+    def close(self) -> None:
+        self.flush_access()
+        atexit.unregister(self.flush_access)
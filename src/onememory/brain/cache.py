@@ -0,0 +1,132 @@
+"""Recall cache — memoized reads, invalidated by what they depend on.
+
+Agents call recall() over and over with the same (or nearly the same)
+query, and each call re-reads every shard and re-runs a vector query. The
+PrefrontalCortex keeps those results here, each stored with a snapshot of
+the versions it was computed from:
+
+    cortex versions    one per category, bumped by Cortex.store_many
+    hippocampus        the daily logs' (name, mtime, size)
+
+A lookup compares the snapshot against the current versions of the same
+keys, so a write to "preference" invalidates the searches and context that
+read preferences and nothing else. Versions live on disk, so writes made by
+another process (the proxy addon, `onememory dream`) invalidate too.
+
+With `recall_cache_similarity` > 0, a search that misses exactly is also
+served from a cached search whose query embedding is at least that cosine
+similar — the query is embedded once either way, so a near-hit still saves
+the vector query.
+
+Under a threaded server every write invalidates the context for all callers
+at once; fetch() lets one of them rebuild it while the rest wait for that
+result instead of all rebuilding it side by side.
+"""
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from onememory import metrics
+
+_CACHE_HITS = metrics.counter("cache_hits_total", "Cache hits by cache")
+_CACHE_MISSES = metrics.counter("cache_misses_total", "Cache misses by cache")
+_STRIPES = 64
+
+
+def normalize(query: str) -> str:
+    """Cache key for a query: case and whitespace don't change what it asks."""
+    return " ".join(query.lower().split()).rstrip("?.! ")
+
+
+class _Entry:
+    __slots__ = ("versions", "value", "embedding")
+
+    def __init__(self, versions: dict, value, embedding) -> None:
+        self.versions = versions
+        self.value = value
+        self.embedding = embedding
+
+
+class RecallCache:
+    """LRU of results, each valid while the versions it read are unchanged."""
+
+    def __init__(self, size: int = 256, similarity: float = 0.0) -> None:
+        self.size = size
+        self.similarity = similarity
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._computing = [threading.Lock() for _ in range(_STRIPES)]
+
+    def get(self, key: tuple, versions: dict, kind: str = "exact"):
+        """The cached value for `key`, or None if absent or stale."""
+        value = self._lookup(key, versions)
+        if value is not None:
+            _CACHE_HITS.inc(cache="recall", kind=kind)
+            return value
+        _CACHE_MISSES.inc(cache="recall", kind=kind)
+        return None
+
+    def fetch(self, key: tuple, versions: dict, compute, depends: dict | None = None):
+        """get(), computing and storing the value on a miss — once, however many threads miss together."""
+        value = self.get(key, versions)
+        if value is not None:
+            return value
+        with self._computing[hash(key) % _STRIPES]:
+            value = self._lookup(key, versions)  # another thread may have just computed it
+            if value is None:
+                value = compute()
+                self.put(key, versions if depends is None else depends, value)
+        return value
+
+    def _lookup(self, key: tuple, versions: dict):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and _fresh(entry, versions):
+                self._entries.move_to_end(key)
+                return entry.value
+            if entry is not None:
+                del self._entries[key]
+        return None
+
+    def nearest(self, scope: tuple, embedding, versions: dict):
+        """A fresh cached value in `scope` whose query embedding is within the similarity threshold."""
+        import numpy as np
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        with self._lock:
+            best, best_key = self.similarity, None
+            for key, entry in self._entries.items():
+                if entry.embedding is None or key[:len(scope)] != scope or not _fresh(entry, versions):
+                    continue
+                score = float(np.dot(query, entry.embedding))
+                if score >= best:
+                    best, best_key = score, key
+            if best_key is not None:
+                self._entries.move_to_end(best_key)
+                _CACHE_HITS.inc(cache="recall", kind="near")
+                return self._entries[best_key].value
+        _CACHE_MISSES.inc(cache="recall", kind="near")
+        return None
+
+    def put(self, key: tuple, versions: dict, value, embedding=None) -> None:
+        if self.size <= 0:
+            return
+        if embedding is not None:
+            import numpy as np
+            embedding = np.asarray(embedding, dtype=np.float32)
+            embedding = embedding / (np.linalg.norm(embedding) or 1.0)
+        with self._lock:
+            self._entries[key] = _Entry(versions, value, embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _fresh(entry: _Entry, versions: dict) -> bool:
+    return all(versions.get(name) == version for name, version in entry.versions.items())
@@ -1,10 +1,114 @@
-"""Cortex — long-term semantic memory storage using chromadb vector search."""
+"""Cortex — long-term semantic memory storage using chromadb vector search.
+
+Memories are sharded by category: each category lives in its own chromadb
+collection (``memories_<category>``), so identity/preference lookups are
+small direct reads instead of a filter over everything. Searches embed the
+query once, fan out to the shards in parallel and merge the top-k.
+
+Every write bumps a small per-category version file (cortex/versions/),
+which is how the recall cache in other processes learns a shard changed,
+and publishes the written memories to the change feed (onememory.feed) for
+clients that sync incrementally.
+
+Stores written before sharding keep a single ``memories`` collection. It is
+read as one more shard until `onememory migrate` moves its rows (embeddings
+included) into the per-category collections.
+
+HNSW parameters come from brain/index.py: shards are created with its
+smallest tier, and each write moves a shard's ef_search to the tier for its
+size. rebuild() re-creates a shard with tuned build parameters.
+
+A new cortex starts out in the flat store (brain/flat.py) instead: exact
+brute-force search over a memory-mapped matrix, no chromadb client at all.
+The write that takes it past `flat_max_memories` moves every row, embedding
+included, into the shards above and drops it; from then on the cortex is
+sharded. Existing chromadb stores stay as they are.
+
+Identity and preference facts are versioned on the way in (brain/facts.py):
+a write that restates an attribute ("I live in ...") re-files the version
+it replaces under the "superseded" category, which searches over all
+categories and get_all() leave out.
+"""
 from __future__ import annotations
+import hashlib
+import heapq
 import os
+import re
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 os.environ["ANONYMIZED_TELEMETRY"] = "False"
-import chromadb
+from onememory import metrics, profiling
 from onememory.config import Config
-from onememory.models import MemoryEntry, SearchResult
+from onememory.feed import change, open_feed
+from onememory.models import MemoryEntry
+from onememory.brain.records import MemoryRecord, ScoredRecord
+from onememory.brain import index
+from onememory.brain.facts import SLOT_CATEGORIES, SUPERSEDED, FactSlots, attribute
+
+LEGACY_COLLECTION = "memories"
+SHARD_PREFIX = "memories_"
+REBUILD_PREFIX = "rebuild-"  # a shard being rebuilt; not SHARD_PREFIX, so never read as a shard
+SEARCH_WORKERS = min(8, os.cpu_count() or 1)
+DISCOVER_INTERVAL = 1.0  # seconds between checks for shards created by other processes
+MIGRATE_BATCH = 5000
+GET_PAGE = 5000
+
+_EMBED_SECONDS = metrics.histogram("embedding_seconds", "Time spent computing embeddings")
+_UPSERT_SECONDS = metrics.histogram("cortex_upsert_seconds", "Cortex upsert latency, excluding embedding")
+_SEARCH_SECONDS = metrics.histogram("cortex_search_seconds", "Cortex vector search latency, including query embedding")
+_STORED = metrics.counter("memories_stored_total", "Memories written to the cortex")
+_CACHE_HITS = metrics.counter("cache_hits_total", "Cache hits by cache")
+_CACHE_MISSES = metrics.counter("cache_misses_total", "Cache misses by cache")
+
+
+def shard_name(category: str) -> str:
+    """Collection name for a category — a readable slug, suffixed with a hash if it had to be altered."""
+    slug = re.sub(r"[^a-z0-9]+", "-", category.lower()).strip("-")[:48] or "general"
+    if slug != category:
+        slug = f"{slug}-{hashlib.md5(category.encode()).hexdigest()[:6]}"
+    return SHARD_PREFIX + slug
+
+
+def _drop(collection, ids: list[str]) -> bool:
+    if ids:
+        found = collection.get(ids=ids, include=[])["ids"]
+        if found:
+            collection.delete(ids=found)
+            return True
+    return False
+
+
+def _release_client(client) -> None:
+    """Stop the chromadb System behind `client`, so its threads and sqlite handles go with it.
+
+    chromadb keeps one System per path for the life of the process and has no public way
+    to drop just one (clear_system_cache() forgets every brain's). This is the one place
+    that reaches into its internals: if they change, the System simply lives on until exit."""
+    try:
+        from chromadb.api.shared_system_client import SharedSystemClient
+        system = SharedSystemClient._identifier_to_system.pop(client._identifier, None)
+    except (ImportError, AttributeError):
+        return
+    if system is not None:
+        system.stop()
+
+
+_embedding_function = None
+_embedding_lock = threading.Lock()
+
+
+def _shared_embedding_function():
+    """One embedding model per process, however many brains (namespaces) are open."""
+    global _embedding_function
+    with _embedding_lock:
+        if _embedding_function is None:
+            from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+            _embedding_function = DefaultEmbeddingFunction()
+    return _embedding_function
 
 
 class Cortex:
@@ -13,105 +117,550 @@ class Cortex:
     def __init__(self, config: Config) -> None:
         self.config = config
         self._db_path = config.cortex_dir / "vectordb"
+        self._versions_dir = config.cortex_dir / "versions"
         self._client = None
-        self._collection = None
-
-    def _get_collection(self):
-        """Lazy init — recreates client/collection if vectordb was deleted."""
-        if self._collection is not None:
-            try:
-                self._collection.count()
-                return self._collection
-            except Exception:
-                self._client = None
-                self._collection = None
-        self._client = chromadb.PersistentClient(path=str(self._db_path))
-        self._collection = self._client.get_or_create_collection(
-            "memories",
-            metadata={"hnsw:space": "cosine"},
-        )
-        return self._collection
-
-    def store_memory(self, entry: MemoryEntry) -> str:
-        self._get_collection().upsert(
-            ids=[entry.id],
-            documents=[entry.content],
-            metadatas=[{
-                "category": entry.category,
-                "source": entry.source,
-                "tags": ",".join(entry.tags),
-                "importance": entry.importance,
-                "timestamp": entry.timestamp,
-            }],
-        )
-        return entry.id
-
-    def search(self, query: str, limit: int = 10) -> list[SearchResult]:
-        """Semantic vector search via chromadb."""
-        collection = self._get_collection()
-        count = collection.count()
-        if count == 0:
-            return []
-        result = collection.query(
-            query_texts=[query],
-            n_results=min(limit, count),
-        )
-        results = []
-        for i, doc_id in enumerate(result["ids"][0]):
-            meta = result["metadatas"][0][i]
-            distance = result["distances"][0][i] if result.get("distances") else 0
-            score = max(0.0, 1.0 - distance)
-            entry = MemoryEntry(
-                id=doc_id,
-                content=result["documents"][0][i],
-                category=meta.get("category", "general"),
-                source=meta.get("source", ""),
-                tags=meta.get("tags", "").split(",") if meta.get("tags") else [],
-                importance=meta.get("importance", 0.5),
-                timestamp=meta.get("timestamp", ""),
-            )
-            results.append(SearchResult(entry=entry, score=round(score, 2)))
-        return results
+        self._shards: dict[str, object] = {}  # category → collection
+        self._legacy = None
+        self._known_collections = -1
+        self._discovered_at = 0.0
+        self._embedding_function = None
+        self._pool: ThreadPoolExecutor | None = None
+        self._client_lock = threading.RLock()  # servers call in from a pool of worker threads
+        self._ef_search: dict[str, int] = {}    # category → ef_search last seen/set on its shard
+        self._flat_store = None
+        self.slots = FactSlots(config.cortex_dir / "slots")
+        self.feed = open_feed(config.feed_dir)
+
+    def _get_client(self):
+        """Lazy init — recreates the client if vectordb was deleted, and picks up
+        shards created by other processes (proxy addon, MCP server).
+
+        chromadb is imported here rather than at module level so commands that
+        never touch the cortex don't pay for it."""
+        with self._client_lock:
+            if self._client is not None and self._db_path.exists():
+                _CACHE_HITS.inc(cache="collection")
+            else:
+                _CACHE_MISSES.inc(cache="collection")
+                import chromadb
+                self._client = chromadb.PersistentClient(path=str(self._db_path))
+                self._shards = {}
+                self._legacy = None
+                self._known_collections = -1
+            now = time.monotonic()
+            if now - self._discovered_at >= DISCOVER_INTERVAL:
+                self._discovered_at = now
+                if self._client.count_collections() != self._known_collections:
+                    self._discover()
+            return self._client
+
+    def _discover(self) -> None:
+        ef = self._get_embedding_function()
+        self._legacy = None
+        collections = self._client.list_collections()
+        names = {c.name for c in collections}
+        for collection in collections:
+            name = collection.name
+            if name.startswith(REBUILD_PREFIX) and name[len(REBUILD_PREFIX):] not in names:
+                # A rebuild dropped the old shard but died before renaming the new one into place.
+                collection.modify(name=name[len(REBUILD_PREFIX):])
+                name = collection.name
+            if name == LEGACY_COLLECTION:
+                self._legacy = self._client.get_collection(name, embedding_function=ef)
+            elif name.startswith(SHARD_PREFIX):
+                category = (collection.metadata or {}).get("category", name[len(SHARD_PREFIX):])
+                if category not in self._shards:
+                    self._shards[category] = self._client.get_collection(name, embedding_function=ef)
+        self._known_collections = self._client.count_collections()
+
+    def _flat(self):
+        if self._flat_store is None:
+            from onememory.brain.flat import FlatStore
+            self._flat_store = FlatStore(self.config.cortex_dir / "flat", self.config.flat_dtype)
+        return self._flat_store
+
+    def _flat_active(self) -> bool:
+        """Memories live in the flat store: it exists, or this is a new cortex that may start flat.
+        Flat-mode paths never open the chromadb client — that would create chroma.sqlite3."""
+        if self._flat().exists():
+            return True
+        return bool(self.config.flat_max_memories) and not (self._db_path / "chroma.sqlite3").exists()
+
+    @property
+    def backend(self) -> str:
+        """Which store holds the memories: "flat" or "hnsw"."""
+        return "flat" if self._flat_active() else "hnsw"
 
-    def get_all(self) -> list[MemoryEntry]:
-        collection = self._get_collection()
-        count = collection.count()
-        if count == 0:
+    def _shard(self, category: str):
+        shard = self._shards.get(category)
+        if shard is None:
+            with self._client_lock:
+                shard = self._get_client().get_or_create_collection(
+                    shard_name(category),
+                    metadata={"category": category},
+                    configuration={"hnsw": self._hnsw(0)},
+                    embedding_function=self._get_embedding_function(),
+                )
+                self._shards[category] = shard
+                self._known_collections = self._client.count_collections()
+        return shard
+
+    def _hnsw(self, count: int, **overrides) -> dict:
+        params = {"space": "cosine", **index.tier(count), **{k: v for k, v in overrides.items() if v}}
+        if self.config.hnsw_ef_search:
+            params["ef_search"] = self.config.hnsw_ef_search
+        return params
+
+    def _tune(self, categories) -> None:
+        """Move each shard's ef_search to the one for its current size."""
+        for category in categories:
+            shard = self._shards.get(category)
+            if shard is None:
+                continue
+            current = self._ef_search.get(category)
+            if current is None:
+                current = ((shard.configuration or {}).get("hnsw") or {}).get("ef_search")
+            wanted = self._hnsw(shard.count())["ef_search"]
+            if current != wanted:
+                shard.modify(configuration={"hnsw": {"ef_search": wanted}})
+            self._ef_search[category] = wanted
+
+    def _read_targets(self, categories: list[str] | None = None, exclude: tuple[str, ...] = ()) -> list[tuple]:
+        """(collection, where) pairs covering the requested categories, legacy store included."""
+        self._get_client()
+        if categories is None:
+            wanted = [c for c in self._shards if c not in exclude]
+            legacy_where = {"category": {"$nin": list(exclude)}} if exclude else None
+        else:
+            wanted = [c for c in categories if c not in exclude]
+            if not wanted:
+                return []
+            legacy_where = {"category": {"$in": wanted}}
+        targets = [(self._shards[c], None) for c in wanted if c in self._shards]
+        if self._legacy is not None:
+            targets.append((self._legacy, legacy_where))
+        return targets
+
+    def _get_embedding_function(self):
+        if self._embedding_function is None:
+            self._embedding_function = _shared_embedding_function()
+        return self._embedding_function
+
+    def _embed(self, texts: list[str]) -> list:
+        """Embed explicitly (rather than inside chromadb) so embedding time is measured on its own."""
+        with _EMBED_SECONDS.time(), profiling.span("embed", texts=len(texts)):
+            return self._get_embedding_function()(texts)
+
+    def store_memory(self, entry: MemoryRecord | MemoryEntry) -> str:
+        return self.store_many([entry])[0]
+
+    def store_many(self, entries: list[MemoryRecord | MemoryEntry], embeddings: list | None = None) -> list[str]:
+        """Upsert a batch, one write per shard. Embeds unless `embeddings` are given."""
+        records = [e if isinstance(e, MemoryRecord) else MemoryRecord.from_entry(e) for e in entries]
+        if not records:
             return []
-        result = collection.get()
-        entries = []
-        for i, doc_id in enumerate(result["ids"]):
-            meta = result["metadatas"][i]
-            entries.append(MemoryEntry(
-                id=doc_id,
-                content=result["documents"][i],
-                category=meta.get("category", "general"),
-                source=meta.get("source", ""),
-                tags=meta.get("tags", "").split(",") if meta.get("tags") else [],
-                importance=meta.get("importance", 0.5),
-                timestamp=meta.get("timestamp", ""),
-            ))
-        return entries
-
-    def get_by_category(self, category: str) -> list[MemoryEntry]:
-        collection = self._get_collection()
-        count = collection.count()
-        if count == 0:
+        if embeddings is None:
+            embeddings = self._embed([r.content for r in records])
+        ids = [r.id for r in records]
+        if self.config.fact_versioning and any(attribute(r) for r in records):
+            with self.slots.locked():  # held until the write lands: another writer resolves against it
+                records, embeddings, commit = self.slots.resolve(records, embeddings, self.lookup)
+                self._write(records, embeddings)
+                commit()
+        else:
+            self._write(records, embeddings)
+        _STORED.inc(len(ids))
+        self._publish("upsert", records)
+        return ids
+
+    def _write(self, records: list[MemoryRecord], embeddings: list) -> None:
+        if not (self._flat_active() and self._store_flat(records, embeddings)):
+            self._store_shards(records, embeddings)
+
+    def _store_flat(self, records: list[MemoryRecord], embeddings: list) -> bool:
+        """Write to the flat store unless another process moved it to the shards meanwhile.
+        Moves it there itself once this write takes it past flat_max_memories."""
+        flat = self._flat()
+        with flat.locked():
+            if not self._flat_active():
+                return False
+            with _UPSERT_SECONDS.time(), profiling.span("upsert", shards=0):
+                touched = flat.store(records, embeddings)
+            self._bump([shard_name(c) for c in touched])
+            limit = self.config.flat_max_memories
+            if not limit or flat.count() > limit:
+                self._promote()
+        return True
+
+    def _promote(self, page: int = MIGRATE_BATCH) -> int:
+        """Move the flat store into HNSW shards, embeddings reused, then drop it (flat lock held).
+        An interrupted move leaves the flat store in place; the next write starts over."""
+        flat = self._flat()
+        moved = 0
+        for records, embeddings in flat.pages(page):
+            self._store_shards(records, embeddings)
+            moved += len(records)
+        flat.drop()
+        return moved
+
+    def _store_shards(self, records: list[MemoryRecord], embeddings: list) -> None:
+        self._get_client()
+        by_category: dict[str, list[int]] = defaultdict(list)
+        for i, record in enumerate(records):
+            by_category[record.category].append(i)
+        with _UPSERT_SECONDS.time(), profiling.span("upsert", shards=len(by_category)):
+            for category, rows in by_category.items():
+                self._shard(category).upsert(
+                    ids=[records[i].id for i in rows],
+                    documents=[records[i].content for i in rows],
+                    metadatas=[records[i].to_metadata() for i in rows],
+                    embeddings=[embeddings[i] for i in rows],
+                )
+            # An id lives in exactly one shard — drop copies left by a category change.
+            # Look before deleting: a lookup by id is an order of magnitude cheaper than a delete.
+            touched = [shard_name(c) for c in by_category]
+            for category, shard in self._shards.items():
+                if _drop(shard, [r.id for r in records if r.category != category]):
+                    touched.append(shard_name(category))
+            if self._legacy is not None and _drop(self._legacy, [r.id for r in records]):
+                touched.append(LEGACY_COLLECTION)
+        self._tune(by_category)
+        self._bump(touched)
+
+    def update_importance(self, scores: dict[str, float]) -> int:
+        """Set the importance of existing memories (id → importance) in bulk, metadata only —
+        one lookup and one update per shard, nothing re-embedded. Returns how many were found."""
+        if not scores:
+            return 0
+        if self._flat_active():
+            flat = self._flat()
+            with flat.locked():
+                if self._flat_active():
+                    updated, touched = flat.update({i: {"importance": v} for i, v in scores.items()})
+                    self._bump([shard_name(c) for c in touched])
+                    self._publish("update", updated)
+                    return len(updated)
+        remaining = dict(scores)
+        touched = []
+        updated = []
+        with _UPSERT_SECONDS.time(), profiling.span("update", memories=len(scores)):
+            for collection, _ in self._read_targets():
+                ids = list(remaining)
+                for start in range(0, len(ids), GET_PAGE):
+                    found = collection.get(ids=ids[start:start + GET_PAGE], include=["metadatas", "documents"])
+                    if not found["ids"]:
+                        continue
+                    metadatas = [{**(m or {}), "importance": remaining.pop(i)} for i, m in zip(found["ids"], found["metadatas"])]
+                    collection.update(ids=found["ids"], metadatas=metadatas)
+                    updated += self._records({**found, "metadatas": metadatas})
+                    touched.append(collection.name)
+        self._bump(touched)
+        self._publish("update", updated)
+        return len(updated)
+
+    def resolve_facts(self) -> int:
+        """Slot the identity/preference facts stored before fact versioning, oldest first, superseding
+        as if they had been written in that order. Returns how many were slotted."""
+        records = self.slots.unslotted(chain.from_iterable(map(self.get_by_category, SLOT_CATEGORIES)))
+        if not records:
+            return 0
+        stored = self.lookup([r.id for r in records])
+        records = sorted((r for r in records if r.id in stored), key=lambda r: r.timestamp)
+        self.store_many(records, [stored[r.id][1] for r in records])
+        return len(records)
+
+    def lookup(self, ids: list[str]) -> dict[str, tuple[MemoryRecord, list]]:
+        """id → (record, embedding) for the given ids that are stored."""
+        if not ids:
+            return {}
+        if self._flat_active():
+            return self._flat().lookup(ids)
+        found: dict[str, tuple[MemoryRecord, list]] = {}
+        for collection, _ in self._read_targets():
+            rows = collection.get(ids=[i for i in ids if i not in found], include=["documents", "metadatas", "embeddings"])
+            for record, vector in zip(self._records(rows), rows["embeddings"]):
+                found[record.id] = (record, list(vector))
+            if len(found) == len(ids):
+                break
+        return found
+
+    def _publish(self, op: str, records: list[MemoryRecord]) -> None:
+        """Tell the change feed (onememory.feed) about written memories."""
+        self.feed.publish([change("memory", op, r.id, r.as_dict()) for r in records])
+
+    def _bump(self, names: list[str]) -> None:
+        """Give each written shard a new version: a fresh file (new inode, new mtime) per write."""
+        self._versions_dir.mkdir(parents=True, exist_ok=True)
+        for name in set(names):
+            path = self._versions_dir / name
+            tmp = path.with_name(f".{name}.{os.getpid()}.{threading.get_ident()}")
+            tmp.touch()
+            os.replace(tmp, path)
+
+    def versions(self) -> dict:
+        """Current version of every shard that has been written, keyed by collection name,
+        plus "shards" — the set of them, which changes when a category first appears."""
+        versions: dict = {}
+        try:
+            with os.scandir(self._versions_dir) as entries:
+                for entry in entries:
+                    if not entry.name.startswith("."):
+                        st = entry.stat()
+                        versions[entry.name] = (st.st_ino, st.st_mtime_ns)
+        except FileNotFoundError:
+            pass
+        versions["shards"] = tuple(sorted(versions))
+        return versions
+
+    def embed_query(self, query: str):
+        return self._embed([query])[0]
+
+    def embed_documents(self, texts: list[str]) -> list:
+        return self._embed(texts)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        categories: list[str] | None = None,
+        embedding=None,
+    ) -> list[ScoredRecord]:
+        """Semantic vector search — fanned out over the shards in parallel, top-k merged.
+        Pass `embedding` when the caller already embedded the query. Superseded facts
+        are only searched when asked for by category."""
+        exclude = (SUPERSEDED,) if categories is None else ()
+        if self._flat_active():
+            with _SEARCH_SECONDS.time():
+                if embedding is None:
+                    embedding = self._embed([query])[0]
+                with profiling.span("flat_query"):
+                    hits = self._flat().search(embedding, limit, categories, exclude)
+            return [ScoredRecord(entry=record, score=round(max(0.0, score), 2)) for score, record in hits]
+        targets = self._read_targets(categories, exclude)
+        if not targets:
             return []
-        result = collection.get(where={"category": category})
-        entries = []
-        for i, doc_id in enumerate(result["ids"]):
-            meta = result["metadatas"][i]
-            entries.append(MemoryEntry(
-                id=doc_id,
-                content=result["documents"][i],
-                category=meta.get("category", "general"),
-                source=meta.get("source", ""),
-                tags=meta.get("tags", "").split(",") if meta.get("tags") else [],
-                importance=meta.get("importance", 0.5),
-                timestamp=meta.get("timestamp", ""),
-            ))
-        return entries
+        with _SEARCH_SECONDS.time():
+            query_embeddings = [embedding] if embedding is not None else self._embed([query])
+
+            def query_shard(target) -> list[tuple]:
+                collection, where = target
+                count = collection.count()
+                if count == 0:
+                    return []
+                result = collection.query(
+                    query_embeddings=query_embeddings,
+                    n_results=min(limit, count),
+                    where=where,
+                )
+                ids = result["ids"][0]
+                documents = result["documents"][0]
+                metadatas = result["metadatas"][0]
+                distances = result["distances"][0] if result.get("distances") else [0] * len(ids)
+                return [(distances[i], doc_id, documents[i], metadatas[i]) for i, doc_id in enumerate(ids)]
+
+            with profiling.span("vector_query", shards=len(targets)):
+                if len(targets) == 1 or SEARCH_WORKERS == 1:
+                    hits = chain.from_iterable(map(query_shard, targets))
+                else:
+                    hits = chain.from_iterable(self._search_pool().map(query_shard, targets))
+                best = heapq.nsmallest(limit, hits, key=lambda hit: hit[0])
+        return [
+            ScoredRecord(
+                entry=MemoryRecord.from_row(doc_id, document, meta),
+                score=round(max(0.0, 1.0 - distance), 2),
+            )
+            for distance, doc_id, document, meta in best
+        ]
+
+    def _search_pool(self) -> ThreadPoolExecutor:
+        with self._client_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="cortex-search")
+            return self._pool
+
+    def _records(self, result: dict) -> list[MemoryRecord]:
+        documents = result["documents"]
+        metadatas = result["metadatas"]
+        return [
+            MemoryRecord.from_row(doc_id, documents[i], metadatas[i])
+            for i, doc_id in enumerate(result["ids"])
+        ]
+
+    def _get(self, targets: list[tuple]) -> list[MemoryRecord]:
+        records: list[MemoryRecord] = []
+        for collection, where in targets:
+            offset = 0
+            while True:  # paged: one unbounded get() overflows SQLite's variable limit on big shards
+                page = collection.get(where=where, limit=GET_PAGE, offset=offset)
+                records.extend(self._records(page))
+                if len(page["ids"]) < GET_PAGE:
+                    break
+                offset += GET_PAGE
+        return records
+
+    def iter_records(self, embeddings: bool = False, page: int = GET_PAGE) -> Iterator[tuple[MemoryRecord, list | None]]:
+        """Every memory, one page in memory at a time — (record, embedding or None)."""
+        if self._flat_active():
+            for records, vectors in self._flat().pages(page, embeddings):
+                for i, record in enumerate(records):
+                    yield record, (vectors[i] if vectors is not None else None)
+            return
+        include = ["documents", "metadatas", "embeddings"] if embeddings else ["documents", "metadatas"]
+        for collection, where in self._read_targets():
+            offset = 0
+            while True:
+                rows = collection.get(where=where, limit=page, offset=offset, include=include)
+                vectors = rows["embeddings"] if embeddings else None
+                for i, record in enumerate(self._records(rows)):
+                    yield record, (list(vectors[i]) if vectors is not None else None)
+                if len(rows["ids"]) < page:
+                    break
+                offset += page
+
+    def get_all(self, exclude: tuple[str, ...] = ()) -> list[MemoryRecord]:
+        """Every current memory — superseded facts are left out (get_by_category(SUPERSEDED))."""
+        exclude = (*exclude, SUPERSEDED)
+        with profiling.span("cortex_get"):
+            if self._flat_active():
+                return self._flat().records(exclude=exclude)
+            return self._get(self._read_targets(exclude=exclude))
+
+    def get_by_category(self, category: str) -> list[MemoryRecord]:
+        """A direct read of one shard."""
+        with profiling.span("cortex_get", category=category):
+            if self._flat_active():
+                return self._flat().records([category])
+            return self._get(self._read_targets([category]))
+
+    def categories(self) -> list[str]:
+        if self._flat_active():
+            return self._flat().categories()
+        self._get_client()
+        return sorted(self._shards)
+
+    def shards(self) -> dict[str, object]:
+        """category → its chromadb collection (none while the cortex is flat)."""
+        if self._flat_active():
+            return {}
+        self._get_client()
+        return dict(sorted(self._shards.items()))
+
+    def flat_info(self) -> dict:
+        """Size of the flat store — see FlatStore.info()."""
+        return self._flat().info()
+
+    @property
+    def db_path(self):
+        return self._db_path
 
     def count(self) -> int:
-        return self._get_collection().count()
+        if self._flat_active():
+            return self._flat().count()
+        return sum(collection.count() for collection, _ in self._read_targets())
+
+    def close(self) -> None:
+        """Stop the search pool and chromadb's per-path system so an evicted brain frees its memory."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        if self._flat_store is not None:
+            self._flat_store.close()
+        if self._client is not None:
+            _release_client(self._client)
+        self._client = None
+        self._shards = {}
+        self._legacy = None
+        self._known_collections = -1
+        self._discovered_at = 0.0
+
+    # -- migration -----------------------------------------------------------
+
+    def legacy_count(self) -> int:
+        if self._flat_active():
+            return 0
+        self._get_client()
+        return self._legacy.count() if self._legacy is not None else 0
+
+    def migrate(self, batch: int = MIGRATE_BATCH, progress=None) -> int:
+        """Move the legacy single collection into category shards, reusing its embeddings.
+
+        Rows are deleted from the legacy collection as each batch lands, so an
+        interrupted migration simply resumes; the empty collection is dropped."""
+        if self._flat_active():
+            return 0
+        self._get_client()
+        if self._legacy is None:
+            return 0
+        moved = 0
+        while True:
+            page = self._legacy.get(limit=batch, include=["documents", "metadatas", "embeddings"])
+            if not page["ids"]:
+                break
+            records = self._records(page)
+            self.store_many(records, embeddings=list(page["embeddings"]))
+            moved += len(records)
+            if progress is not None:
+                progress(moved)
+        self._client.delete_collection(LEGACY_COLLECTION)
+        self._bump([LEGACY_COLLECTION])
+        self._legacy = None
+        self._known_collections = self._client.count_collections()
+        return moved
+
+    # -- index maintenance ---------------------------------------------------
+
+    def rebuild(
+        self,
+        category: str,
+        max_neighbors: int = 0,
+        ef_construction: int = 0,
+        ef_search: int = 0,
+        page: int = MIGRATE_BATCH,
+        progress=None,
+    ) -> dict:
+        """Re-create a shard's HNSW graph: copy its rows (embeddings included) into
+        a fresh collection built with tuned parameters, then swap it in.
+
+        The copy has no deleted nodes, so this also compacts. Parameters left
+        at 0 come from the tier for the shard's size. Writes to this shard from
+        other processes while it is copied are lost — stop them first."""
+        with self._client_lock:
+            old = self.shards().get(category)
+            if old is None:
+                raise ValueError(f"no shard for category {category!r}")
+            name = old.name
+            temp = REBUILD_PREFIX + name
+            if temp in {c.name for c in self._client.list_collections()}:
+                self._client.delete_collection(temp)  # left by an interrupted rebuild; the old shard is intact
+            count = old.count()
+            params = self._hnsw(count, max_neighbors=max_neighbors, ef_construction=ef_construction, ef_search=ef_search)
+            new = self._client.create_collection(
+                temp,
+                metadata={k: v for k, v in (old.metadata or {}).items() if not k.startswith("hnsw:")} or None,
+                configuration={"hnsw": params},
+                embedding_function=self._get_embedding_function(),
+            )
+            copied = 0
+            while True:
+                rows = old.get(limit=page, offset=copied, include=["documents", "metadatas", "embeddings"])
+                if not rows["ids"]:
+                    break
+                new.upsert(
+                    ids=rows["ids"], documents=rows["documents"], metadatas=rows["metadatas"],
+                    embeddings=rows["embeddings"],
+                )
+                copied += len(rows["ids"])
+                if progress is not None:
+                    progress(copied)
+                if len(rows["ids"]) < page:
+                    break
+            if new.count() != count:
+                self._client.delete_collection(temp)
+                raise RuntimeError(f"shard {name} changed during the rebuild ({count} → {new.count()} rows); nothing swapped")
+            self._client.delete_collection(name)
+            new.modify(name=name)
+            self._shards[category] = self._client.get_collection(name, embedding_function=self._get_embedding_function())
+            self._ef_search[category] = params["ef_search"]
+            self._known_collections = self._client.count_collections()
+        self._bump([name])
+        return {"category": category, "collection": name, "count": count, **params}
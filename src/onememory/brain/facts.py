@@ -0,0 +1,260 @@
+"""Fact slots — one active version per identity/preference attribute.
+
+"I live in Berlin" and, months later, "I live in Lisbon" are two identity
+memories with different ids, and recall() used to list both forever. The
+cortex now resolves such facts as they are written. A fact that starts with
+a SLOTS signal belongs to that attribute. A single-valued attribute has one
+current value, so a fact fills the same slot as an active fact of the
+attribute when the cosine of their embeddings reaches the attribute's
+threshold (any other home replaces the old one). Likes, tools and habits are
+multi-valued: "I love hiking" must not replace "I love tea", however close
+their embeddings, so these fill the same slot only when they are about the
+same object — "I hate tea" does replace "I love tea":
+
+    attribute    signals                              same slot when
+    name         my name is                           cosine >= 0.3
+    home         i live in                            cosine >= 0.3
+    employer     i work at                            cosine >= 0.3
+    occupation   i work as, i am a, i'm a             cosine >= 0.6
+    favorite     my favorite                          cosine >= 0.7
+    preference   i prefer                             cosine >= 0.7
+    sentiment    i like, i love, i hate, i dislike,   same object
+                 i don't like
+    tool         i use                                same object
+    habit        i always                             same object
+
+The object is what follows the signal, up to the end of the clause,
+lower-cased ("I love tea." and "i hate Tea" are both about "tea").
+
+The newest version of a slot (by timestamp) stays in its category; older
+ones are re-filed under the SUPERSEDED category — embedding and all, so
+nothing is re-embedded — which default searches and context reads leave
+out. Restating an old value makes it current again.
+
+Slots are kept in cortex/slots/slots.wal as checksummed lines
+(journal.encode), the last line for a slot winning, followed by offset like
+the flat store's log. Writers hold its flock from resolution until the
+cortex write is done, so two processes can't both keep their own version.
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import threading
+from collections.abc import Callable, Iterable
+from dataclasses import replace
+from pathlib import Path
+from typing import TYPE_CHECKING
+from onememory import journal, metrics
+from onememory.brain.records import MemoryRecord
+
+if TYPE_CHECKING:
+    import numpy as np
+
+SUPERSEDED = "superseded"
+SLOT_CATEGORIES = ("identity", "preference")
+SLOTS = {  # attribute: (signals, cosine at which two of its facts are about the same thing, or None: same object)
+    "name": (("my name is",), 0.3),
+    "home": (("i live in",), 0.3),
+    "employer": (("i work at",), 0.3),
+    "occupation": (("i work as", "i am a", "i'm a"), 0.6),
+    "favorite": (("my favorite",), 0.7),
+    "preference": (("i prefer",), 0.7),
+    "sentiment": (("i like", "i love", "i hate", "i dislike", "i don't like"), None),
+    "tool": (("i use",), None),
+    "habit": (("i always",), None),
+}
+SLOTS_LOG = "slots.wal"
+LOCK_NAME = ".lock"
+COMPACT_SLACK = 256  # rewrite the log once it has this many lines more than twice the slots
+
+_CLAUSE_END = re.compile(r"[.,;:!?\n]")
+_SIGNALS = [(signal, attribute) for attribute, (signals, _) in SLOTS.items() for signal in signals]
+_SUPERSEDED = metrics.counter("facts_superseded_total", "Identity/preference facts replaced by a newer version")
+
+
+def attribute(record: MemoryRecord) -> str | None:
+    """The SLOTS attribute an identity/preference fact is about — its earliest signal — or None."""
+    if record.category not in SLOT_CATEGORIES:
+        return None
+    lower = record.content.lower()
+    found = [(at, name) for signal, name in _SIGNALS if (at := lower.find(signal)) >= 0]
+    return min(found)[1] if found else None
+
+
+def about(content: str, name: str) -> str:
+    """What a fact of multi-valued attribute `name` is about: the clause after its first signal."""
+    lower = content.lower()
+    at, signal = min((lower.find(signal), signal) for signal in SLOTS[name][0] if signal in lower)
+    return " ".join(_CLAUSE_END.split(lower[at + len(signal):], 1)[0].split())
+
+
+def _unit(vector) -> np.ndarray:
+    import numpy as np  # here, not at the top: the cortex imports this module and CLI start-up shouldn't pay for numpy
+    v = np.asarray(vector, dtype=np.float32)
+    return v / max(float(np.linalg.norm(v)), 1e-12)
+
+
+class FactSlots:
+    """The version history of every slotted fact, and resolution of new ones against it."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._file_lock = journal.FileLock(directory / LOCK_NAME)
+        self._state = threading.RLock()
+        self._inode = None
+        self._offset = 0
+        self._lines = 0
+        self._slots: dict[str, dict] = {}  # slot id → {"attribute", "category", "active", "versions"}
+        self._fact: dict[str, str] = {}    # fact id → its slot
+
+    def locked(self) -> journal.FileLock:
+        """Exclusive across threads and processes; re-entrant within a thread."""
+        return self._file_lock
+
+    # -- following the log ----------------------------------------------------
+
+    def _refresh(self) -> None:
+        """Apply lines other processes (or this one) appended since the last look."""
+        with self._state:
+            try:
+                st = os.stat(self.directory / SLOTS_LOG)
+            except FileNotFoundError:  # never written, or reset
+                self._inode, self._offset, self._lines = None, 0, 0
+                self._slots, self._fact = {}, {}
+                return
+            if st.st_ino != self._inode:  # first look, or the log was compacted
+                self._inode, self._offset, self._lines = st.st_ino, 0, 0
+                self._slots, self._fact = {}, {}
+            if st.st_size <= self._offset:
+                return
+            lines, bad, self._offset = journal.read_from(self.directory / SLOTS_LOG, self._offset, st.st_size)
+            self._lines += len(lines) + bad
+            for line in lines:
+                self._put(line.pop("slot"), line)
+
+    def _put(self, slot_id: str, slot: dict) -> None:
+        old = self._slots.get(slot_id)
+        for version in old["versions"] if old else ():
+            self._fact.pop(version["id"], None)
+        self._slots[slot_id] = slot
+        for version in slot["versions"]:
+            self._fact[version["id"]] = slot_id
+
+    def _save(self, changed: dict[str, dict]) -> None:
+        """Append the new state of each changed slot (lock held)."""
+        if not changed:
+            return
+        data = b"".join(journal.encode({"slot": slot_id, **slot}) for slot_id, slot in changed.items())
+        journal.append_lines(self.directory / SLOTS_LOG, data)
+        self._refresh()
+        if self._lines > 2 * len(self._slots) + COMPACT_SLACK:
+            with self._state:
+                lines = [journal.encode({"slot": slot_id, **slot}) for slot_id, slot in self._slots.items()]
+            journal.atomic_write(self.directory / SLOTS_LOG, b"".join(lines))
+            self._refresh()
+
+    # -- resolution -------------------------------------------------------------
+
+    def resolve(
+        self,
+        records: list[MemoryRecord],
+        embeddings: list,
+        lookup: Callable[[list[str]], dict[str, tuple[MemoryRecord, list]]],
+    ) -> tuple[list[MemoryRecord], list, Callable[[], None]]:
+        """Place a batch's slotted facts (lock held). Returns what to write instead — the batch, with
+        facts older than their slot's current version re-filed as superseded, plus the current
+        versions newer facts displace — and a commit() to call once that write is done.
+        `lookup(ids)` gives the stored (record, embedding) of each id the cortex still has."""
+        self._refresh()
+        incoming = [(i, name) for i, r in enumerate(records) if (name := attribute(r)) is not None]
+        if not incoming:
+            return records, embeddings, lambda: None
+        with self._state:
+            slots = {k: {**v, "versions": [dict(x) for x in v["versions"]]} for k, v in self._slots.items()}
+            fact = dict(self._fact)
+        wanted = {name for _, name in incoming}
+        stored = lookup([s["active"] for s in slots.values() if s["attribute"] in wanted and s["active"]])
+        current: dict[str, tuple[MemoryRecord, np.ndarray]] = {  # slot → its active version
+            slot_id: (stored[s["active"]][0], _unit(stored[s["active"]][1]))
+            for slot_id, s in slots.items() if s["active"] in stored
+        }
+        records = list(records)
+        embeddings = list(embeddings)
+        batch = {r.id: i for i, r in enumerate(records)}
+        displaced: dict[str, tuple[MemoryRecord, list]] = {}
+        changed: set[str] = set()
+        for i, name in sorted(incoming, key=lambda item: records[item[0]].timestamp):
+            record, vector = records[i], _unit(embeddings[i])
+            slot_id = fact.get(record.id) or self._match(slots, current, name, record, vector)
+            if slot_id is None:
+                slot_id = record.id
+                slots[slot_id] = {"attribute": name, "category": record.category, "active": record.id, "versions": []}
+            slot = slots[slot_id]
+            fact[record.id] = slot_id
+            changed.add(slot_id)
+            active = current.get(slot_id)
+            if active is None or active[0].id == record.id or record.timestamp >= active[0].timestamp:
+                if active is not None and active[0].id != record.id:
+                    old = active[0]
+                    if old.id in batch:  # one of this batch: re-file it where it is, not as a second copy
+                        records[batch[old.id]] = replace(records[batch[old.id]], category=SUPERSEDED)
+                    else:
+                        displaced[old.id] = (replace(old, category=SUPERSEDED), stored[old.id][1])
+                    _SUPERSEDED.inc()
+                slot["active"] = record.id
+                slot["category"] = record.category
+                current[slot_id] = (record, vector)
+                displaced.pop(record.id, None)
+            else:  # an older statement than what the slot holds: history from the start
+                records[i] = replace(record, category=SUPERSEDED)
+                _SUPERSEDED.inc()
+            versions = [v for v in slot["versions"] if v["id"] != record.id]
+            versions.append({"id": record.id, "content": record.content, "timestamp": record.timestamp})
+            slot["versions"] = sorted(versions, key=lambda v: v["timestamp"])
+        for record_id, (record, vector) in displaced.items():
+            records.append(record)
+            embeddings.append(list(vector))
+
+        def commit() -> None:
+            self._save({slot_id: slots[slot_id] for slot_id in changed})
+
+        return records, embeddings, commit
+
+    def _match(
+        self, slots: dict, current: dict, name: str, record: MemoryRecord, vector: np.ndarray,
+    ) -> str | None:
+        """The slot of attribute `name` that `record` is another version of: the one whose active
+        version is closest to `vector`, if close enough — or, multi-valued, about the same object."""
+        threshold = SLOTS[name][1]
+        if threshold is None:
+            subject = about(record.content, name)
+            return next((
+                slot_id for slot_id, (active, _) in current.items()
+                if slots[slot_id]["attribute"] == name and about(active.content, name) == subject
+            ), None)
+        best, best_score = None, threshold
+        for slot_id, (_, active) in current.items():
+            if slots[slot_id]["attribute"] != name:
+                continue
+            score = float(active @ vector)
+            if score >= best_score:
+                best, best_score = slot_id, score
+        return best
+
+    # -- reads ------------------------------------------------------------------
+
+    def slots(self, name: str = "") -> list[dict]:
+        """Every slot (of one attribute), with "id", most recently changed first."""
+        self._refresh()
+        with self._state:
+            found = [{"id": slot_id, **json.loads(json.dumps(s))} for slot_id, s in self._slots.items()]
+        if name:
+            found = [s for s in found if s["attribute"] == name]
+        return sorted(found, key=lambda s: s["versions"][-1]["timestamp"] if s["versions"] else "", reverse=True)
+
+    def unslotted(self, records: Iterable[MemoryRecord]) -> list[MemoryRecord]:
+        """The records that name an attribute but are in no slot yet (facts stored before slots)."""
+        self._refresh()
+        with self._state:
+            return [r for r in records if r.id not in self._fact and attribute(r) is not None]
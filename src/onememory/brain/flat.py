@@ -0,0 +1,347 @@
+"""Flat store — brute-force NumPy search for cortexes of a few thousand memories.
+
+A personal store rarely holds more than a few thousand memories. At that
+size one matrix product over every normalized embedding is exact, faster
+than an HNSW query, and opening it costs a file map instead of chromadb's
+PersistentClient. The store lives in cortex/flat/:
+
+    header.json    embedding dimension and storage dtype
+    vectors.bin    one unit-normalized row per memory — float32, float16 or
+                   int8 (scaled by 127) — memory-mapped for search
+    records.wal    checksummed lines (journal.encode) binding a row to its
+                   memory; the last line for a row wins
+
+Writers serialize on a flock, write vectors before the lines that point at
+them (a crash leaves at most an unreferenced row), and overwrite an
+existing id's row in place. Readers follow records.wal by offset, so
+picking up another process's write costs only the new lines, and keep one
+category code per row: category filters are a single vectorized isin().
+The log is rewritten with one line per row once re-upserts have doubled it.
+
+Cortex uses this store for new cortexes until they outgrow
+`flat_max_memories`, then moves them into HNSW shards (see cortex.py).
+"""
+from __future__ import annotations
+import json
+import os
+import shutil
+import threading
+from collections.abc import Iterator
+from dataclasses import replace
+from pathlib import Path
+import numpy as np
+from onememory import journal
+from onememory.brain.records import MemoryRecord
+
+HEADER = "header.json"
+VECTORS = "vectors.bin"
+RECORDS = "records.wal"
+LOCK_NAME = ".lock"
+DTYPES = ("float32", "float16", "int8")
+INT8_SCALE = 127.0
+SCORE_CHUNK = 8192      # rows widened to float32 at a time when scoring a float16/int8 matrix
+COMPACT_SLACK = 1024    # rewrite records.wal once it has this many lines more than twice the rows
+
+
+def _pwrite_all(fd: int, data: bytes, offset: int) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view, offset = view[written:], offset + written
+
+
+def _copy(record: MemoryRecord) -> MemoryRecord:
+    """Callers get their own record; the store's are shared between threads."""
+    return replace(record, tags=list(record.tags))
+
+
+class FlatStore:
+    """Memories as the rows of one memory-mapped matrix, searched by brute force."""
+
+    def __init__(self, directory: Path, dtype: str = "float32") -> None:
+        if dtype not in DTYPES:
+            raise ValueError(f"flat store dtype must be one of {', '.join(DTYPES)}, not {dtype!r}")
+        self.directory = directory
+        self.dtype = dtype  # for a new store; an existing one keeps the dtype in its header
+        self._file_lock = journal.FileLock(directory / LOCK_NAME)
+        self._state = threading.RLock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self._dim = 0
+        self._dtype = None
+        self._inode = None
+        self._offset = 0
+        self._lines = 0
+        self._rows: dict[str, int] = {}                # id → row
+        self._records: list[MemoryRecord | None] = []  # row → memory (None: written, never referenced)
+        self._codes = np.empty(0, dtype=np.int32)      # row → category code, -1 for no memory
+        self._names: dict[str, int] = {}               # category → code
+        self._matrix = None
+
+    def exists(self) -> bool:
+        return (self.directory / HEADER).exists()
+
+    def locked(self) -> journal.FileLock:
+        """Exclusive across threads and processes; re-entrant within a thread."""
+        return self._file_lock
+
+    # -- following the log ----------------------------------------------------
+
+    def _refresh(self) -> None:
+        """Apply lines other processes (or this one) appended since the last look."""
+        with self._state:
+            try:
+                st = os.stat(self.directory / RECORDS)
+            except FileNotFoundError:  # never written, reset, or moved to HNSW shards
+                if self._inode is not None:
+                    self._clear()
+                return
+            try:
+                if st.st_ino != self._inode:  # first look, or the log was compacted
+                    self._clear()
+                    header = json.loads((self.directory / HEADER).read_text())
+                    self._dim, self._dtype = header["dim"], np.dtype(header["dtype"])
+                    self._inode = st.st_ino
+                if st.st_size <= self._offset:
+                    return
+                lines, bad, self._offset = journal.read_from(self.directory / RECORDS, self._offset, st.st_size)
+                self._lines += len(lines) + bad
+                if lines:
+                    self._apply(lines)
+            except FileNotFoundError:  # dropped while we looked
+                self._clear()
+
+    def _apply(self, lines: list[dict]) -> None:
+        rows = max((line["row"] for line in lines), default=-1) + 1
+        if rows > len(self._records):
+            self._records.extend([None] * (rows - len(self._records)))
+        codes = np.full(len(self._records), -1, dtype=np.int32)
+        codes[:len(self._codes)] = self._codes
+        for line in lines:
+            row = line.pop("row")
+            record = MemoryRecord(**line)
+            code = self._names.setdefault(record.category, len(self._names))
+            self._records[row] = record
+            self._rows[record.id] = row
+            codes[row] = code
+        self._codes = codes
+        if self._matrix is None or len(self._matrix) < len(self._records):
+            self._map()
+
+    def _map(self) -> None:
+        rows = os.path.getsize(self.directory / VECTORS) // self._rowbytes
+        self._matrix = (
+            np.memmap(self.directory / VECTORS, dtype=self._dtype, mode="r", shape=(rows, self._dim))
+            if rows else None
+        )
+
+    @property
+    def _rowbytes(self) -> int:
+        return self._dim * self._dtype.itemsize
+
+    def _snapshot(self) -> tuple:
+        """(matrix, codes, records, category codes), consistent with each other."""
+        self._refresh()
+        with self._state:
+            rows = min(len(self._codes), len(self._matrix) if self._matrix is not None else 0)
+            matrix = self._matrix[:rows] if rows else None
+            return matrix, self._codes[:rows], self._records, dict(self._names)
+
+    # -- writes ---------------------------------------------------------------
+
+    def store(self, records: list[MemoryRecord], embeddings: list) -> set[str]:
+        """Upsert a batch. Returns the categories it touched, a record's old one included."""
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        with self.locked():
+            self._refresh()
+            if self._dtype is None:
+                self._create(vectors.shape[1])
+            if vectors.shape[1] != self._dim:
+                raise ValueError(f"embedding dimension {vectors.shape[1]} does not match the flat store's {self._dim}")
+            data = self._quantize(vectors)
+            latest = {record.id: i for i, record in enumerate(records)}  # the last of duplicate ids wins
+            touched: set[str] = set()
+            lines: list[bytes] = []
+            fresh: list[int] = []
+            fd = os.open(self.directory / VECTORS, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                end = os.fstat(fd).st_size // self._rowbytes  # past any unreferenced or torn row
+                for record_id, i in latest.items():
+                    row = self._rows.get(record_id)
+                    if row is None:
+                        row = end + len(fresh)
+                        fresh.append(i)
+                    else:
+                        touched.add(self._records[row].category)
+                        _pwrite_all(fd, data[i].tobytes(), row * self._rowbytes)
+                    touched.add(records[i].category)
+                    lines.append(journal.encode({"row": row, **records[i].as_dict()}))
+                if fresh:
+                    _pwrite_all(fd, data[fresh].tobytes(), end * self._rowbytes)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self._append(lines)
+            self._refresh()
+            if self._lines > 2 * len(self._rows) + COMPACT_SLACK:
+                self._compact()
+        return touched
+
+    def update(self, fields: dict[str, dict]) -> tuple[list[MemoryRecord], set[str]]:
+        """Change stored fields of existing memories (id → {field: value}) without touching
+        their vectors. Unknown ids are skipped. Returns (the updated memories, categories touched)."""
+        with self.locked():
+            self._refresh()
+            touched: set[str] = set()
+            lines: list[bytes] = []
+            updated: list[MemoryRecord] = []
+            for record_id, values in fields.items():
+                row = self._rows.get(record_id)
+                if row is None:
+                    continue
+                record = replace(self._records[row], **values)
+                touched.update((self._records[row].category, record.category))
+                lines.append(journal.encode({"row": row, **record.as_dict()}))
+                updated.append(_copy(record))
+            if lines:
+                self._append(lines)
+                self._refresh()
+                if self._lines > 2 * len(self._rows) + COMPACT_SLACK:
+                    self._compact()
+        return updated, touched
+
+    def _create(self, dim: int) -> None:
+        journal.atomic_write(self.directory / HEADER, json.dumps({"dim": dim, "dtype": self.dtype}))
+        journal.atomic_write(self.directory / RECORDS, b"")
+        journal.atomic_write(self.directory / VECTORS, b"")
+        self._refresh()
+
+    def _quantize(self, vectors):
+        if self._dtype == np.int8:
+            return np.clip(np.rint(vectors * INT8_SCALE), -127, 127).astype(np.int8)
+        return vectors.astype(self._dtype)
+
+    def _append(self, lines: list[bytes]) -> None:
+        journal.append_lines(self.directory / RECORDS, b"".join(lines))
+
+    def _compact(self) -> None:
+        """Rewrite records.wal with one line per row (called with the lock held)."""
+        with self._state:
+            lines = [
+                journal.encode({"row": row, **record.as_dict()})
+                for row, record in enumerate(self._records) if record is not None
+            ]
+            journal.atomic_write(self.directory / RECORDS, b"".join(lines))
+            st = os.stat(self.directory / RECORDS)
+            self._inode, self._offset, self._lines = st.st_ino, st.st_size, len(lines)
+
+    def drop(self) -> None:
+        """Delete the store (its rows now live elsewhere). Called with the lock held."""
+        graveyard = self.directory.with_name(f".{self.directory.name}.dropped-{os.getpid()}")
+        os.replace(self.directory, graveyard)  # gone for everyone at once, lock file included
+        shutil.rmtree(graveyard, ignore_errors=True)
+        with self._state:
+            self._clear()
+
+    def close(self) -> None:
+        with self._state:
+            self._clear()
+
+    # -- reads ----------------------------------------------------------------
+
+    def _mask(self, codes, names: dict[str, int], categories: list[str] | None, exclude: tuple[str, ...]):
+        mask = codes >= 0
+        if categories is not None:
+            mask &= np.isin(codes, [names[c] for c in categories if c in names])
+        if exclude:
+            mask &= ~np.isin(codes, [names[c] for c in exclude if c in names])
+        return mask
+
+    def _scores(self, matrix, query):
+        """Cosine similarity of every row with a unit query."""
+        if matrix.dtype == np.float32:
+            return np.asarray(matrix @ query)
+        scores = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), SCORE_CHUNK):
+            scores[start:start + SCORE_CHUNK] = matrix[start:start + SCORE_CHUNK].astype(np.float32) @ query
+        if matrix.dtype == np.int8:
+            scores /= INT8_SCALE
+        return scores
+
+    def search(
+        self, embedding, limit: int = 10, categories: list[str] | None = None, exclude: tuple[str, ...] = (),
+    ) -> list[tuple[float, MemoryRecord]]:
+        """The exact top `limit` (cosine similarity, record) pairs, best first."""
+        matrix, codes, records, names = self._snapshot()
+        if matrix is None or limit <= 0:
+            return []
+        mask = self._mask(codes, names, categories, exclude)
+        candidates = int(mask.sum())
+        if not candidates:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        scores = self._scores(matrix, query)
+        scores[~mask] = -np.inf
+        k = min(limit, candidates)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(float(scores[row]), _copy(records[row])) for row in top]
+
+    def records(self, categories: list[str] | None = None, exclude: tuple[str, ...] = ()) -> list[MemoryRecord]:
+        _, codes, records, names = self._snapshot()
+        return [_copy(records[row]) for row in np.flatnonzero(self._mask(codes, names, categories, exclude))]
+
+    def lookup(self, ids: list[str]) -> dict[str, tuple[MemoryRecord, list]]:
+        """id → (record, float32 embedding) for the ids the store has."""
+        matrix, codes, records, _ = self._snapshot()
+        with self._state:
+            rows = {i: row for i in ids if (row := self._rows.get(i)) is not None and row < len(codes) and codes[row] >= 0}
+        if not rows:
+            return {}
+        vectors = np.asarray(matrix[list(rows.values())], dtype=np.float32)
+        if matrix.dtype == np.int8:
+            vectors /= INT8_SCALE
+        return {i: (_copy(records[row]), vector) for (i, row), vector in zip(rows.items(), vectors.tolist())}
+
+    def pages(self, page: int = 5000, embeddings: bool = True) -> Iterator[tuple[list[MemoryRecord], list | None]]:
+        """Every memory in pages of (records, float32 embeddings or None)."""
+        matrix, codes, records, _ = self._snapshot()
+        rows = np.flatnonzero(codes >= 0)
+        for start in range(0, len(rows), page):
+            chunk = rows[start:start + page]
+            vectors = None
+            if embeddings:
+                vectors = np.asarray(matrix[chunk], dtype=np.float32)
+                if matrix.dtype == np.int8:
+                    vectors /= INT8_SCALE
+                vectors = vectors.tolist()
+            yield [_copy(records[row]) for row in chunk], vectors
+
+    def count(self) -> int:
+        _, codes, _, _ = self._snapshot()
+        return int((codes >= 0).sum())
+
+    def categories(self) -> list[str]:
+        _, codes, _, names = self._snapshot()
+        present = set(np.unique(codes[codes >= 0]).tolist())
+        return sorted(name for name, code in names.items() if code in present)
+
+    def info(self) -> dict:
+        """Rows, dtype and bytes on disk, for `onememory index stats`."""
+        matrix, codes, _, _ = self._snapshot()
+        size = 0
+        for name in (VECTORS, RECORDS):
+            try:
+                size += os.path.getsize(self.directory / name)
+            except OSError:
+                pass
+        return {
+            "count": int((codes >= 0).sum()),
+            "rows": 0 if matrix is None else len(matrix),
+            "dtype": str(self._dtype) if self._dtype is not None else self.dtype,
+            "dim": self._dim,
+            "bytes": size,
+        }
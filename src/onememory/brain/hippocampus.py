@@ -1,10 +1,35 @@
-"""Hippocampus — fast episodic memory capture, like the brain's hippocampus."""
+"""Hippocampus — fast episodic memory capture, like the brain's hippocampus.
+
+Captures are appended to the day's write-ahead log (onememory.journal) and
+folded into the daily JSON in batches; every read sees both. Each capture
+and imported conversation is also published to the change feed
+(onememory.feed), which other processes follow — on_capture callbacks only
+fire in this one.
+"""
 from __future__ import annotations
+import json
+import sqlite3
+from collections.abc import Iterator
 from datetime import datetime, timezone
 from pathlib import Path
+from pydantic import ValidationError
+from onememory import metrics, profiling
 from onememory.config import Config
+from onememory.feed import change, open_feed
+from onememory.journal import Journal
 from onememory.models import Conversation, DailyLog
-from onememory.brain.repository import FileStore
+from onememory.brain.history import HistoryIndex
+
+_CAPTURE_SECONDS = metrics.histogram("capture_seconds", "Hippocampus capture latency (durable WAL append)")
+_CAPTURES = metrics.counter("captures_total", "Conversations captured")
+
+
+def _parses(text: str) -> bool:
+    try:
+        json.loads(text)
+    except ValueError:
+        return False
+    return True
 
 
 class Hippocampus:
@@ -12,26 +37,55 @@ class Hippocampus:
 
     def __init__(self, config: Config) -> None:
         self.config = config
-        self.store = FileStore()
+        self.journal = Journal(config.hippocampus_dir)
+        self.index = HistoryIndex(config, self.journal.stamps, self.load_day)
+        self.feed = open_feed(config.feed_dir)
         self._on_capture_callbacks: list = []
 
     def _today_file(self) -> Path:
         today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
         return self.config.hippocampus_dir / f"{today}.json"
 
+    def load_day(self, day: str) -> DailyLog:
+        """A day's checkpointed log plus the captures still in its WAL."""
+        text, pending = self.journal.snapshot(day)
+        if text is None:
+            log = DailyLog(date=day)
+        else:
+            try:
+                log = DailyLog.model_validate_json(text)
+            except ValidationError:
+                if _parses(text):
+                    raise  # valid JSON, wrong shape — not crash damage, leave the file alone
+                with self.journal.locked():  # torn write: salvage what parses, then read again
+                    self.journal.repair(day)
+                return self.load_day(day)
+        if pending:
+            known = {c.id for c in log.conversations}
+            log.conversations.extend(
+                c for c in map(Conversation.model_validate, pending) if c.id not in known
+            )
+        return log
+
     def _load_daily(self, path: Path) -> DailyLog:
-        if path.exists():
-            return DailyLog.model_validate_json(path.read_text())
-        return DailyLog(date=path.stem)
+        return self.load_day(path.stem)
 
     def _save_daily(self, path: Path, log: DailyLog) -> None:
-        self.store.save(path, log)
+        self.journal.write(path.stem, log.model_dump(mode="json"))
 
     def capture(self, conversation: Conversation) -> str:
-        path = self._today_file()
-        log = self._load_daily(path)
-        log.conversations.append(conversation)
-        self._save_daily(path, log)
+        day = self._today_file().stem
+        data = conversation.model_dump(mode="json")
+        with _CAPTURE_SECONDS.time():
+            before = self.journal.stamp(day)
+            self.journal.append(day, data)
+            after = self.journal.stamp(day)
+        _CAPTURES.inc()
+        self.feed.publish([change("conversation", "capture", conversation.id, data)])
+        try:
+            self.index.add(conversation, day, before, after)
+        except sqlite3.Error:
+            pass  # the capture is durable; the next history query re-indexes the day
         for cb in self._on_capture_callbacks:
             try:
                 cb(conversation)
@@ -40,8 +94,8 @@ class Hippocampus:
         return conversation.id
 
     def get(self, conversation_id: str) -> Conversation | None:
-        for path in sorted(self.config.hippocampus_dir.glob("????-??-??.json"), reverse=True):
-            log = self._load_daily(path)
+        for day in reversed(self.journal.days()):
+            log = self.load_day(day)
             for c in log.conversations:
                 if c.id == conversation_id:
                     return c
@@ -49,27 +103,54 @@ class Hippocampus:
 
     def get_recent(self, limit: int = 20) -> list[Conversation]:
         results: list[Conversation] = []
-        for path in sorted(self.config.hippocampus_dir.glob("????-??-??.json"), reverse=True):
-            log = self._load_daily(path)
-            for c in reversed(log.conversations):
-                results.append(c)
-                if len(results) >= limit:
-                    return results
+        with profiling.span("hippocampus_recent"):
+            for day in reversed(self.journal.days()):
+                log = self.load_day(day)
+                for c in reversed(log.conversations):
+                    results.append(c)
+                    if len(results) >= limit:
+                        return results
         return results
 
     def get_all_today(self) -> list[Conversation]:
         return self._load_daily(self._today_file()).conversations
 
+    def iter_days(self) -> Iterator[DailyLog]:
+        """Daily logs oldest first, one loaded at a time."""
+        for day in self.journal.days():
+            yield self.load_day(day)
+
+    def restore_day(self, log: DailyLog) -> int:
+        """Merge conversations into a day's log, skipping ids it already has. Returns how many were added."""
+        with self.journal.locked():
+            existing = self.load_day(log.date)
+            if not existing.conversations:
+                existing.metadata = log.metadata
+            known = {c.id for c in existing.conversations}
+            added = [c for c in log.conversations if c.id not in known]
+            if added:
+                existing.conversations.extend(added)
+                self.journal.write(log.date, existing.model_dump(mode="json"))
+        self.feed.publish([change("conversation", "import", c.id, c.model_dump(mode="json")) for c in added])
+        return len(added)
+
+    def version(self) -> tuple:
+        """Changes whenever a daily log or WAL is written, added or removed — by any process."""
+        return tuple(sorted(self.journal.stamps().items()))
+
+    def recover(self, deep: bool = False) -> dict:
+        """Startup repair: checkpoint leftover WALs, salvage damaged daily logs."""
+        return self.journal.recover(deep)
+
+    def history(self, **filters) -> dict:
+        """Date-range / provider / model / full-text query over every captured conversation."""
+        return self.index.query(**filters)
+
     def on_capture(self, callback) -> None:
         """Observer pattern — register a callback for new captures."""
         self._on_capture_callbacks.append(callback)
 
     def count(self) -> int:
-        total = 0
-        for path in self.config.hippocampus_dir.glob("????-??-??.json"):
-            try:
-                log = self._load_daily(path)
-                total += len(log.conversations)
-            except Exception:
-                pass
-        return total
+        """From the history index: capture quotas check this on every capture, so no log parsing."""
+        with profiling.span("hippocampus_count"):
+            return self.index.count()
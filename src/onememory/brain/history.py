@@ -0,0 +1,260 @@
+"""History index — date-range, provider, model and full-text queries over the hippocampus.
+
+The daily logs stay the source of truth; this is a derived SQLite index
+next to them (hippocampus/index.sqlite3) with one row per conversation and
+an FTS5 table over its message text. Hippocampus.capture indexes each
+conversation as it is written. Anything else that changes a day — the
+proxy addon, `onememory import`, `clear`, a checkpoint — is caught by
+refresh(), which compares every day's journal stamp (mtime and size of its
+JSON and WAL) with what was indexed and re-reads only the days that differ.
+A query over a year of history is a handful of stats plus one indexed SQL
+query.
+
+Deleting the index file is always safe: the next query rebuilds it.
+"""
+from __future__ import annotations
+import sqlite3
+import threading
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+from onememory import metrics, profiling
+from onememory.config import Config
+from onememory.models import Conversation, DailyLog
+
+SCHEMA_VERSION = 2  # bump to rebuild: the index is derived, dropping it loses nothing
+PREVIEW_CHARS = 200
+MAX_PAGE = 500
+
+_QUERY_SECONDS = metrics.histogram("history_query_seconds", "History index query latency, including refresh")
+_REINDEXED = metrics.counter("history_days_reindexed_total", "Daily logs re-read because they changed on disk")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    day TEXT PRIMARY KEY,
+    stamp TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS conversations (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    source TEXT NOT NULL,
+    messages INTEGER NOT NULL,
+    preview TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS conversations_timestamp ON conversations (timestamp);
+CREATE INDEX IF NOT EXISTS conversations_day ON conversations (day);
+CREATE INDEX IF NOT EXISTS conversations_provider ON conversations (provider, timestamp);
+CREATE VIRTUAL TABLE IF NOT EXISTS conversations_fts USING fts5 (text, tokenize = 'unicode61');
+"""
+
+
+def _stamp(stamp: tuple) -> str:
+    return ",".join(map(str, stamp))
+
+
+def _match(text: str) -> str:
+    """User text → an FTS5 query: every word must appear, operators are taken literally."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+def _bound(value: str, end: bool = False) -> str:
+    """An ISO date or datetime → a timestamp bound. A bare end date includes that whole day."""
+    value = value.strip()
+    if len(value) == 10:
+        day = date.fromisoformat(value)
+        return (day + timedelta(days=1)).isoformat() if end else day.isoformat()
+    return datetime.fromisoformat(value).isoformat()
+
+
+class HistoryIndex:
+    """SQLite/FTS5 index of captured conversations, kept in sync with the daily logs."""
+
+    def __init__(
+        self,
+        config: Config,
+        stamps: Callable[[], dict[str, tuple]],
+        load_day: Callable[[str], DailyLog],
+    ) -> None:
+        self.config = config
+        self._stamps = stamps
+        self._load_day = load_day
+        self.path = config.hippocampus_dir / "index.sqlite3"
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None or not self.path.exists():  # `reset` removes the whole hippocampus dir
+            if self._conn is not None:
+                self._conn.close()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")  # one process indexes a capture while others query
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA busy_timeout = 5000")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                conn.executescript(
+                    "DROP TABLE IF EXISTS days; DROP TABLE IF EXISTS conversations;"
+                    " DROP TABLE IF EXISTS conversations_fts;"
+                )
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    # -- writes ---------------------------------------------------------------
+
+    def _insert(self, db: sqlite3.Connection, conversation: Conversation, day: str) -> None:
+        text = "\n".join(m.content for m in conversation.messages)
+        first_user = next((m.content for m in conversation.messages if m.role == "user"), text)
+        cursor = db.execute(
+            "INSERT INTO conversations (id, day, timestamp, provider, model, source, messages, preview)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                conversation.id,
+                day,
+                conversation.timestamp,
+                str(conversation.provider),
+                conversation.model,
+                str(conversation.metadata.get("source", "")),
+                len(conversation.messages),
+                first_user[:PREVIEW_CHARS],
+            ),
+        )
+        db.execute("INSERT INTO conversations_fts (rowid, text) VALUES (?, ?)", (cursor.lastrowid, text))
+
+    def _delete_day(self, db: sqlite3.Connection, day: str) -> None:
+        db.execute("DELETE FROM conversations_fts WHERE rowid IN (SELECT rowid FROM conversations WHERE day = ?)", (day,))
+        db.execute("DELETE FROM conversations WHERE day = ?", (day,))
+        db.execute("DELETE FROM days WHERE day = ?", (day,))
+
+    def add(
+        self,
+        conversation: Conversation,
+        day: str,
+        before: tuple,
+        after: tuple,
+    ) -> None:
+        """Index one just-captured conversation, after it is durable.
+
+        `before`/`after` are the day's journal stamps around the append. If the
+        index had exactly `before`, this capture is the only change and the day
+        stays in sync; otherwise another writer got there first and the next
+        refresh() re-reads the whole day instead."""
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT stamp FROM days WHERE day = ?", (day,)).fetchone()
+            if (row[0] if row else _stamp((0, 0, 0, 0))) != _stamp(before):
+                return
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                self._insert(db, conversation, day)
+                db.execute("INSERT OR REPLACE INTO days (day, stamp) VALUES (?, ?)", (day, _stamp(after)))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+    def refresh(self) -> int:
+        """Re-index every day whose journal stamp changed; drop days that are gone."""
+        on_disk = {day: _stamp(stamp) for day, stamp in self._stamps().items()}
+        with self._lock:
+            db = self._db()
+            indexed = dict(db.execute("SELECT day, stamp FROM days"))
+            stale = [day for day, stamp in on_disk.items() if indexed.get(day) != stamp]
+            gone = [day for day in indexed if day not in on_disk]
+            if not stale and not gone:
+                return 0
+            with profiling.span("history_reindex", days=len(stale) + len(gone)):
+                db.execute("BEGIN IMMEDIATE")
+                try:
+                    for day in gone:
+                        self._delete_day(db, day)
+                    for day in stale:
+                        self._delete_day(db, day)
+                        try:
+                            log = self._load_day(day)
+                        except (OSError, ValueError):
+                            continue  # unreadable right now; retried on the next refresh
+                        for conversation in log.conversations:
+                            self._insert(db, conversation, day)
+                        db.execute("INSERT OR REPLACE INTO days (day, stamp) VALUES (?, ?)", (day, on_disk[day]))
+                    db.execute("COMMIT")
+                except BaseException:
+                    db.execute("ROLLBACK")
+                    raise
+            _REINDEXED.inc(len(stale) + len(gone))
+            return len(stale) + len(gone)
+
+    # -- reads ----------------------------------------------------------------
+
+    def query(
+        self,
+        text: str = "",
+        start: str = "",
+        end: str = "",
+        provider: str = "",
+        model: str = "",
+        limit: int = 50,
+        offset: int = 0,
+    ) -> dict:
+        """One page of matching conversations, newest first, plus the total match count.
+
+        `start`/`end` are ISO dates or datetimes (a bare `end` date is inclusive),
+        `model` matches as a prefix ("gpt-4" finds "gpt-4o"), `text` must match
+        every word somewhere in the conversation; its hits come back as a
+        «marked» snippet."""
+        limit = max(1, min(limit, MAX_PAGE))
+        with _QUERY_SECONDS.time():
+            self.refresh()
+            where, params = [], []
+            if start:
+                where.append("c.timestamp >= ?")
+                params.append(_bound(start))
+            if end:
+                where.append("c.timestamp < ?")
+                params.append(_bound(end, end=True))
+            if provider:
+                where.append("c.provider = ?")
+                params.append(provider)
+            if model:
+                where.append("c.model LIKE ? ESCAPE '\\'")
+                params.append(model.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+            source = "conversations c"
+            snippet = "''"
+            if text.strip():
+                source += " JOIN conversations_fts f ON f.rowid = c.rowid"
+                where.append("conversations_fts MATCH ?")
+                params.append(_match(text))
+                snippet = "snippet(conversations_fts, 0, '«', '»', '…', 16)"
+            clause = (" WHERE " + " AND ".join(where)) if where else ""
+            with self._lock:
+                db = self._db()
+                total = db.execute(f"SELECT count(*) FROM {source}{clause}", params).fetchone()[0]
+                rows = db.execute(
+                    f"SELECT c.id, c.day, c.timestamp, c.provider, c.model, c.source, c.messages, c.preview, {snippet}"
+                    f" FROM {source}{clause} ORDER BY c.timestamp DESC LIMIT ? OFFSET ?",
+                    [*params, limit, offset],
+                ).fetchall()
+        keys = ("id", "date", "timestamp", "provider", "model", "source", "messages", "preview", "snippet")
+        return {
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "conversations": [dict(zip(keys, row)) for row in rows],
+        }
+
+    def count(self) -> int:
+        """Conversations across every day: one refresh (a directory scan when in sync) and a count."""
+        self.refresh()
+        with self._lock:
+            return self._db().execute("SELECT count(*) FROM conversations").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
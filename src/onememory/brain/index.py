@@ -0,0 +1,155 @@
+"""Vector index — HNSW parameters, health checks and rebuilds for the cortex shards.
+
+Every cortex shard is a chromadb collection backed by an HNSW graph. Its
+build parameters (max_neighbors, a.k.a. M, and ef_construction) are fixed
+when the collection is created; ef_search — how wide a query searches the
+graph — can change at any time. Parameters come from TIERS by shard size:
+
+    up to      M   ef_construction  ef_search
+    10k       16               100        100
+    100k      24               200        160
+    1m        32               300        256
+    beyond    48               400        400
+
+New shards are created with the first tier, and the cortex moves a shard's
+ef_search to its tier as it grows (or pins it with `hnsw_ef_search`).
+Deletes and re-upserts only mark graph nodes deleted, so a long-lived shard
+carries dead weight; `onememory index rebuild` copies each shard into a
+fresh collection built with its tier's M and ef_construction, then swaps it
+in. `onememory index stats` reports size, fragmentation and recall@k against
+an exact brute-force search.
+"""
+from __future__ import annotations
+import random
+import sqlite3
+import struct
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from onememory.brain.cortex import Cortex
+
+TIERS = [  # (up to this many memories, max_neighbors, ef_construction, ef_search)
+    (10_000, 16, 100, 100),  # chromadb's own defaults
+    (100_000, 24, 200, 160),
+    (1_000_000, 32, 300, 256),
+    (None, 48, 400, 400),
+]
+STATS_PAGE = 5000
+REBUILD_FRAGMENTATION = 0.2  # `index stats` suggests a rebuild above this share of deleted nodes
+
+# hnswlib's saved header as chromadb writes it (header.bin): format version,
+# then offsetLevel0, max_elements, cur_element_count, size_data_per_element,
+# label_offset, offsetData, maxlevel, enterpoint, maxM, maxM0, M, mult, ef_construction.
+_HEADER = struct.Struct("<iQQQQQQiIQQQdQ")
+
+
+def tier(count: int) -> dict:
+    """HNSW parameters for a shard of `count` memories."""
+    for limit, max_neighbors, ef_construction, ef_search in TIERS:
+        if limit is None or count <= limit:
+            return {"max_neighbors": max_neighbors, "ef_construction": ef_construction, "ef_search": ef_search}
+    raise AssertionError("TIERS must end with an unbounded tier")
+
+
+def graph_elements(db_path: Path, collection_id: str) -> tuple[int, int] | None:
+    """(nodes in the persisted HNSW graph, bytes on disk) for a collection, or None if unknown.
+
+    Nodes include deleted ones; comparing with the live count gives fragmentation."""
+    try:
+        db = sqlite3.connect(f"file:{db_path / 'chroma.sqlite3'}?mode=ro", uri=True)
+        try:
+            row = db.execute(
+                "SELECT id FROM segments WHERE collection = ? AND scope = 'VECTOR'", (str(collection_id),),
+            ).fetchone()
+        finally:
+            db.close()
+    except sqlite3.Error:
+        return None
+    if row is None:
+        return None
+    segment = db_path / row[0]
+    try:
+        header = (segment / "header.bin").read_bytes()[:_HEADER.size]
+        size = sum(f.stat().st_size for f in segment.iterdir() if f.is_file())
+    except OSError:
+        return None  # not persisted yet: small shards live in chromadb's log until it syncs
+    if len(header) < _HEADER.size:
+        return None
+    return _HEADER.unpack(header)[3], size
+
+
+def _exact_kth(collection, queries, k: int):
+    """The exact k-th best cosine similarity for each query row, streaming the shard page by page."""
+    import numpy as np
+    queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    best = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+    offset = 0
+    while True:
+        page = collection.get(limit=STATS_PAGE, offset=offset, include=["embeddings"])
+        if not page["ids"]:
+            break
+        vectors = np.asarray(page["embeddings"], dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        best = -np.sort(-np.concatenate([best, queries @ vectors.T], axis=1), axis=1)[:, :k]
+        if len(page["ids"]) < STATS_PAGE:
+            break
+        offset += STATS_PAGE
+    return best[:, -1]
+
+
+def shard_stats(cortex: Cortex, category: str, collection, k: int = 10, sample: int = 100) -> dict:
+    """Size, parameters, fragmentation and measured recall@k of one shard."""
+    import numpy as np
+    count = collection.count()
+    hnsw = (collection.configuration or {}).get("hnsw") or {}
+    stats = {
+        "category": category,
+        "collection": collection.name,
+        "count": count,
+        "max_neighbors": hnsw.get("max_neighbors"),
+        "ef_construction": hnsw.get("ef_construction"),
+        "ef_search": hnsw.get("ef_search"),
+        "graph_elements": None,
+        "bytes": None,
+        "fragmentation": None,
+        "recall": None,
+        "ann_ms": None,
+        "exact_ms": None,
+    }
+    graph = graph_elements(cortex.db_path, collection.id)
+    if graph is not None:
+        elements, size = graph
+        stats["graph_elements"], stats["bytes"] = elements, size
+        stats["fragmentation"] = round(max(0, elements - count) / elements, 3) if elements else 0.0
+    if count == 0 or sample <= 0:
+        return stats
+
+    rng = random.Random(0)
+    offsets = sorted(rng.sample(range(count), min(sample, count)))
+    queries = np.asarray(
+        [collection.get(limit=1, offset=o, include=["embeddings"])["embeddings"][0] for o in offsets],
+        dtype=np.float32,
+    )
+    n = min(k, count)
+    start = time.perf_counter()
+    kth = _exact_kth(collection, queries, n)
+    exact_s = time.perf_counter() - start
+    found, laps = 0, []
+    for query, threshold in zip(queries, kth):
+        start = time.perf_counter()
+        distances = collection.query(query_embeddings=[query.tolist()], n_results=n, include=["distances"])["distances"][0]
+        laps.append(time.perf_counter() - start)
+        # A hit is anything at least as close as the true k-th neighbour, so exact ties count.
+        found += sum(1 for d in distances if 1.0 - d >= threshold - 1e-5)
+    laps.sort()
+    stats["recall"] = round(found / (n * len(queries)), 4)
+    stats["ann_ms"] = round(laps[len(laps) // 2] * 1000, 3)
+    stats["exact_ms"] = round(exact_s / len(queries) * 1000, 3)
+    return stats
+
+
+def stats(cortex: Cortex, k: int = 10, sample: int = 100) -> list[dict]:
+    """shard_stats() for every shard."""
+    return [shard_stats(cortex, category, collection, k, sample) for category, collection in cortex.shards().items()]
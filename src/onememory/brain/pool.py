@@ -0,0 +1,160 @@
+"""Brain pool — one resident server, many namespaces.
+
+The MCP server, REST API and daemon each hold a BrainPool instead of a
+single global brain. Callers borrow a brain for the length of one call with
+`with pool.lease(namespace) as brain:`. Brains are opened on first use and
+kept in an LRU of `max_open_brains`; when a new namespace pushes the pool
+over capacity the least recently used one is evicted and closed (chromadb
+client, search threads) — at once if no call is using it, otherwise when
+the last lease on it ends. The embedding model is shared by every brain in
+the process.
+
+Opening and closing happen outside the pool's lock, so a slow first open of
+one namespace doesn't hold up calls to the others. While a namespace is
+being opened or closed, callers of that namespace wait for it: a process
+never has two brains over the same directory.
+"""
+from __future__ import annotations
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from onememory import metrics
+from onememory.config import Config
+from onememory.brain import create_brain
+from onememory.brain.prefrontal import PrefrontalCortex
+
+_CACHE_HITS = metrics.counter("cache_hits_total", "Cache hits by cache")
+_CACHE_MISSES = metrics.counter("cache_misses_total", "Cache misses by cache")
+_EVICTIONS = metrics.counter("brain_pool_evictions_total", "Brains closed to make room in the pool")
+_OPEN = metrics.gauge("brain_pool_open", "Brains currently open in the pool")
+
+
+class BrainPool:
+    """LRU of open brains, keyed by namespace, lent out one call at a time."""
+
+    def __init__(self, config: Config | None = None, capacity: int | None = None, default: str = "") -> None:
+        self.config = config or Config()
+        self.capacity = max(1, capacity or self.config.max_open_brains)
+        self.default = default or self.config.namespace
+        self._brains: OrderedDict[str, PrefrontalCortex] = OrderedDict()
+        self._retired: dict[str, PrefrontalCortex] = {}  # evicted, closed when their last lease ends
+        self._leases: dict[str, int] = {}                # namespace → calls using its brain
+        self._busy: dict[str, threading.Event] = {}      # namespace → set once it is done opening/closing
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def lease(self, namespace: str = "") -> Iterator[PrefrontalCortex]:
+        """The brain for `namespace` ("" → the pool's default), opened if needed and kept open
+        until the block ends — evicting it meanwhile only marks it to be closed afterwards."""
+        namespace = namespace or self.default
+        brain = self._acquire(namespace)
+        try:
+            yield brain
+        finally:
+            self._release(namespace)
+
+    # -- leases ---------------------------------------------------------------
+
+    def _acquire(self, namespace: str) -> PrefrontalCortex:
+        while True:
+            with self._lock:
+                busy = self._busy.get(namespace)
+                if busy is None:
+                    brain = self._brains.get(namespace)
+                    if brain is None:
+                        brain = self._retired.pop(namespace, None)  # evicted, but still in use: take it back
+                    if brain is None:
+                        busy = self._busy[namespace] = threading.Event()
+                        break  # ours to open
+                    _CACHE_HITS.inc(cache="brain_pool")
+                    closing = self._admit(namespace, brain)
+            if busy is None:
+                self._close(closing)
+                return brain
+            busy.wait()  # being opened or closed by another call: look again
+        _CACHE_MISSES.inc(cache="brain_pool")
+        try:
+            brain = create_brain(self.config.for_namespace(namespace))
+        except BaseException:
+            with self._lock:
+                del self._busy[namespace]
+            busy.set()
+            raise
+        with self._lock:
+            del self._busy[namespace]
+            closing = self._admit(namespace, brain)
+        busy.set()
+        self._close(closing)
+        return brain
+
+    def _admit(self, namespace: str, brain: PrefrontalCortex) -> list:
+        """Put `brain` at the head of the LRU with one more lease, evicting past capacity (lock held).
+        Returns the evicted brains to _close() once the lock is released."""
+        self._brains[namespace] = brain
+        self._brains.move_to_end(namespace)
+        self._leases[namespace] = self._leases.get(namespace, 0) + 1
+        closing = []
+        while len(self._brains) > self.capacity:
+            evicted, old = self._brains.popitem(last=False)
+            _EVICTIONS.inc()
+            closing += self._retire(evicted, old)
+        _OPEN.set(len(self._brains))
+        return closing
+
+    def _release(self, namespace: str) -> None:
+        with self._lock:
+            self._leases[namespace] -= 1
+            if self._leases[namespace]:
+                return
+            del self._leases[namespace]
+            brain = self._retired.pop(namespace, None)
+            closing = self._retire(namespace, brain) if brain is not None else []
+        self._close(closing)
+
+    def _retire(self, namespace: str, brain: PrefrontalCortex) -> list:
+        """An evicted brain to close now if no call is using it; else it waits for its last release (lock held)."""
+        if self._leases.get(namespace):
+            self._retired[namespace] = brain
+            return []
+        self._busy[namespace] = threading.Event()
+        return [(namespace, brain)]
+
+    def _close(self, closing: list) -> None:
+        """Close retired brains (lock not held), then let waiting callers reopen their namespaces."""
+        for namespace, brain in closing:
+            try:
+                brain.close()
+            except Exception as e:  # the caller evicting it has its own work to do
+                print(f"[OneMemory] Closing namespace {namespace!r} failed: {e}", file=sys.stderr)
+            finally:
+                with self._lock:
+                    busy = self._busy.pop(namespace)
+                busy.set()
+
+    # -- introspection --------------------------------------------------------
+
+    def open_namespaces(self) -> list[str]:
+        with self._lock:
+            return list(self._brains)
+
+    def namespaces(self) -> list[str]:
+        """Every namespace with data on disk, open or not."""
+        found = {self.config.namespace}
+        if self.config.namespaces_dir.is_dir():
+            found.update(p.name for p in self.config.namespaces_dir.iterdir() if p.is_dir())
+        return sorted(found)
+
+    def close(self) -> None:
+        """Close every brain; those still lent out are closed when their calls finish."""
+        with self._lock:
+            idle = [(ns, b) for ns, b in self._brains.items() if not self._leases.get(ns)]
+            self._retired.update((ns, b) for ns, b in self._brains.items() if self._leases.get(ns))
+            self._brains.clear()
+            pending = list(self._busy.values())
+            _OPEN.set(0)
+        for busy in pending:
+            busy.wait()
+        for _, brain in idle:
+            brain.close()
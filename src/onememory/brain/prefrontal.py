@@ -1,10 +1,18 @@
 """Prefrontal Cortex — the query orchestrator (Facade pattern)."""
 from __future__ import annotations
 from onememory.config import Config
-from onememory.models import Conversation, MemoryEntry, SearchResult
+from onememory.feed import READ_LIMIT, CursorExpiredError
+from onememory.models import Conversation
+from onememory.brain.records import MemoryRecord, ScoredRecord
 from onememory.brain.hippocampus import Hippocampus
-from onememory.brain.cortex import Cortex
+from onememory.brain.cortex import LEGACY_COLLECTION, Cortex, shard_name
 from onememory.brain.amygdala import Amygdala
+from onememory.brain.cache import RecallCache, normalize
+from onememory.brain.working import WorkingMemory
+
+
+class QuotaExceededError(Exception):
+    """A namespace is at its max_memories / max_conversations quota."""
 
 
 class PrefrontalCortex:
@@ -16,41 +24,179 @@ class PrefrontalCortex:
         self.cortex = cortex
         self.amygdala = amygdala
         self.hippocampus.on_capture(self.amygdala.score)
+        self._cache = RecallCache(config.recall_cache_size, config.recall_cache_similarity)
+        self.working = WorkingMemory(cortex, config.remember_batch, config.remember_delay)
 
     def capture(self, conversation: Conversation) -> str:
+        limit = self.config.max_conversations
+        if limit and self.hippocampus.count() >= limit:
+            raise QuotaExceededError(f"namespace {self.config.namespace!r} is at its {limit}-conversation quota")
         return self.hippocampus.capture(conversation)
 
     def remember(self, content: str, category: str = "general", tags: list[str] | None = None) -> str:
-        entry = MemoryEntry(content=content, category=category, tags=tags or [], importance=0.7, source="manual")
-        return self.cortex.store_memory(entry)
+        limit = self.config.max_memories
+        if limit and self.cortex.count() + len(self.working) >= limit:
+            raise QuotaExceededError(f"namespace {self.config.namespace!r} is at its {limit}-memory quota")
+        entry = MemoryRecord(content=content, category=category, tags=tags or [], importance=0.7, source="manual")
+        return self.working.add(entry)
+
+    def flush(self) -> int:
+        """Write buffered remember() calls to the cortex now."""
+        return self.working.flush()
+
+    def search(self, query: str, limit: int = 10, categories: list[str] | None = None) -> list[ScoredRecord]:
+        """Cached per normalized query; a write to one of the searched categories invalidates it.
+        Buffered remember() calls are scored on top of the cached results. Every hit is logged as
+        an access for importance re-scoring."""
+        results = self._search(query, limit, categories)
+        self.amygdala.record_access([r.entry.id for r in results])
+        return results
 
-    def search(self, query: str, limit: int = 10) -> list[SearchResult]:
-        return self.cortex.search(query, limit)
+    def _search(self, query: str, limit: int, categories: list[str] | None) -> list[ScoredRecord]:
+        # Pending before versions: a record flushed in between is then in both (deduped), never in neither.
+        pending = self.working.pending(categories)
+        versions = self.cortex.versions()
+        if categories is None:
+            depends = versions
+        else:
+            depends = {name: versions.get(name) for name in [*map(shard_name, categories), LEGACY_COLLECTION]}
+        scope = ("search", limit, tuple(sorted(categories)) if categories is not None else None)
+        key = (*scope, normalize(query))
+        embedding = self.cortex.embed_query(query) if pending else None
+        if self._cache.similarity <= 0:
+            results = self._cache.fetch(
+                key, versions, lambda: self.cortex.search(query, limit, categories, embedding=embedding), depends,
+            )
+        else:
+            results = self._cache.get(key, versions)
+            if results is None:
+                if embedding is None:
+                    embedding = self.cortex.embed_query(query)
+                results = self._cache.nearest(scope, embedding, versions)
+                if results is None:
+                    results = self.cortex.search(query, limit, categories, embedding=embedding)
+                    self._cache.put(key, depends, results, embedding)
+        if not pending:
+            return list(results)
+        scored = self.working.search(embedding, pending)
+        buffered = {r.entry.id for r in scored}
+        merged = scored + [r for r in results if r.entry.id not in buffered]
+        return sorted(merged, key=lambda r: r.score, reverse=True)[:limit]
 
     def get_recent_conversations(self, limit: int = 20) -> list[Conversation]:
-        return self.hippocampus.get_recent(limit)
+        versions = {"hippocampus": self.hippocampus.version()}
+        return list(self._cache.fetch(("recent", limit), versions, lambda: self.hippocampus.get_recent(limit)))
+
+    def history(
+        self,
+        text: str = "",
+        start: str = "",
+        end: str = "",
+        provider: str = "",
+        model: str = "",
+        limit: int = 50,
+        offset: int = 0,
+    ) -> dict:
+        """A page of past conversations matching the filters, newest first, with the total."""
+        return self.hippocampus.history(
+            text=text, start=start, end=end, provider=provider, model=model, limit=limit, offset=offset,
+        )
 
     def get_context(self) -> dict:
-        memories = self.cortex.get_all()
+        """Cached until any memory or conversation is written; buffered remember() calls are added on top."""
+        pending = self.working.pending()
+        versions = {**self.cortex.versions(), "hippocampus": self.hippocampus.version()}
+        context = dict(self._cache.fetch(("context",), versions, self._build_context))
+        if pending:
+            sections = {"identity": "identity", "preference": "preferences"}
+            for key in ("identity", "preferences", "knowledge"):
+                context[key] = list(context[key])
+            for record in pending:
+                context[sections.get(record.category, "knowledge")].append(record.content)
+            context["total_memories"] += len(pending)
+        return context
+
+    def _build_context(self) -> dict:
+        identity = self.cortex.get_by_category("identity")
+        preferences = self.cortex.get_by_category("preference")
+        knowledge = self.cortex.get_all(exclude=("identity", "preference"))
         recent = self.hippocampus.get_recent(5)
-        identity = [m for m in memories if m.category == "identity"]
-        preferences = [m for m in memories if m.category == "preference"]
-        knowledge = [m for m in memories if m.category not in ("identity", "preference")]
         return {
             "identity": [m.content for m in identity],
             "preferences": [m.content for m in preferences],
             "knowledge": [m.content for m in knowledge],
             "recent_conversations": len(recent),
-            "total_memories": len(memories),
+            "total_memories": len(identity) + len(preferences) + len(knowledge),
             "total_conversations": self.hippocampus.count(),
         }
 
-    def get_all_memories(self) -> list[MemoryEntry]:
-        return self.cortex.get_all()
+    def get_all_memories(self) -> list[MemoryRecord]:
+        return self.get_memories()
+
+    def get_memories(self, category: str = "") -> list[MemoryRecord]:
+        """One category's memories (a direct shard read), or all of them, buffered ones included."""
+        pending = self.working.pending([category] if category else None)
+        stored = self.cortex.get_by_category(category) if category else self.cortex.get_all()
+        buffered = {r.id for r in pending}
+        return [r for r in stored if r.id not in buffered] + pending
+
+    def facts(self, attribute: str = "") -> list[dict]:
+        """Identity/preference fact slots (brain/facts.py), each with its current version and history."""
+        return self.cortex.slots.slots(attribute)
+
+    def sequence(self) -> int:
+        """The change feed's newest seq: pass it as `since` to hear only about what happens next."""
+        return self.cortex.feed.latest()
+
+    def changes(self, since: int = 0, limit: int = READ_LIMIT, kinds: tuple[str, ...] = ()) -> tuple[list[dict], int]:
+        """Change feed events after seq `since` (see onememory.feed), and the cursor to pass next time."""
+        latest = self.cortex.feed.latest()  # before reading: everything up to here gets scanned
+        events = self.cortex.feed.read(since, limit, kinds)
+        if len(events) >= limit:
+            return events, events[-1]["seq"]
+        return events, max(latest, events[-1]["seq"] if events else since)
+
+    def memories_since(self, since: int, category: str = "") -> tuple[list[MemoryRecord], int]:
+        """Memories stored or updated after change feed seq `since`, each as last written, and the next cursor."""
+        changed, cursor = self._changed_since(since, "memory", ("memories", "all"))
+        records = [MemoryRecord(**data) for data in changed]
+        return [r for r in records if not category or r.category == category], cursor
+
+    def conversations_since(self, since: int, limit: int = 20) -> tuple[list[Conversation], int]:
+        """Conversations captured or imported after change feed seq `since`, newest first, and the next cursor."""
+        changed, cursor = self._changed_since(since, "conversation", ("conversations", "all"))
+        return [Conversation.model_validate(data) for data in reversed(changed[-limit:])], cursor
+
+    def _changed_since(self, since: int, kind: str, scopes: tuple[str, ...]) -> tuple[list[dict], int]:
+        """The latest data of each `kind` item changed after `since`, oldest change first. A reset of
+        one of `scopes` in between means the caller's copy can't be patched: CursorExpiredError."""
+        items: dict[str, dict] = {}
+        cursor = since
+        while True:
+            events, cursor = self.changes(cursor, kinds=(kind, "reset"))
+            for event in events:
+                if event["kind"] == "reset":
+                    if event["data"].get("scope") in scopes:
+                        raise CursorExpiredError(since, event["seq"], cursor, f"from before a {event['data']['scope']} reset")
+                    continue
+                items.pop(event["id"], None)  # keep them in the order of their last change
+                items[event["id"]] = event["data"]
+            if len(events) < READ_LIMIT:
+                return list(items.values()), cursor
 
     def status(self) -> dict:
         return {
             "conversations_captured": self.hippocampus.count(),
-            "memories_stored": self.cortex.count(),
+            "memories_stored": self.cortex.count() + len(self.working),
             "memory_dir": str(self.config.base_dir),
+            "namespace": self.config.namespace,
         }
+
+    def close(self) -> None:
+        """Flush buffered writes, then release the chromadb client and worker threads (brain pool eviction)."""
+        self.working.close()
+        self.amygdala.close()
+        self._cache.clear()
+        self.hippocampus.journal.close()
+        self.hippocampus.index.close()
+        self.cortex.close()
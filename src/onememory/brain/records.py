@@ -0,0 +1,97 @@
+"""Records — lightweight internal memory representation for the brain's hot paths.
+
+The pydantic models in ``onememory.models`` are the API/MCP boundary. Inside the
+brain, rows coming out of chromadb are materialized as slotted dataclasses with
+no validation, and only converted with ``to_entry()`` / ``to_result()`` when
+they leave the process.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+from uuid import uuid4
+
+if TYPE_CHECKING:
+    from onememory.models import MemoryEntry, SearchResult
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass(slots=True)
+class MemoryRecord:
+    content: str
+    id: str = field(default_factory=lambda: uuid4().hex[:12])
+    category: str = "general"
+    source: str = ""
+    tags: list[str] = field(default_factory=list)
+    importance: float = 0.5
+    timestamp: str = field(default_factory=_now)
+    conversation_id: str = ""
+
+    @classmethod
+    def from_row(cls, doc_id: str, document: str, meta: dict | None) -> MemoryRecord:
+        """Build a record from a chromadb row — no validation, no copies."""
+        meta = meta or {}
+        tags = meta.get("tags")
+        return cls(
+            content=document,
+            id=doc_id,
+            category=meta.get("category", "general"),
+            source=meta.get("source", ""),
+            tags=tags.split(",") if tags else [],
+            importance=meta.get("importance", 0.5),
+            timestamp=meta.get("timestamp", ""),
+            conversation_id=meta.get("conversation_id", ""),
+        )
+
+    @classmethod
+    def from_entry(cls, entry: MemoryEntry) -> MemoryRecord:
+        return cls(
+            content=entry.content,
+            id=entry.id,
+            category=entry.category,
+            source=entry.source,
+            tags=list(entry.tags),
+            importance=entry.importance,
+            timestamp=entry.timestamp,
+            conversation_id=entry.conversation_id,
+        )
+
+    def to_metadata(self) -> dict:
+        return {
+            "category": self.category,
+            "source": self.source,
+            "tags": ",".join(self.tags),
+            "importance": self.importance,
+            "timestamp": self.timestamp,
+            "conversation_id": self.conversation_id,
+        }
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "content": self.content,
+            "category": self.category,
+            "source": self.source,
+            "tags": list(self.tags),
+            "importance": self.importance,
+            "timestamp": self.timestamp,
+            "conversation_id": self.conversation_id,
+        }
+
+    def to_entry(self) -> MemoryEntry:
+        """Convert to the validated pydantic model (API/MCP boundary only)."""
+        from onememory.models import MemoryEntry
+        return MemoryEntry(**self.as_dict())
+
+
+@dataclass(slots=True)
+class ScoredRecord:
+    entry: MemoryRecord
+    score: float
+
+    def to_result(self) -> SearchResult:
+        from onememory.models import SearchResult
+        return SearchResult(entry=self.entry.to_entry(), score=self.score)
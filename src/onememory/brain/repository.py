@@ -3,14 +3,15 @@ from __future__ import annotations
 import json
 from pathlib import Path
 from pydantic import BaseModel
+from onememory.journal import atomic_write
 
 
 class FileStore:
     """Simple JSON file store. All memory persistence goes through here."""
 
     def save(self, path: Path, data: BaseModel) -> None:
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(data.model_dump_json(indent=2))
+        """Atomic: readers see the old file or the new one, never half of it."""
+        atomic_write(path, data.model_dump_json(indent=2))
 
     def load(self, path: Path, model_cls: type[BaseModel]) -> BaseModel:
         return model_cls.model_validate_json(path.read_text())
@@ -0,0 +1,176 @@
+"""Working Memory — a write-behind buffer in front of the cortex.
+
+Agents tend to remember() in bursts, and each call used to embed one text
+and upsert one row. PrefrontalCortex.remember now hands the record to
+working memory and returns its id at once; the buffer writes to the cortex
+with a single embedding call and Cortex.store_many when it holds
+`remember_batch` records or its oldest record is `remember_delay` seconds
+old, and always on close() and at interpreter exit.
+
+Writes are visible to this process before they are flushed: search()
+scores pending records against the query (embedding them once — the flush
+reuses those vectors) and get_context() / get_memories() list them. Two
+remembers of the same text and category while buffered coalesce into one
+record. Other processes see a write once it is flushed.
+"""
+from __future__ import annotations
+import atexit
+import sys
+import threading
+import time
+from onememory import metrics
+from onememory.brain.cortex import Cortex
+from onememory.brain.records import MemoryRecord, ScoredRecord
+
+_FLUSH_RECORDS = metrics.histogram(
+    "working_memory_flush_records", "Records written per working-memory flush",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+_COALESCED = metrics.counter("working_memory_coalesced_total", "remember() calls merged into a pending record")
+_FLUSH_ERRORS = metrics.counter("working_memory_flush_errors_total", "Failed working-memory flushes (records kept)")
+
+
+class WorkingMemory:
+    """Pending remember() records, flushed to the cortex in batches."""
+
+    def __init__(self, cortex: Cortex, batch: int = 32, delay: float = 0.2) -> None:
+        self.cortex = cortex
+        self.batch = max(1, batch)
+        self.delay = delay
+        self._pending: dict[str, MemoryRecord] = {}   # id → record, oldest first
+        self._flushing: dict[str, MemoryRecord] = {}  # being written: still visible to reads
+        self._by_content: dict[tuple[str, str], str] = {}
+        self._vectors: dict[str, list] = {}
+        self._first_at = 0.0
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()  # one store_many at a time, in order
+        self._flusher: threading.Thread | None = None
+        self._closed = False
+        atexit.register(self.flush)
+
+    # -- writes ---------------------------------------------------------------
+
+    def add(self, record: MemoryRecord) -> str:
+        """Buffer a record; returns its id (an already-pending record's id if this one coalesces)."""
+        if self._closed:
+            return self.cortex.store_memory(record)
+        with self._cond:
+            existing = self._by_content.get((record.category, record.content))
+            if existing is not None and existing in self._pending:
+                pending = self._pending[existing]
+                pending.tags.extend(t for t in record.tags if t not in pending.tags)
+                pending.importance = max(pending.importance, record.importance)
+                _COALESCED.inc()
+                return existing
+            if not self._pending:
+                self._first_at = time.monotonic()
+            self._pending[record.id] = record
+            self._by_content[(record.category, record.content)] = record.id
+            full = len(self._pending) >= self.batch
+            if not full:
+                self._start_flusher()
+                self._cond.notify()
+        if full:
+            self.flush()
+        return record.id
+
+    def _start_flusher(self) -> None:
+        if self._flusher is None and not self._closed:
+            self._flusher = threading.Thread(target=self._run, name="working-memory", daemon=True)
+            self._flusher.start()
+
+    def _run(self) -> None:
+        """Flush whatever has waited `delay` seconds."""
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                wait = self._first_at + self.delay - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+            try:
+                self.flush()
+            except Exception as e:  # keep the records and try again after the next delay
+                _FLUSH_ERRORS.inc()
+                # stderr: stdout is the MCP stdio transport's protocol channel
+                print(f"[OneMemory] Working memory flush failed, will retry: {e}", file=sys.stderr)
+                with self._cond:
+                    self._first_at = time.monotonic()
+
+    def flush(self) -> int:
+        """Write every pending record to the cortex now. Returns how many were written."""
+        with self._flush_lock:
+            with self._cond:
+                if not self._pending:
+                    return 0
+                batch = self._pending
+                self._flushing = batch
+                self._pending = {}
+                self._by_content = {}
+            records = list(batch.values())
+            try:
+                vectors = self._embeddings(records)
+                self.cortex.store_many(records, embeddings=[vectors[r.id] for r in records])
+            except BaseException:
+                with self._cond:  # put them back in front of anything added meanwhile
+                    self._pending = {**batch, **self._pending}
+                    self._by_content = {(r.category, r.content): r.id for r in self._pending.values()}
+                    self._flushing = {}
+                raise
+            with self._cond:
+                self._flushing = {}
+                for record_id in batch:
+                    self._vectors.pop(record_id, None)
+            _FLUSH_RECORDS.observe(len(records))
+            return len(records)
+
+    def close(self) -> None:
+        """Flush and stop the background flusher."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self.flush()
+        atexit.unregister(self.flush)
+
+    # -- reads ----------------------------------------------------------------
+
+    def pending(self, categories: list[str] | None = None) -> list[MemoryRecord]:
+        """Records not yet in the cortex (including any being written right now)."""
+        with self._cond:
+            records = [*self._flushing.values(), *self._pending.values()]
+        if categories is None:
+            return records
+        return [r for r in records if r.category in categories]
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._pending) + len(self._flushing)
+
+    def search(self, embedding, records: list[MemoryRecord]) -> list[ScoredRecord]:
+        """Score `records` against a query embedding, the same cosine score the cortex reports."""
+        if not records:
+            return []
+        import numpy as np
+        vectors = self._embeddings(records)
+        matrix = np.asarray([vectors[r.id] for r in records], dtype=np.float32)
+        query = np.asarray(embedding, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+        scores = matrix @ query / np.where(norms == 0, 1.0, norms)
+        return [ScoredRecord(entry=r, score=round(max(0.0, float(s)), 2)) for r, s in zip(records, scores)]
+
+    def _embeddings(self, records: list[MemoryRecord]) -> dict[str, list]:
+        """id → vector, embedding in one call whatever hasn't been embedded yet."""
+        with self._cond:
+            vectors = {r.id: self._vectors[r.id] for r in records if r.id in self._vectors}
+        missing = [r for r in records if r.id not in vectors]
+        if missing:
+            for record, vector in zip(missing, self.cortex.embed_documents([r.content for r in missing])):
+                vectors[record.id] = vector
+            with self._cond:  # keep them for the flush, unless it already happened
+                for record in missing:
+                    if record.id in self._pending or record.id in self._flushing:
+                        self._vectors[record.id] = vectors[record.id]
+        return vectors
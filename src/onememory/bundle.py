@@ -0,0 +1,207 @@
+"""
+Bundle — export and import a whole memory store as one portable file.
+
+`~/.onememory` is chromadb internals plus pretty-printed JSON; neither is
+a good backup or transfer format. A bundle is gzip-compressed JSON Lines,
+one record per line, written and read as a stream:
+
+    {"type": "header", "format": "onememory-bundle", "version": 1, ...}
+    {"type": "day", "date": "2026-02-21", "metadata": {...}}
+    {"type": "conversation", "date": "2026-02-21", "conversation": {...}}
+    {"type": "memory", "memory": {...}, "embedding": "<base64 float32>"}
+    {"type": "salience", "scores": {"<conversation id>": 0.7, ...}}
+    {"type": "end", "counts": {...}}
+
+Export holds one daily log or one page of memories at a time; import
+buffers one day of conversations and IMPORT_BATCH memories, so both run in
+constant memory whatever the store size. Embeddings are optional: with
+them, import upserts the vectors as-is instead of re-embedding every
+memory. A bundle without its "end" line was truncated — import loads what
+is there and reports it as incomplete.
+"""
+from __future__ import annotations
+import base64
+import gzip
+import json
+import sys
+from array import array
+from collections.abc import Callable, Iterator
+from datetime import datetime, timezone
+from pathlib import Path
+from onememory.config import Config
+
+FORMAT = "onememory-bundle"
+VERSION = 1
+IMPORT_BATCH = 1000
+EXPORT_PAGE = 500  # chromadb's get() peaks at ~50 KB per row with embeddings; small pages cost ~10% time
+SALIENCE_CHUNK = 1000
+PROGRESS_EVERY = 1000
+
+
+def encode_embedding(vector) -> str:
+    """float32, little-endian, base64 — about a fifth the size of a JSON float list, and exact."""
+    values = array("f", vector)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+
+def decode_embedding(text: str) -> list[float]:
+    values = array("f")
+    values.frombytes(base64.b64decode(text))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tolist()
+
+
+def _records(config: Config, embeddings: bool) -> Iterator[dict]:
+    from onememory.brain.amygdala import Amygdala
+    from onememory.brain.cortex import Cortex
+    from onememory.brain.hippocampus import Hippocampus
+
+    yield {
+        "type": "header",
+        "format": FORMAT,
+        "version": VERSION,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "namespace": config.namespace,
+        "embeddings": embeddings,
+    }
+    counts = {"conversations": 0, "memories": 0, "salience": 0}
+    for log in Hippocampus(config).iter_days():
+        yield {"type": "day", "date": log.date, "metadata": log.metadata}
+        for conversation in log.conversations:
+            yield {"type": "conversation", "date": log.date, "conversation": conversation.model_dump(mode="json")}
+            counts["conversations"] += 1
+
+    for record, vector in Cortex(config).iter_records(embeddings=embeddings, page=EXPORT_PAGE):
+        line = {"type": "memory", "memory": record.as_dict()}
+        if vector is not None:
+            line["embedding"] = encode_embedding(vector)
+        yield line
+        counts["memories"] += 1
+
+    scores = list(Amygdala(config).all_scores().items())
+    for start in range(0, len(scores), SALIENCE_CHUNK):
+        yield {"type": "salience", "scores": dict(scores[start:start + SALIENCE_CHUNK])}
+    counts["salience"] = len(scores)
+    yield {"type": "end", "counts": counts}
+
+
+def export_bundle(
+    config: Config,
+    path: Path,
+    embeddings: bool = False,
+    progress: Callable[[dict], None] | None = None,
+) -> dict:
+    """Stream the store at `config` into a gzip JSONL bundle. Returns the record counts."""
+    counts: dict = {}
+    seen = 0
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as out:
+        for record in _records(config, embeddings):
+            out.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+            out.write("\n")
+            if record["type"] == "end":
+                counts = record["counts"]
+            seen += 1
+            if progress is not None and seen % PROGRESS_EVERY == 0:
+                progress({"records": seen})
+    return counts
+
+
+def _read(path: Path) -> Iterator[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _until_truncated(records: Iterator[dict]) -> Iterator[dict]:
+    """Stop quietly at a cut-off gzip stream or half-written last line; "complete" stays False."""
+    try:
+        yield from records
+    except (EOFError, json.JSONDecodeError):
+        return
+
+
+def import_bundle(
+    config: Config,
+    path: Path,
+    reembed: bool = False,
+    progress: Callable[[dict], None] | None = None,
+) -> dict:
+    """Load a bundle into the store at `config`, merging with what is there.
+
+    Conversations already present (same id) are skipped, memories are
+    upserted by id, salience scores overwrite. Pass `reembed` to ignore
+    the bundle's embeddings, e.g. when the target uses another model."""
+    from onememory.brain.amygdala import Amygdala
+    from onememory.brain.cortex import Cortex
+    from onememory.brain.hippocampus import Hippocampus
+    from onememory.brain.records import MemoryRecord
+    from onememory.models import Conversation, DailyLog
+
+    hippocampus = Hippocampus(config)
+    cortex = Cortex(config)
+    amygdala = Amygdala(config)
+    result = {"conversations": 0, "conversations_skipped": 0, "memories": 0, "salience": 0, "complete": False}
+
+    day: DailyLog | None = None
+    batch: list[MemoryRecord] = []
+    vectors: list = []
+    scores: dict[str, float] = {}
+
+    def flush_day() -> None:
+        nonlocal day
+        if day is not None:
+            added = hippocampus.restore_day(day)
+            result["conversations"] += added
+            result["conversations_skipped"] += len(day.conversations) - added
+            day = None
+
+    def flush_memories() -> None:
+        if batch:
+            cortex.store_many(batch, embeddings=vectors if len(vectors) == len(batch) else None)
+            result["memories"] += len(batch)
+            batch.clear()
+            vectors.clear()
+            if progress is not None:
+                progress(result)
+
+    records = _read(path)
+    try:
+        header = next(records, None)
+    except (OSError, EOFError, ValueError):  # not gzip, or not JSON inside
+        header = None
+    if not header or header.get("type") != "header" or header.get("format") != FORMAT:
+        raise ValueError(f"{path} is not a OneMemory bundle")
+    if header.get("version", 0) > VERSION:
+        raise ValueError(f"{path} is bundle version {header['version']}; this OneMemory reads up to {VERSION}")
+    config.ensure_dirs()
+
+    for record in _until_truncated(records):
+        kind = record.get("type")
+        if kind == "day":
+            flush_day()
+            day = DailyLog(date=record["date"], metadata=record.get("metadata") or {})
+        elif kind == "conversation":
+            if day is None or day.date != record["date"]:
+                flush_day()
+                day = DailyLog(date=record["date"])
+            day.conversations.append(Conversation.model_validate(record["conversation"]))
+        elif kind == "memory":
+            flush_day()
+            batch.append(MemoryRecord(**record["memory"]))
+            if "embedding" in record and not reembed:
+                vectors.append(decode_embedding(record["embedding"]))
+            if len(batch) >= IMPORT_BATCH:
+                flush_memories()
+        elif kind == "salience":
+            scores.update(record["scores"])
+        elif kind == "end":
+            result["complete"] = True
+    flush_day()
+    flush_memories()
+    amygdala.merge_scores(scores)
+    result["salience"] = len(scores)
+    return result
@@ -16,9 +16,63 @@ app = typer.Typer(
 )
 console = Console()
 
+
+@app.callback()
+def _main(
+    namespace: str = typer.Option(
+        "", "--namespace", "-n", envvar="ONEMEMORY_NAMESPACE", help="Memory profile to work on (default: default)",
+    ),
+):
+    # Exported rather than threaded through every command: the daemon client and _config() read it
+    if namespace:
+        from onememory.config import Config
+
+        try:
+            Config().for_namespace(namespace)
+        except ValueError as e:
+            raise typer.BadParameter(str(e), param_hint="--namespace")
+        os.environ["ONEMEMORY_NAMESPACE"] = namespace
+
+
+def _config():
+    """The active namespace's Config."""
+    from onememory.config import Config
+
+    return Config().for_namespace(os.environ.get("ONEMEMORY_NAMESPACE", ""))
+
+
 ADDON_PATH = Path(__file__).parent / "interceptor" / "addon.py"
 
 
+def _profile_env(profile: bool) -> dict | None:
+    """Environment for the mitmdump subprocess — the addon reads ONEMEMORY_PROFILE."""
+    if not profile:
+        return None
+    return {**os.environ, "ONEMEMORY_PROFILE": "1"}
+
+
+def _mitmdump_args(port: int, allow_hosts: list[str] | None, ignore_hosts: list[str] | None) -> list[str]:
+    """mitmdump command line — host lists become the addon's onememory_* options."""
+    args = ["mitmdump", "-p", str(port), "-s", str(ADDON_PATH), "--quiet"]
+    for host in allow_hosts or []:
+        args += ["--set", f"onememory_allow_hosts={host}"]
+    for host in ignore_hosts or []:
+        args += ["--set", f"onememory_ignore_hosts={host}"]
+    return args
+
+
+_ALLOW_HOST = typer.Option(None, "--allow-host", help="Also decrypt this host (repeatable)")
+_IGNORE_HOST = typer.Option(None, "--ignore-host", help="Never decrypt or capture this host (repeatable)")
+_MCP_TRANSPORT = typer.Option("sse", "--transport", "-t", help="MCP HTTP transport: sse or streamable-http")
+_MCP_PATHS = {"sse": "/sse", "streamable-http": "/mcp"}
+
+
+def _check_mcp_transport(transport: str) -> None:
+    if transport not in _MCP_PATHS:
+        console.print(f"[red]Unknown MCP transport {transport!r}: use sse or streamable-http[/red]")
+        raise typer.Exit(1)
+
+
 @app.command()
 def init():
     """Initialize the ~/.onememory/ directory structure."""
@@ -32,14 +86,20 @@ def init():
 @app.command()
 def up(
     proxy_port: int = typer.Option(8080, "--proxy-port", help="Port for mitmproxy interceptor"),
-    mcp_port: int = typer.Option(8765, "--mcp-port", help="Port for MCP SSE server"),
+    mcp_port: int = typer.Option(8765, "--mcp-port", help="Port for MCP HTTP server"),
+    mcp_transport: str = _MCP_TRANSPORT,
+    profile: bool = typer.Option(False, "--profile", help="Enable tracing + SIGUSR1/SIGUSR2 profiling hooks"),
+    allow_host: list[str] = _ALLOW_HOST,
+    ignore_host: list[str] = _IGNORE_HOST,
 ):
     """Start everything — proxy interceptor + MCP server. One command."""
+    _check_mcp_transport(mcp_transport)
     console.print(
         Panel(
             f"[bold green]OneMemory starting...[/bold green]\n\n"
             f"[yellow]1.[/yellow] Proxy interceptor on [cyan]localhost:{proxy_port}[/cyan]\n"
-            f"[yellow]2.[/yellow] MCP server (SSE) on [cyan]localhost:{mcp_port}[/cyan]\n\n"
+            f"[yellow]2.[/yellow] MCP server ({mcp_transport}) on "
+            f"[cyan]localhost:{mcp_port}{_MCP_PATHS[mcp_transport]}[/cyan]\n\n"
             f"[dim]In another terminal run:[/dim] [cyan]ngrok http {mcp_port}[/cyan]\n"
             f"[dim]Then add the ngrok URL to claude.com → Settings → Integrations[/dim]",
             title="OneMemory",
@@ -48,9 +108,10 @@ def up(
 
     # Start mitmdump as background subprocess
     mitm_proc = subprocess.Popen(
-        ["mitmdump", "-p", str(proxy_port), "-s", str(ADDON_PATH), "--quiet"],
+        _mitmdump_args(proxy_port, allow_host, ignore_host),
         stdout=sys.stdout,
         stderr=sys.stderr,
+        env=_profile_env(profile),
     )
     console.print(f"[green]Proxy interceptor started (PID {mitm_proc.pid})[/green]")
 
@@ -71,15 +132,23 @@ def up(
     # Run MCP server in foreground (blocks)
     try:
         from onememory.mcp_server.server import main as mcp_main
-        mcp_main(transport="sse", port=mcp_port)
+        mcp_main(
+            transport=mcp_transport, port=mcp_port, profile=profile,
+            namespace=os.environ.get("ONEMEMORY_NAMESPACE", ""),
+        )
     finally:
         mitm_proc.terminate()
         mitm_proc.wait(timeout=5)
 
 
 @app.command()
-def start(port: int = 8080):
-    """Start the mitmproxy interceptor — captures ChatGPT conversations."""
+def start(
+    port: int = 8080,
+    profile: bool = typer.Option(False, "--profile", help="Enable tracing + SIGUSR1/SIGUSR2 profiling hooks"),
+    allow_host: list[str] = _ALLOW_HOST,
+    ignore_host: list[str] = _IGNORE_HOST,
+):
+    """Start the mitmproxy interceptor — captures ChatGPT, Claude and API conversations."""
     console.print(
         Panel(
             f"[bold green]OneMemory Interceptor starting on port {port}[/bold green]\n\n"
@@ -89,41 +158,41 @@ def start(port: int = 8080):
             title="OneMemory",
         )
     )
-    subprocess.run(["mitmdump", "-p", str(port), "-s", str(ADDON_PATH), "--quiet"])
+    subprocess.run(_mitmdump_args(port, allow_host, ignore_host), env=_profile_env(profile))
 
 
 @app.command(name="mcp-serve")
 def mcp_serve(
-    http: bool = typer.Option(False, "--http", help="Run as HTTP/SSE server (for claude.com)"),
-    port: int = typer.Option(8765, "--port", "-p", help="Port for HTTP/SSE mode"),
+    http: bool = typer.Option(False, "--http", help="Run as HTTP server (for claude.com)"),
+    port: int = typer.Option(8765, "--port", "-p", help="Port for HTTP mode"),
+    transport: str = _MCP_TRANSPORT,
+    profile: bool = typer.Option(False, "--profile", help="Enable tracing + SIGUSR1/SIGUSR2 profiling hooks"),
 ):
     """Start the MCP server (for Claude Code / Cursor / claude.com)."""
     from onememory.mcp_server.server import main
 
     if http:
+        _check_mcp_transport(transport)
         console.print(
             Panel(
-                f"[bold green]OneMemory MCP server (SSE) on port {port}[/bold green]\n\n"
+                f"[bold green]OneMemory MCP server ({transport}) on port {port}[/bold green]\n\n"
                 f"[yellow]1.[/yellow] Run [cyan]ngrok http {port}[/cyan] in another terminal\n"
-                f"[yellow]2.[/yellow] Copy the ngrok URL\n"
+                f"[yellow]2.[/yellow] Copy the ngrok URL and append [cyan]{_MCP_PATHS[transport]}[/cyan]\n"
                 f"[yellow]3.[/yellow] claude.com → Settings → Integrations → Add MCP → paste URL",
                 title="OneMemory MCP (HTTP)",
             )
         )
-        main(transport="sse", port=port)
+        main(transport=transport, port=port, profile=profile, namespace=os.environ.get("ONEMEMORY_NAMESPACE", ""))
     else:
-        main(transport="stdio")
+        main(transport="stdio", profile=profile, namespace=os.environ.get("ONEMEMORY_NAMESPACE", ""))
 
 
 @app.command()
 def memories(category: str = typer.Argument("", help="Filter by category: identity, preference, knowledge")):
     """List all stored memories — see what's in your cortex."""
-    from onememory.brain import create_brain
+    from onememory.daemon import query
 
-    brain = create_brain()
-    all_memories = brain.get_all_memories()
-    if category:
-        all_memories = [m for m in all_memories if m.category == category]
+    all_memories = query("memories", category=category)
     if not all_memories:
         console.print("[yellow]No memories found.[/yellow]")
         return
@@ -134,7 +203,7 @@ def memories(category: str = typer.Argument("", help="Filter by category: identi
     table.add_column("Source", style="dim", width=20)
     table.add_column("ID", style="dim", width=14)
     for m in all_memories:
-        table.add_row(m.category, m.content, m.source, m.id)
+        table.add_row(m["category"], m["content"], m["source"], m["id"])
     console.print(table)
     console.print(f"\n[dim]Total: {len(all_memories)} memories[/dim]")
 
@@ -142,10 +211,9 @@ def memories(category: str = typer.Argument("", help="Filter by category: identi
 @app.command()
 def context():
     """Show your full context — what Claude sees when it calls recall()."""
-    from onememory.brain import create_brain
+    from onememory.daemon import query
 
-    brain = create_brain()
-    ctx = brain.get_context()
+    ctx = query("context")
 
     if ctx["identity"]:
         console.print("\n[bold cyan]Identity[/bold cyan]")
@@ -167,51 +235,222 @@ def context():
     )
 
 
+@app.command()
+def facts(
+    attribute: str = typer.Argument("", help="Only one attribute: name, home, employer, occupation, favorite, ..."),
+    resolve: bool = typer.Option(False, "--resolve", help="First slot identity/preference facts stored before versioning"),
+):
+    """Identity/preference facts — the current version of each, and the ones it replaced."""
+    from onememory.daemon import query
+
+    if resolve:
+        from onememory.brain.cortex import Cortex
+
+        config = _config()
+        if not config.fact_versioning:
+            console.print("[yellow]Fact versioning is off (fact_versioning = False).[/yellow]")
+            return
+        with console.status("[bold]Resolving stored facts...[/bold]"):
+            slotted = Cortex(config).resolve_facts()
+        console.print(f"[green]Slotted {slotted} facts stored before versioning.[/green]")
+
+    slots = query("facts", attribute=attribute)
+    if not slots:
+        console.print("[yellow]No versioned facts yet.[/yellow]")
+        return
+
+    table = Table(title=f"Facts{f' ({attribute})' if attribute else ''}")
+    table.add_column("Attribute", style="cyan", width=12)
+    table.add_column("Current", style="white")
+    table.add_column("Since", style="dim", width=10)
+    table.add_column("Replaced", style="dim")
+    for slot in slots:
+        versions = {v["id"]: v for v in slot["versions"]}
+        current = versions.get(slot["active"], slot["versions"][-1])
+        older = [v["content"] for v in reversed(slot["versions"]) if v["id"] != current["id"]]
+        table.add_row(slot["attribute"], current["content"], current["timestamp"][:10], "\n".join(older))
+    console.print(table)
+    replaced = sum(len(slot["versions"]) - 1 for slot in slots)
+    console.print(f"\n[dim]{len(slots)} facts, {replaced} older versions kept[/dim]")
+
+
 @app.command()
 def status():
     """Show memory stats."""
-    from onememory.brain import create_brain
+    from onememory.daemon import query
 
-    brain = create_brain()
-    s = brain.status()
+    s = query("status")
     table = Table(title="OneMemory Status")
     table.add_column("Metric", style="cyan")
     table.add_column("Value", style="green")
+    table.add_row("Namespace", s.get("namespace", "default"))
     table.add_row("Memory Directory", s["memory_dir"])
     table.add_row("Conversations Captured", str(s["conversations_captured"]))
     table.add_row("Memories Stored", str(s["memories_stored"]))
     console.print(table)
 
 
+@app.command()
+def stats(perf: bool = typer.Option(False, "--perf", help="Show latency/counter metrics from running processes")):
+    """Show memory stats, or hot-path performance metrics with --perf."""
+    if not perf:
+        status()
+        return
+
+    from datetime import datetime
+
+    from onememory import metrics
+    from onememory.config import Config
+
+    snapshots = metrics.load_snapshots(Config().metrics_dir)
+    if not snapshots:
+        console.print("[yellow]No metrics yet — start the proxy, MCP server, daemon or API first.[/yellow]")
+        return
+
+    for process, snap in snapshots.items():
+        updated = datetime.fromtimestamp(snap.get("updated", 0)).strftime("%Y-%m-%d %H:%M:%S")
+        table = Table(title=f"{process} (pid {snap.get('pid')}, updated {updated})")
+        table.add_column("Metric", style="cyan")
+        table.add_column("Labels", style="dim")
+        table.add_column("Count", style="green", justify="right")
+        table.add_column("Mean ms", justify="right")
+        table.add_column("p50 ms", justify="right")
+        table.add_column("p95 ms", justify="right")
+        table.add_column("p99 ms", justify="right")
+        for name, metric in snap.get("metrics", {}).items():
+            short = name.removeprefix(metrics.PREFIX)
+            for labels, value in metric["values"]:
+                label_text = ",".join(f"{k}={v}" for k, v in labels)
+                if metric["kind"] == "histogram":
+                    count = value[-1]
+                    mean = value[-2] / count * 1000 if count else 0.0
+                    q = [metrics.quantile(metric["buckets"], value, p) * 1000 for p in (0.5, 0.95, 0.99)]
+                    table.add_row(short, label_text, str(count), f"{mean:.2f}", *(f"{x:.2f}" for x in q))
+                else:
+                    table.add_row(short, label_text, f"{value:g}", "", "", "", "")
+        console.print(table)
+
+        rates = _hit_rates(snap.get("metrics", {}), metrics.PREFIX)
+        if rates:
+            table = Table(title=f"{process} cache hit rates")
+            table.add_column("Cache", style="cyan")
+            table.add_column("Labels", style="dim")
+            table.add_column("Hits", style="green", justify="right")
+            table.add_column("Misses", justify="right")
+            table.add_column("Hit rate", justify="right")
+            for (cache, label_text), (hits, misses) in sorted(rates.items()):
+                table.add_row(cache, label_text, f"{hits:g}", f"{misses:g}", f"{hits / (hits + misses):.1%}")
+            console.print(table)
+
+
+def _hit_rates(snapshot: dict, prefix: str) -> dict[tuple[str, str], list[float]]:
+    """(cache, other labels) → [hits, misses] from the cache_hits/misses counters."""
+    rates: dict[tuple[str, str], list[float]] = {}
+    for column, name in enumerate(("cache_hits_total", "cache_misses_total")):
+        for labels, value in snapshot.get(prefix + name, {}).get("values", []):
+            labels = dict(labels)
+            cache = labels.pop("cache", "")
+            key = (cache, ",".join(f"{k}={v}" for k, v in sorted(labels.items())))
+            rates.setdefault(key, [0.0, 0.0])[column] += value
+    return {key: counts for key, counts in rates.items() if sum(counts)}
+
+
+@app.command()
+def profile(
+    process: str = typer.Argument(..., help="Process to profile: proxy, mcp, daemon or api"),
+    slow: bool = typer.Option(False, "--slow", help="Dump the slowest recent calls instead of sampling"),
+):
+    """Trigger a profile in a running process started with --profile (writes to ~/.onememory/profiles/)."""
+    from onememory import profiling
+    from onememory.config import Config
+
+    config = Config()
+    # Unhooked, SIGUSR1/SIGUSR2 terminate a process: only signal one that hooked them itself.
+    pid = profiling.signal_target(process, config.profiles_dir)
+    if pid is None:
+        console.print(
+            f"[red]No running '{process}' process with profiling on.[/red] Restart it with --profile "
+            "(or ONEMEMORY_PROFILE=1), or use POST /debug/profile and GET /debug/slow on its HTTP server."
+        )
+        raise typer.Exit(1)
+    try:
+        os.kill(pid, signal.SIGUSR2 if slow else signal.SIGUSR1)
+    except ProcessLookupError:
+        console.print(f"[red]Process {pid} is not running.[/red]")
+        raise typer.Exit(1)
+    what = "slowest-calls dump" if slow else "sampling profile"
+    console.print(f"[green]Requested {what} from {process} (PID {pid}).[/green] Output goes to {config.profiles_dir}")
+
+
 @app.command()
 def search(query: str, limit: int = 10):
     """Search your memories."""
-    from onememory.brain import create_brain
+    from onememory.daemon import query as daemon_query
 
-    brain = create_brain()
-    results = brain.search(query, limit)
+    results = daemon_query("search", query=query, limit=limit)
     if not results:
         console.print("[yellow]No memories found.[/yellow]")
         return
     for r in results:
         console.print(
-            f"  [{r.entry.category}] {r.entry.content} [dim](score: {r.score:.2f})[/dim]"
+            f"  [{r['entry']['category']}] {r['entry']['content']} [dim](score: {r['score']:.2f})[/dim]"
         )
 
 
 @app.command()
 def remember(content: str, category: str = "general", tags: str = ""):
     """Store a new memory manually."""
-    from onememory.brain import create_brain
+    from onememory.daemon import DaemonError, query
 
-    brain = create_brain()
     tag_list = [t.strip() for t in tags.split(",") if t.strip()] if tags else []
-    mid = brain.remember(content, category, tag_list)
+    try:
+        mid = query("remember", content=content, category=category, tags=tag_list)
+    except DaemonError as e:
+        console.print(f"[red]Not stored — {e}[/red]")
+        raise typer.Exit(1)
     console.print(f"[green]Remembered:[/green] {content} [dim](id: {mid})[/dim]")
 
 
 @app.command()
-def dream():
+def daemon(stop: bool = typer.Option(False, "--stop", help="Stop a running daemon")):
+    """Run a resident brain so other commands answer in milliseconds."""
+    from onememory.config import Config
+    from onememory.daemon import DaemonRunning, DaemonUnavailable, request, running, serve
+
+    config = Config()
+    if stop:
+        try:
+            request(config.daemon_socket, "shutdown")
+            console.print("[green]Daemon stopped.[/green]")
+        except DaemonUnavailable:
+            console.print("[yellow]No daemon running.[/yellow]")
+        return
+
+    if running(config.daemon_socket):
+        console.print(f"[yellow]A daemon is already running on {config.daemon_socket}.[/yellow]")
+        return
+    config.ensure_dirs()
+    console.print(
+        Panel(
+            f"[bold green]OneMemory daemon listening on {config.daemon_socket}[/bold green]\n\n"
+            f"[dim]status, search, recent, memories, context and remember now use it automatically.[/dim]",
+            title="OneMemory Daemon",
+        )
+    )
+    try:
+        serve(config)
+    except DaemonRunning as e:  # another one started since the check above
+        console.print(f"[yellow]{e}.[/yellow]")
+        return
+    except KeyboardInterrupt:
+        pass
+    console.print("[green]Daemon stopped.[/green]")
+
+
+@app.command()
+def dream(
+    summarize: bool = typer.Option(True, "--summarize/--no-summarize", help="Also write conversation-level summaries"),
+):
     """[Deprecated] Consolidation now happens automatically. Run for a one-time migration."""
     console.print(
         "[yellow]Note: 'dream' is deprecated — consolidation now happens automatically when conversations are captured.[/yellow]\n"
@@ -220,12 +459,11 @@ def dream():
     from onememory.brain.amygdala import Amygdala
     from onememory.brain.cortex import Cortex
     from onememory.brain.hippocampus import Hippocampus
-    from onememory.config import Config
     from onememory.consolidation.dreamer import Dreamer
 
-    config = Config()
+    config = _config()
     config.ensure_dirs()
-    dreamer = Dreamer(config, Hippocampus(config), Cortex(config), Amygdala(config))
+    dreamer = Dreamer(config, Hippocampus(config), Cortex(config), Amygdala(config), summarize=summarize)
     result = dreamer.dream()
 
     if result["status"] == "nothing_to_consolidate":
@@ -234,54 +472,372 @@ def dream():
         console.print(
             Panel(
                 f"[green]Consolidated {result['conversations']} conversations "
-                f"into {result['memories_created']} memories[/green]",
+                f"into {result['memories_created']} memories[/green]"
+                + _summary_cost(result["summarize"]),
                 title="Dream Complete",
             )
         )
 
 
+def _summary_cost(summary: dict) -> str:
+    if not summary.get("enabled"):
+        return ""
+    return (
+        f"\n[dim]Summaries: {summary['facts']} facts from {summary['conversations']} conversations "
+        f"({summary['skipped']} unchanged, skipped) in {summary['seconds']:.2f}s, "
+        f"{summary['ms_per_conversation']:.1f} ms/conversation on {summary['workers']} worker(s). "
+        f"Use --no-summarize on slow machines.[/dim]"
+    )
+
+
+@app.command()
+def rescore(
+    full: bool = typer.Option(False, "--full", help="Re-link near-duplicates for every memory, not just new and changed ones"),
+):
+    """Re-score memory importance from recall, restatement, corroboration and age."""
+    from onememory.brain.amygdala import Amygdala
+    from onememory.brain.cortex import Cortex
+    from onememory.consolidation.reconsolidation import Reconsolidator
+
+    config = _config()
+    config.ensure_dirs()
+    with console.status("[bold]Re-scoring memories...[/bold]"):
+        result = Reconsolidator(config, Cortex(config), Amygdala(config)).run(full=full)
+    if not result["memories"]:
+        console.print("[yellow]Cortex is empty — nothing to score.[/yellow]")
+        return
+    console.print(
+        Panel(
+            f"[green]Updated the importance of {result['updated']} of {result['memories']} memories[/green] "
+            f"(mean {result['mean_importance']:.2f})\n"
+            f"[dim]{result['changed']} new or changed, {result['near_duplicates']} near-duplicate pairs, "
+            f"{result['accesses']} recalls since the last run, {result['seconds']:.2f}s.[/dim]",
+            title="Importance Re-scored",
+        )
+    )
+
+
+@app.command()
+def migrate():
+    """Move a pre-sharding cortex (one `memories` collection) into per-category shards."""
+    from onememory.brain.cortex import Cortex
+
+    config = _config()
+    cortex = Cortex(config)
+    pending = cortex.legacy_count()
+    if not pending and not cortex.categories():
+        console.print("[yellow]Cortex is empty — nothing to migrate.[/yellow]")
+        return
+    if not pending:
+        console.print("[green]Cortex is already sharded.[/green]")
+        return
+
+    with console.status(f"[bold]Migrating {pending} memories...[/bold]") as spinner:
+        moved = cortex.migrate(progress=lambda n: spinner.update(f"[bold]Migrated {n}/{pending} memories...[/bold]"))
+    shards = ", ".join(cortex.categories())
+    console.print(f"[green]Migrated {moved} memories into {len(cortex.categories())} shards ({shards}).[/green]")
+
+
+index_app = typer.Typer(help="Vector index maintenance — HNSW stats, tuning and rebuilds.")
+app.add_typer(index_app, name="index")
+
+
+@index_app.command("stats")
+def index_stats(
+    k: int = typer.Option(10, "--k", help="Measure recall@k"),
+    sample: int = typer.Option(100, "--sample", help="Queries per shard for the recall check, 0 to skip it"),
+):
+    """Per-shard size, HNSW parameters, fragmentation and recall@k against brute force."""
+    from onememory.brain.cortex import Cortex
+    from onememory.brain import index
+
+    cortex = Cortex(_config())
+    if cortex.backend == "flat":
+        info = cortex.flat_info()
+        console.print(
+            f"[cyan]Flat cortex[/cyan]: {info['count']} memories ({info['dtype']} x {info['dim']}, "
+            f"{info['bytes'] / 1024 / 1024:.1f}M) — exact search, nothing to tune."
+        )
+        console.print(f"[dim]Moves to HNSW shards past flat_max_memories ({cortex.config.flat_max_memories}).[/dim]")
+        return
+    with console.status("[bold]Measuring shards...[/bold]"):
+        shards = index.stats(cortex, k=k, sample=sample)
+    if not shards:
+        console.print("[yellow]Cortex is empty — no vector index yet.[/yellow]")
+        return
+
+    def show(value, fmt="{}"):
+        return "—" if value is None else fmt.format(value)
+
+    table = Table(title="Cortex Vector Index")
+    table.add_column("Shard", style="cyan")
+    table.add_column("Count", justify="right")
+    table.add_column("Size", justify="right")
+    table.add_column("Dead", justify="right")
+    table.add_column("M/efC/ef", justify="right")
+    table.add_column(f"R@{k}", style="green", justify="right")
+    table.add_column("ANN", justify="right")
+    table.add_column("Exact", justify="right")
+    for shard in shards:
+        table.add_row(
+            shard["category"],
+            str(shard["count"]),
+            show(shard["bytes"] and shard["bytes"] / 1024 / 1024, "{:.1f}M"),
+            show(shard["fragmentation"], "{:.0%}"),
+            f"{show(shard['max_neighbors'])}/{show(shard['ef_construction'])}/{show(shard['ef_search'])}",
+            show(shard["recall"], "{:.3f}"),
+            show(shard["ann_ms"], "{:.2f}ms"),
+            show(shard["exact_ms"], "{:.2f}ms"),
+        )
+    console.print(table)
+    console.print("[dim]Dead: deleted nodes still in the graph. ANN/Exact: per-query latency of the index / brute force.[/dim]")
+    stale = [s["category"] for s in shards if (s["fragmentation"] or 0) > index.REBUILD_FRAGMENTATION]
+    if stale:
+        console.print(f"[yellow]{', '.join(stale)}: over {index.REBUILD_FRAGMENTATION:.0%} dead nodes — run `onememory index rebuild`.[/yellow]")
+
+
+@index_app.command("rebuild")
+def index_rebuild(
+    categories: list[str] = typer.Argument(None, help="Shards to rebuild (default: all)"),
+    m: int = typer.Option(0, "--m", help="HNSW max_neighbors (M); 0 → tuned for the shard's size"),
+    ef_construction: int = typer.Option(0, "--ef-construction", help="0 → tuned for the shard's size"),
+    ef_search: int = typer.Option(0, "--ef-search", help="0 → tuned for the shard's size"),
+    yes: bool = typer.Option(False, "--yes", "-y", help="Skip confirmation"),
+):
+    """Rebuild shards into fresh, compacted HNSW indexes with tuned parameters."""
+    from onememory.brain.cortex import Cortex
+
+    cortex = Cortex(_config())
+    if cortex.backend == "flat":
+        console.print("[yellow]Cortex is flat (brute-force search) — there is no HNSW index to rebuild.[/yellow]")
+        return
+    names = categories or cortex.categories()
+    if not names:
+        console.print("[yellow]Cortex is empty — nothing to rebuild.[/yellow]")
+        return
+    if not yes:
+        typer.confirm(
+            f"Rebuild {', '.join(names)}? Stop the proxy and servers first — writes made during a rebuild are lost.",
+            abort=True,
+        )
+    table = Table(title="Rebuilt Shards")
+    table.add_column("Shard", style="cyan")
+    table.add_column("Memories", justify="right")
+    table.add_column("M / ef_con / ef", style="green", justify="right")
+    for category in names:
+        with console.status(f"[bold]Rebuilding {category}...[/bold]") as spinner:
+            try:
+                result = cortex.rebuild(
+                    category, max_neighbors=m, ef_construction=ef_construction, ef_search=ef_search,
+                    progress=lambda n: spinner.update(f"[bold]Rebuilding {category}: {n} copied...[/bold]"),
+                )
+            except (ValueError, RuntimeError) as e:
+                console.print(f"[red]{category}: {e}[/red]")
+                continue
+        table.add_row(
+            category, str(result["count"]),
+            f"{result['max_neighbors']} / {result['ef_construction']} / {result['ef_search']}",
+        )
+    console.print(table)
+
+
+@app.command()
+def export(
+    path: Path = typer.Argument(..., help="Bundle to write, e.g. onememory-backup.jsonl.gz"),
+    embeddings: bool = typer.Option(False, "--embeddings/--no-embeddings", help="Include vectors so import skips re-embedding"),
+):
+    """Export conversations, memories and salience scores as one compressed bundle."""
+    from onememory.bundle import export_bundle
+
+    config = _config()
+    with console.status("[bold]Exporting...[/bold]") as spinner:
+        counts = export_bundle(
+            config, path, embeddings=embeddings,
+            progress=lambda p: spinner.update(f"[bold]Exported {p['records']} records...[/bold]"),
+        )
+    size = path.stat().st_size / 1024 / 1024
+    console.print(
+        f"[green]Exported {counts['conversations']} conversations, {counts['memories']} memories"
+        f"{' (with embeddings)' if embeddings else ''} and {counts['salience']} scores to {path} ({size:.1f} MB).[/green]"
+    )
+
+
+@app.command(name="import")
+def import_(
+    path: Path = typer.Argument(..., exists=True, dir_okay=False, help="Bundle written by `onememory export`"),
+    reembed: bool = typer.Option(False, "--reembed", help="Ignore the bundle's embeddings and compute them again"),
+):
+    """Import a bundle, merging it into this namespace's store."""
+    from onememory.bundle import import_bundle
+
+    config = _config()
+    try:
+        with console.status("[bold]Importing...[/bold]") as spinner:
+            result = import_bundle(
+                config, path, reembed=reembed,
+                progress=lambda r: spinner.update(f"[bold]Imported {r['memories']} memories...[/bold]"),
+            )
+    except ValueError as e:
+        console.print(f"[red]{e}[/red]")
+        raise typer.Exit(1)
+    console.print(
+        f"[green]Imported {result['conversations']} conversations "
+        f"({result['conversations_skipped']} already present), {result['memories']} memories "
+        f"and {result['salience']} scores.[/green]"
+    )
+    if not result["complete"]:
+        console.print("[yellow]The bundle ends early (truncated?) — everything before the cut was imported.[/yellow]")
+        raise typer.Exit(1)
+
+
 @app.command()
 def recent(limit: int = 10):
     """Show recently captured conversations."""
-    from onememory.brain import create_brain
+    from onememory.daemon import query
 
-    brain = create_brain()
-    convos = brain.get_recent_conversations(limit)
+    convos = query("recent", limit=limit)
     if not convos:
         console.print("[yellow]No conversations captured yet.[/yellow]")
         return
     for c in convos:
-        user_msgs = [m for m in c.messages if m.role == "user"]
-        assistant_msgs = [m for m in c.messages if m.role == "assistant"]
-        user_text = user_msgs[0].content[:80] if user_msgs else "(no user message)"
-        assistant_text = assistant_msgs[0].content[:80] if assistant_msgs else ""
-        agent = c.metadata.get("agent", "unknown") if c.metadata else "unknown"
-        console.print(f"  [cyan]\\[{agent}:{c.model}][/cyan] {user_text}")
+        user_msgs = [m for m in c["messages"] if m["role"] == "user"]
+        assistant_msgs = [m for m in c["messages"] if m["role"] == "assistant"]
+        user_text = user_msgs[0]["content"][:80] if user_msgs else "(no user message)"
+        assistant_text = assistant_msgs[0]["content"][:80] if assistant_msgs else ""
+        agent = c["metadata"].get("agent", "unknown") if c["metadata"] else "unknown"
+        console.print(f"  [cyan]\\[{agent}:{c['model']}][/cyan] {user_text}")
         if assistant_text:
             console.print(f"    [dim]→ {assistant_text}[/dim]")
 
 
+@app.command()
+def history(
+    text: str = typer.Argument("", help="Words that must all appear in the conversation"),
+    since: str = typer.Option("", "--since", help="From this ISO date or date-time"),
+    until: str = typer.Option("", "--until", help="Up to this ISO date (inclusive) or date-time"),
+    provider: str = typer.Option("", "--provider", "-p", help="openai, anthropic, ..."),
+    model: str = typer.Option("", "--model", "-m", help="Model name prefix, e.g. gpt-4"),
+    limit: int = typer.Option(20, "--limit", "-l"),
+    page: int = typer.Option(1, "--page"),
+):
+    """Search all captured conversations by text, date range, provider and model."""
+    from rich.markup import escape
+
+    from onememory.daemon import DaemonError, query
+
+    try:
+        result = query(
+            "history", text=text, start=since, end=until, provider=provider, model=model,
+            limit=limit, offset=(max(1, page) - 1) * limit,
+        )
+    except DaemonError as e:
+        console.print(f"[red]{e}[/red]")
+        raise typer.Exit(1)
+    rows = result["conversations"]
+    if not rows:
+        console.print("[yellow]No matching conversations.[/yellow]")
+        return
+    table = Table(title="Conversation History")
+    table.add_column("When", style="dim", no_wrap=True)
+    table.add_column("Model", style="cyan")
+    table.add_column("Msgs", justify="right")
+    table.add_column("Conversation")
+    for row in rows:
+        when = row["timestamp"][:16].replace("T", " ")
+        text = escape((row["snippet"] or row["preview"][:100]).replace("\n", " "))
+        text = text.replace("«", "[bold yellow]").replace("»", "[/bold yellow]")
+        table.add_row(when, f"{row['provider']}:{row['model']}", str(row["messages"]), text)
+    console.print(table)
+    first = result["offset"] + 1
+    console.print(f"[dim]{first}–{first + len(rows) - 1} of {result['total']}"
+                  + (f" · next: --page {page + 1}" if first + len(rows) - 1 < result["total"] else "") + "[/dim]")
+
+
+@app.command()
+def changes(
+    since: int = typer.Option(-1, "--since", help="Events after this seq (default: the last --limit)"),
+    limit: int = typer.Option(20, "--limit", "-l"),
+    follow: bool = typer.Option(False, "--follow", "-f", help="Keep printing new changes as they happen"),
+):
+    """Show the change feed: captures and memory writes from every process, by seq."""
+    import time
+
+    from rich.markup import escape
+
+    from onememory.feed import ChangeFeed, CursorExpiredError
+
+    feed = ChangeFeed(_config().feed_dir)
+    cursor = since if since >= 0 else max(feed.oldest() - 1, feed.latest() - limit)
+    while True:
+        try:
+            events = feed.read(cursor, limit if not follow else 1000)
+        except CursorExpiredError as e:
+            console.print(f"[yellow]{e}[/yellow]")
+            raise typer.Exit(1)
+        for event in events:
+            data = event["data"]
+            if event["kind"] == "memory":
+                what = f"[{data['category']}] {data['content']}"
+            elif event["kind"] == "conversation":
+                first = next((m["content"] for m in data.get("messages", []) if m["role"] == "user"), "")
+                what = f"[{data.get('provider')}:{data.get('model')}] {first}"
+            else:
+                what = ", ".join(f"{k}={v}" for k, v in data.items())
+            console.print(
+                f"  [dim]#{event['seq']} {event['ts'][11:19]}[/dim] [cyan]{event['kind']} {event['op']}[/cyan] "
+                f"{escape(what.replace(chr(10), ' ')[:100])}"
+            )
+            cursor = event["seq"]
+        if not follow:
+            if not events:
+                console.print("[yellow]No changes yet.[/yellow]" if not feed.latest() else "[dim]No newer changes.[/dim]")
+            return
+        if not events:
+            time.sleep(0.5)
+
+
 @app.command()
 def clear(yes: bool = typer.Option(False, "--yes", "-y", help="Skip confirmation")):
     """Clear today's captured conversations."""
     from datetime import datetime, timezone
 
-    from onememory.config import Config
+    from onememory.feed import change, open_feed
+    from onememory.journal import Journal
 
-    config = Config()
+    config = _config()
     today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    today_file = config.hippocampus_dir / f"{today}.json"
-    if not today_file.exists():
+    journal = Journal(config.hippocampus_dir)
+    if today not in journal.days():
         console.print("[yellow]No conversations captured today.[/yellow]")
         return
     if not yes:
         typer.confirm(
             f"This will delete today's conversations ({today}). Continue?", abort=True
         )
-    today_file.unlink()
+    journal.drop(today)
+    open_feed(config.feed_dir).publish([change("reset", "reset", today, {"scope": "conversations", "day": today})])
     console.print(f"[green]Today's conversations cleared ({today}).[/green]")
 
 
+@app.command()
+def repair(deep: bool = typer.Option(False, "--deep", help="Fully parse every daily log, not just check its ends")):
+    """Recover the conversation logs after a crash: replay WALs, salvage damaged days."""
+    from onememory.journal import Journal
+
+    report = Journal(_config().hippocampus_dir).recover(deep=deep)
+    table = Table(title="Hippocampus Recovery")
+    table.add_column("Check", style="cyan")
+    table.add_column("Result", style="green", justify="right")
+    table.add_row("WAL records replayed", str(report["wal_records"]))
+    table.add_row("Torn / corrupt WAL records dropped", str(report["wal_bad_records"]))
+    table.add_row("Damaged daily logs repaired", str(report["files_repaired"]))
+    table.add_row("Conversations salvaged from them", str(report["salvaged"]))
+    table.add_row("Stale temp files removed", str(report["temp_files"]))
+    console.print(table)
+    if report["files_repaired"]:
+        console.print("[dim]Originals were kept beside the repaired logs as <day>.json.corrupt-<time>.[/dim]")
+
+
 @app.command()
 def reset(
     yes: bool = typer.Option(False, "--yes", "-y", help="Skip confirmation"),
@@ -289,24 +845,27 @@ def reset(
 ):
     """Clear all memories and/or conversations. Start fresh."""
     import shutil
-    from onememory.config import Config
 
-    config = Config()
+    from onememory.feed import change, open_feed
+
+    config = _config()
 
     if not yes:
         what = "all memories (cortex)" if memories_only else "ALL data (conversations + memories + scores)"
         typer.confirm(f"This will delete {what}. Are you sure?", abort=True)
 
     if memories_only:
-        vectordb = config.cortex_dir / "vectordb"
-        if vectordb.exists():
-            shutil.rmtree(vectordb)
+        for d in [config.cortex_dir / name for name in ("vectordb", "flat", "slots", "versions")]:
+            if d.exists():
+                shutil.rmtree(d)
+        open_feed(config.feed_dir).publish([change("reset", "reset", "memories", {"scope": "memories"})])
         console.print("[green]Memories cleared (cortex reset). Conversations kept.[/green]")
     else:
         for d in [config.hippocampus_dir, config.cortex_dir, config.amygdala_dir, config.dreamlog_dir]:
             if d.exists():
                 shutil.rmtree(d)
         config.ensure_dirs()
+        open_feed(config.feed_dir).publish([change("reset", "reset", "all", {"scope": "all"})])
         console.print("[green]Everything cleared. Fresh start.[/green]")
 
 
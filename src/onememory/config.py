@@ -1,11 +1,64 @@
-"""OneMemory configuration — paths and settings."""
+"""OneMemory configuration — paths and settings.
+
+A plain dataclass rather than a pydantic model: every CLI command imports
+this, and it shouldn't drag pydantic onto the startup path.
+"""
+import json
+import re
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from pydantic import BaseModel, Field
+
+DEFAULT_NAMESPACE = "default"
+_NAMESPACE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
 
 
-class Config(BaseModel):
-    base_dir: Path = Field(default_factory=lambda: Path.home() / ".onememory")
+@dataclass
+class Config:
+    base_dir: Path = field(default_factory=lambda: Path.home() / ".onememory")
     proxy_port: int = 8080
+    summarize: bool = True        # conversation-level summaries in Dreamer; turn off on slow machines
+    summarize_workers: int = 0    # 0 → os.cpu_count()
+    summary_max_facts: int = 5
+    namespace: str = DEFAULT_NAMESPACE
+    max_open_brains: int = 8      # LRU size of the servers' brain pool
+    mcp_workers: int = 16         # threads running MCP tool calls concurrently
+    remember_batch: int = 32      # remember() write-behind: flush at this many pending, 1 → write through
+    remember_delay: float = 0.2   # ... or once the oldest pending record is this many seconds old
+    max_memories: int = 0         # per-namespace quotas, 0 → unlimited
+    max_conversations: int = 0
+    recall_cache_size: int = 256          # cached searches/contexts per brain, 0 → off
+    recall_cache_similarity: float = 0.0  # serve near-identical queries from cache at this cosine, 0 → exact only
+    hnsw_ef_search: int = 0               # pin every shard's HNSW ef_search, 0 → by shard size (brain/index.py)
+    flat_max_memories: int = 20_000       # new cortexes use brute-force search up to this size, then HNSW; 0 → HNSW
+    flat_dtype: str = "float32"           # flat store vectors: float32 | float16 | int8
+    fact_versioning: bool = True          # keep one current version of each identity/preference fact (brain/facts.py)
+
+    def for_namespace(self, name: str) -> "Config":
+        """Config for one profile. The default namespace is base_dir itself, so
+        single-user stores need no migration; others live under namespaces/<name>/
+        with quotas from namespaces.json ({"<name>" or "*": {"max_memories": ...}})."""
+        name = name or DEFAULT_NAMESPACE
+        if not _NAMESPACE.match(name):
+            raise ValueError(f"invalid namespace {name!r}: use lowercase letters, digits, '-' and '_'")
+        if self.namespace != DEFAULT_NAMESPACE:
+            if name == self.namespace:
+                return self
+            raise ValueError("for_namespace() must be called on the root config")
+        quotas = self.quotas()
+        limits = {**quotas.get("*", {}), **quotas.get(name, {})}
+        return replace(
+            self,
+            base_dir=self.namespaces_dir / name if name != DEFAULT_NAMESPACE else self.base_dir,
+            namespace=name,
+            max_memories=int(limits.get("max_memories", self.max_memories)),
+            max_conversations=int(limits.get("max_conversations", self.max_conversations)),
+        )
+
+    def quotas(self) -> dict:
+        try:
+            return json.loads(self.quotas_file.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
 
     @property
     def hippocampus_dir(self) -> Path:
@@ -27,6 +80,30 @@ class Config(BaseModel):
     def working_memory_dir(self) -> Path:
         return self.base_dir / "working-memory"
 
+    @property
+    def feed_dir(self) -> Path:
+        return self.base_dir / "feed"
+
+    @property
+    def metrics_dir(self) -> Path:
+        return self.base_dir / "metrics"
+
+    @property
+    def profiles_dir(self) -> Path:
+        return self.base_dir / "profiles"
+
+    @property
+    def daemon_socket(self) -> Path:
+        return self.base_dir / "daemon.sock"
+
+    @property
+    def namespaces_dir(self) -> Path:
+        return self.base_dir / "namespaces"
+
+    @property
+    def quotas_file(self) -> Path:
+        return self.base_dir / "namespaces.json"
+
     def ensure_dirs(self) -> None:
         for d in [
             self.hippocampus_dir,
@@ -1,92 +1,169 @@
 """
 Dreamer — sleep consolidation engine.
 
-Reads today's conversations from hippocampus, extracts structured facts
-using heuristics, and stores them in cortex.
+Reads today's conversations from hippocampus, extracts sentence-level
+facts (see extraction.py), and stores them in cortex. When enabled, also
+condenses each conversation — both roles — into a bounded set of summary
+facts (see summarizer.py), fanned out over a process pool and skipped for
+conversations that haven't changed since the last run.
 
 Uses content-based deterministic IDs so the same fact always gets the
 same ID — chromadb upsert deduplicates automatically.
 """
 from __future__ import annotations
-import hashlib
 import json
+import multiprocessing
+import os
+import time
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
+from onememory import journal, metrics
 from onememory.config import Config
-from onememory.models import MemoryEntry, Conversation
+from onememory.models import Conversation
+from onememory.brain.records import MemoryRecord
 from onememory.brain.hippocampus import Hippocampus
 from onememory.brain.cortex import Cortex
 from onememory.brain.amygdala import Amygdala
+from onememory.consolidation.extraction import (  # noqa: F401 — re-exported for the addon
+    IDENTITY_SIGNALS,
+    PREFERENCE_SIGNALS,
+    _content_id,
+    facts_from_message,
+)
+from onememory.consolidation.summarizer import fingerprint, summarize_batch
 
-IDENTITY_SIGNALS = ["my name is", "i am a", "i'm a", "i work at", "i work as", "i live in"]
-PREFERENCE_SIGNALS = ["i prefer", "i like", "i love", "i hate", "i use", "my favorite", "i always"]
+_DREAM_SECONDS = metrics.histogram("dream_seconds", "Full consolidation pass latency")
+_FACTS = metrics.counter("facts_extracted_total", "Facts extracted from conversations, by source")
+_SUMMARIZE_SECONDS = metrics.histogram("summarize_seconds", "Summarization stage latency per dream run")
 
-
-def _content_id(content: str) -> str:
-    """Deterministic ID from content — same text always gets the same ID."""
-    return hashlib.md5(content.encode()).hexdigest()[:12]
+SUMMARY_BATCH = 64      # conversations per worker task
+POOL_THRESHOLD = 32     # below this, summarizing inline beats spawning workers
 
 
 class Dreamer:
-    def __init__(self, config: Config, hippocampus: Hippocampus, cortex: Cortex, amygdala: Amygdala) -> None:
+    def __init__(
+        self,
+        config: Config,
+        hippocampus: Hippocampus,
+        cortex: Cortex,
+        amygdala: Amygdala,
+        summarize: bool | None = None,
+    ) -> None:
         self.config = config
         self.hippocampus = hippocampus
         self.cortex = cortex
         self.amygdala = amygdala
+        self.summarize = config.summarize if summarize is None else summarize
+        self._summaries_path = config.dreamlog_dir / "summaries.json"
 
     def dream(self) -> dict:
         """Run consolidation on today's conversations."""
-        conversations = self.hippocampus.get_all_today()
-        if not conversations:
-            return {"status": "nothing_to_consolidate", "conversations": 0, "memories_created": 0}
-
-        memories_created = 0
-        for convo in conversations:
-            score = self.amygdala.score(convo)
-            for fact in self._extract_facts(convo):
-                fact.importance = score
-                self.cortex.store_memory(fact)
-                memories_created += 1
-
-        log = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "conversations_processed": len(conversations),
-            "memories_created": memories_created,
+        with _DREAM_SECONDS.time():
+            conversations = self.hippocampus.get_all_today()
+            if not conversations:
+                return {"status": "nothing_to_consolidate", "conversations": 0, "memories_created": 0}
+
+            memories_created = 0
+            for convo in conversations:
+                score = self.amygdala.score(convo)
+                facts = list(self._extract_facts(convo))
+                for fact in facts:
+                    fact.importance = score
+                self.cortex.store_many(_unique(facts))  # one embed and upsert per conversation
+                memories_created += len(facts)
+
+            summary = self._summarize(conversations) if self.summarize else {"enabled": False}
+            memories_created += summary.get("facts", 0)
+
+            log = {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "conversations_processed": len(conversations),
+                "memories_created": memories_created,
+                "summarize": summary,
+            }
+            log_path = self.config.dreamlog_dir / f"{datetime.now(timezone.utc).strftime('%Y-%m-%d')}.json"
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            log_path.write_text(json.dumps(log, indent=2))
+
+            return {
+                "status": "done",
+                "conversations": len(conversations),
+                "memories_created": memories_created,
+                "summarize": summary,
+            }
+
+    def _summarize(self, conversations: list[Conversation]) -> dict:
+        """Summarize changed conversations in a worker pool; returns the stage's cost record."""
+        start = time.perf_counter()
+        seen = self._load_summaries()
+        pending = [c for c in conversations if seen.get(c.id) != fingerprint(c)]
+        batches = [pending[i:i + SUMMARY_BATCH] for i in range(0, len(pending), SUMMARY_BATCH)]
+        workers = self.config.summarize_workers or os.cpu_count() or 1
+        max_facts = self.config.summary_max_facts
+
+        if len(pending) < POOL_THRESHOLD or workers == 1:
+            workers = 1
+            results = (summarize_batch(batch, max_facts) for batch in batches)
+            facts = self._store_summaries(batches, results, seen)
+        else:
+            # spawn, not fork: this process already runs chromadb, ONNX and flusher threads whose
+            # held locks a forked child would inherit; the workers only need summarize_batch
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                results = pool.map(summarize_batch, batches, [max_facts] * len(batches))
+                facts = self._store_summaries(batches, results, seen)
+        self._save_summaries(seen)
+
+        seconds = time.perf_counter() - start
+        _SUMMARIZE_SECONDS.observe(seconds)
+        return {
+            "enabled": True,
+            "conversations": len(pending),
+            "skipped": len(conversations) - len(pending),
+            "facts": facts,
+            "workers": workers,
+            "seconds": round(seconds, 3),
+            "ms_per_conversation": round(seconds * 1000 / len(pending), 2) if pending else 0.0,
         }
-        log_path = self.config.dreamlog_dir / f"{datetime.now(timezone.utc).strftime('%Y-%m-%d')}.json"
-        log_path.parent.mkdir(parents=True, exist_ok=True)
-        log_path.write_text(json.dumps(log, indent=2))
 
-        return {"status": "done", "conversations": len(conversations), "memories_created": memories_created}
+    def _store_summaries(self, batches, results, seen: dict[str, str]) -> int:
+        """Store each batch's summary facts with one cortex write, then mark its conversations done."""
+        facts = 0
+        for batch, summaries in zip(batches, results):
+            records = [record for records in summaries for record in records]
+            self.cortex.store_many(_unique(records))
+            facts += len(records)
+            _FACTS.inc(len(records), source="summarizer")
+            for convo in batch:
+                seen[convo.id] = fingerprint(convo)
+        return facts
+
+    def _load_summaries(self) -> dict[str, str]:
+        if self._summaries_path.exists():
+            try:
+                return json.loads(self._summaries_path.read_text())
+            except ValueError:
+                return {}
+        return {}
+
+    def _save_summaries(self, seen: dict[str, str]) -> None:
+        journal.atomic_write(self._summaries_path, json.dumps(seen))  # torn, it would reset every fingerprint
 
     def consolidate_conversation(self, conversation: Conversation) -> int:
         """Extract facts from a single conversation and store in cortex. Returns count of memories created."""
-        memories_created = 0
-        for fact in self._extract_facts(conversation):
-            self.cortex.store_memory(fact)
-            memories_created += 1
-        return memories_created
-
-    def _extract_facts(self, conversation: Conversation) -> list[MemoryEntry]:
-        facts = []
+        facts = list(self._extract_facts(conversation))
+        self.cortex.store_many(_unique(facts))
+        return len(facts)
+
+    def _extract_facts(self, conversation: Conversation) -> Iterator[MemoryRecord]:
         for msg in conversation.messages:
             if msg.role != "user":
                 continue
-            text = msg.content.strip()
-            if not text or len(text) < 10:
-                continue
+            for fact in facts_from_message(msg.content, conversation.id, conversation.provider, conversation.model):
+                _FACTS.inc(source="dreamer")
+                yield fact
 
-            lower = text.lower()
-            category = "knowledge"
-            if any(sig in lower for sig in IDENTITY_SIGNALS):
-                category = "identity"
-            elif any(sig in lower for sig in PREFERENCE_SIGNALS):
-                category = "preference"
-
-            facts.append(MemoryEntry(
-                id=_content_id(text),
-                content=text,
-                category=category,
-                source=f"{conversation.provider}:{conversation.model}",
-                tags=[conversation.provider],
-            ))
-        return facts
+
+def _unique(records: list[MemoryRecord]) -> list[MemoryRecord]:
+    """One record per id, the last one winning — as storing them one by one would leave them."""
+    return list({record.id: record for record in records}.values())
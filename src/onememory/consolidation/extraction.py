@@ -0,0 +1,121 @@
+"""
+Extraction — sentence-level fact spans from chat messages.
+
+A message is streamed through three generator stages:
+
+    iter_sentences(text)   lines → sentences and ;-clauses, skipping fenced code blocks
+    iter_spans(text)       sentences → fact-bearing spans, capped at MAX_CHUNK_CHARS
+    facts_from_message()   spans → MemoryRecords linked to their conversation
+
+Only spans that carry an identity/preference signal or are first-person
+statements are kept; questions and instructions to the assistant are not
+facts about the user. Every span gets a content-based ID, so the same
+sentence said in two different messages is stored once.
+"""
+from __future__ import annotations
+import hashlib
+import io
+import re
+from collections.abc import Iterator
+from onememory.brain.records import MemoryRecord
+
+IDENTITY_SIGNALS = ["my name is", "i am a", "i'm a", "i work at", "i work as", "i live in"]
+PREFERENCE_SIGNALS = ["i prefer", "i like", "i love", "i hate", "i use", "my favorite", "i always"]
+
+MIN_CHUNK_CHARS = 10
+MAX_CHUNK_CHARS = 280
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])[\"')\]]*\s+(?=[\"'(\[]?[A-Z0-9])|\s*;\s+")
+_CLAUSE_BREAK = re.compile(r"\s*;\s*|,\s+(?=(?:and|but|so|because|although|while)\s)|\s+[–—-]\s+")
+_FIRST_PERSON = re.compile(r"\b(?:i|i'm|i've|i'd|i'll|my|mine|me|we|we're|our)\b", re.IGNORECASE)
+_LIST_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+
+
+def _content_id(content: str) -> str:
+    """Deterministic ID from content — same text always gets the same ID."""
+    return hashlib.md5(content.encode()).hexdigest()[:12]
+
+
+def classify(span: str) -> str | None:
+    """Category for a fact-bearing span, or None if it isn't one."""
+    lower = span.lower()
+    if any(sig in lower for sig in IDENTITY_SIGNALS):
+        return "identity"
+    if any(sig in lower for sig in PREFERENCE_SIGNALS):
+        return "preference"
+    if span.rstrip().endswith("?"):
+        return None
+    if _FIRST_PERSON.search(span):
+        return "knowledge"
+    return None
+
+
+def iter_sentences(text: str) -> Iterator[str]:
+    """Yield sentences (and independent ;-clauses) line by line, skipping fenced code blocks."""
+    in_fence = False
+    for line in io.StringIO(text):
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            in_fence = not in_fence
+            continue
+        if in_fence or not stripped:
+            continue
+        stripped = _LIST_MARKER.sub("", stripped)
+        for sentence in _SENTENCE_BREAK.split(stripped):
+            sentence = sentence.strip()
+            if sentence:
+                yield sentence
+
+
+def _cap(sentence: str, limit: int) -> Iterator[str]:
+    """Split an over-long sentence at clause boundaries, then at word boundaries."""
+    if len(sentence) <= limit:
+        yield sentence
+        return
+    for clause in _CLAUSE_BREAK.split(sentence):
+        clause = clause.strip()
+        if len(clause) <= limit:
+            if clause:
+                yield clause
+            continue
+        chunk: list[str] = []
+        size = 0
+        for word in clause.split():
+            word = word[:limit]
+            if chunk and size + 1 + len(word) > limit:
+                yield " ".join(chunk)
+                chunk, size = [], 0
+            size += len(word) + (1 if chunk else 0)
+            chunk.append(word)
+        if chunk:
+            yield " ".join(chunk)
+
+
+def iter_spans(text: str, max_chars: int = MAX_CHUNK_CHARS) -> Iterator[tuple[str, str]]:
+    """Yield (span, category) for every fact-bearing span in `text`."""
+    for sentence in iter_sentences(text):
+        for span in _cap(sentence, max_chars):
+            if len(span) < MIN_CHUNK_CHARS:
+                continue
+            category = classify(span)
+            if category is not None:
+                yield span, category
+
+
+def facts_from_message(
+    text: str,
+    conversation_id: str = "",
+    provider: str = "",
+    model: str = "",
+    max_chars: int = MAX_CHUNK_CHARS,
+) -> Iterator[MemoryRecord]:
+    """Stream MemoryRecords for the fact-bearing spans of one user message."""
+    for span, category in iter_spans(text, max_chars):
+        yield MemoryRecord(
+            id=_content_id(span),
+            content=span,
+            category=category,
+            source=f"{provider}:{model}",
+            tags=[str(provider)] if provider else [],
+            conversation_id=conversation_id,
+        )
@@ -0,0 +1,216 @@
+"""
+Reconsolidation — batch re-scoring of memory importance.
+
+Importance used to be set once, when a memory was written: the amygdala's
+keyword score of its conversation, or 0.7 for remember(). Memories that
+keep coming up never gained weight and stale ones never lost it.
+Reconsolidator.run() recomputes it across the whole cortex with NumPy:
+
+    prior          the importance the memory was written with
+    signals        amygdala keywords in the memory itself
+    recurrence     times it was restated: extracted again from another
+                   conversation, or near-duplicates (cosine ≥ NEAR_DUPLICATE)
+    access         times a search returned it (the amygdala's access log)
+    corroboration  distinct providers it was heard from, near-duplicates included
+    recency        age since it was written, halving every HALF_LIFE_DAYS
+
+    importance = prior + Σ BOOSTS[feature] · feature − DECAY · (1 − recency)
+
+clipped to [0, 1] and kept to two decimals, each feature scaled to [0, 1].
+
+Runs are incremental. amygdala/reconsolidation.json keeps what each
+memory's features were built from — content hash, prior, mentions,
+providers, near-duplicate links, access count — so only memories that are
+new or changed since the last run are compared against the cortex (a
+chunked matrix product of those rows, not all N² pairs), and only memories
+whose importance moved are written back, metadata only, in bulk.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+import numpy as np
+from onememory import metrics
+from onememory.config import Config
+from onememory.journal import atomic_write
+from onememory.brain.amygdala import HIGH_IMPORTANCE_KEYWORDS, Amygdala
+from onememory.brain.cortex import Cortex
+from onememory.brain.records import MemoryRecord
+
+NEAR_DUPLICATE = 0.9    # cosine at which two memories say the same thing
+HALF_LIFE_DAYS = 30.0
+ACCESS_SATURATION = 32  # accesses that earn the full access boost
+BOOSTS = {"signals": 0.2, "recurrence": 0.15, "access": 0.15, "corroboration": 0.1}
+DECAY = 0.2             # the most an old, never-recalled memory loses
+CHUNK = 1024            # changed memories per matrix product
+
+_RESCORE_SECONDS = metrics.histogram("reconsolidation_seconds", "Importance re-scoring pass latency")
+_RESCORED = metrics.counter("memories_rescored_total", "Memories whose importance re-scoring changed")
+
+
+def _digest(text: str) -> str:
+    return hashlib.md5(text.encode()).hexdigest()[:12]
+
+
+def _origin(record: MemoryRecord) -> str:
+    """Where a memory was heard: "openai" for source "openai:gpt-4o", "manual" for remember()."""
+    return record.source.split(":", 1)[0]
+
+
+def _stamp(timestamp: str):
+    try:
+        return np.datetime64(timestamp[:19], "s")
+    except ValueError:
+        return np.datetime64("NaT")
+
+
+def _ages(timestamps: list[str], now: datetime):
+    """Age in days of each ISO timestamp (UTC); 0 for missing or unparseable ones."""
+    try:
+        stamps = np.array([t[:19] or "NaT" for t in timestamps], dtype="datetime64[s]")
+    except ValueError:  # one bad timestamp: parse them one by one
+        stamps = np.array([_stamp(t) for t in timestamps], dtype="datetime64[s]")
+    ages = (np.datetime64(now.replace(tzinfo=None), "s") - stamps) / np.timedelta64(1, "D")
+    return np.clip(np.nan_to_num(ages, nan=0.0), 0.0, None)
+
+
+class Reconsolidator:
+    """Re-scores the importance of every memory from usage and corroboration."""
+
+    def __init__(self, config: Config, cortex: Cortex, amygdala: Amygdala) -> None:
+        self.config = config
+        self.cortex = cortex
+        self.amygdala = amygdala
+        self._state_path = config.amygdala_dir / "reconsolidation.json"
+
+    def _load_state(self) -> dict:
+        try:
+            return json.loads(self._state_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {"memories": {}}
+
+    def _save_state(self, state: dict) -> None:
+        atomic_write(self._state_path, json.dumps(state, separators=(",", ":")))
+
+    def run(self, full: bool = False, now: datetime | None = None) -> dict:
+        """One pass. `full` re-links every memory's near-duplicates, not just new and changed ones."""
+        with _RESCORE_SECONDS.time():
+            start = time.perf_counter()
+            now = now or datetime.now(timezone.utc)
+            state = self._load_state()
+            accesses = self.amygdala.drain_access()
+            records, vectors = [], []
+            for record, vector in self.cortex.iter_records(embeddings=True):
+                records.append(record)
+                vectors.append(vector)
+            known, changed = self._track(state["memories"], records, accesses, full)
+            links = self._link(known, records, vectors, changed) if records else 0
+            importance = self._score(known, records, now)
+            current = np.array([r.importance for r in records], dtype=np.float32)
+            moved = np.flatnonzero(np.rint(importance * 100) != np.rint(current * 100))
+            updated = self.cortex.update_importance({records[i].id: round(float(importance[i]), 2) for i in moved})
+            state["memories"] = known
+            state["scored_at"] = now.isoformat()
+            self._save_state(state)
+            _RESCORED.inc(updated)
+            return {
+                "memories": len(records),
+                "changed": len(changed),
+                "updated": updated,
+                "accesses": len(accesses),
+                "near_duplicates": links,
+                "mean_importance": round(float(importance.mean()), 3) if records else 0.0,
+                "seconds": round(time.perf_counter() - start, 3),
+            }
+
+    def _track(self, state: dict, records: list[MemoryRecord], accesses: list[str], full: bool) -> tuple[dict, list[int]]:
+        """Carry each memory's history forward; returns (state for the current memories, rows to re-link)."""
+        counts = dict(zip(*np.unique(np.array(accesses, dtype=str), return_counts=True))) if accesses else {}
+        known: dict[str, dict] = {}
+        changed: list[int] = []
+        for row, record in enumerate(records):
+            digest = _digest(record.content)
+            origin = _origin(record)
+            entry = state.get(record.id)
+            if entry is None:
+                entry = {
+                    "content": digest, "conversation": record.conversation_id, "prior": record.importance,
+                    "mentions": 1, "origins": [origin] if origin else [], "near": [], "access": 0,
+                }
+                changed.append(row)
+            else:
+                if entry["content"] != digest or full:
+                    entry["content"] = digest
+                    changed.append(row)
+                if record.conversation_id and record.conversation_id != entry["conversation"]:
+                    # Extracted again from another conversation: a restatement, written with a fresh prior.
+                    entry["conversation"] = record.conversation_id
+                    entry["prior"] = record.importance
+                    entry["mentions"] += 1
+                if origin and origin not in entry["origins"]:
+                    entry["origins"].append(origin)
+            entry["access"] += int(counts.get(record.id, 0))
+            known[record.id] = entry
+        return known, changed
+
+    def _link(self, known: dict, records: list[MemoryRecord], vectors: list, changed: list[int]) -> int:
+        """Refresh near-duplicate links for the changed rows; returns the number of linked pairs."""
+        ids = [r.id for r in records]
+        near = {i: set(n for n in known[i]["near"] if n in known) for i in ids}
+        for row in changed:  # drop the changed rows' old links from both ends
+            for other in near[ids[row]]:
+                near[other].discard(ids[row])
+            near[ids[row]] = set()
+        if changed:
+            matrix = np.asarray(vectors, dtype=np.float32)
+            matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            for start in range(0, len(changed), CHUNK):
+                rows = np.asarray(changed[start:start + CHUNK])
+                similarity = matrix[rows] @ matrix.T
+                similarity[np.arange(len(rows)), rows] = -1.0  # not a duplicate of itself
+                for a, b in zip(*np.nonzero(similarity >= NEAR_DUPLICATE)):
+                    near[ids[rows[a]]].add(ids[b])
+                    near[ids[b]].add(ids[rows[a]])
+        for record_id, others in near.items():
+            known[record_id]["near"] = sorted(others)
+        return sum(len(others) for others in near.values()) // 2
+
+    def _score(self, known: dict, records: list[MemoryRecord], now: datetime):
+        """Importance for every record, all features computed as arrays."""
+        n = len(records)
+        if not n:
+            return np.zeros(0, dtype=np.float32)
+        entries = [known[r.id] for r in records]
+        row = {r.id: i for i, r in enumerate(records)}
+        prior = np.array([e["prior"] for e in entries], dtype=np.float32)
+        mentions = np.array([e["mentions"] for e in entries], dtype=np.float32)
+        access = np.array([e["access"] for e in entries], dtype=np.float32)
+        src = np.array([i for i, e in enumerate(entries) for _ in e["near"]], dtype=np.int64)
+        dst = np.array([row[other] for e in entries for other in e["near"]], dtype=np.int64)
+
+        text = np.array([r.content.lower() for r in records], dtype=str)
+        hits = sum((np.char.find(text, keyword) >= 0).astype(np.float32) for keyword in HIGH_IMPORTANCE_KEYWORDS)
+
+        recurrence = mentions + np.bincount(src, minlength=n).astype(np.float32)
+
+        origins = sorted({o for e in entries for o in e["origins"]})
+        heard = np.zeros((n, max(1, len(origins))), dtype=bool)
+        code = {o: c for c, o in enumerate(origins)}
+        own = [(i, code[o]) for i, e in enumerate(entries) for o in e["origins"]]
+        if own:
+            heard[tuple(np.array(own).T)] = True
+        corroborated = heard.copy()
+        if len(src):
+            np.logical_or.at(corroborated, src, heard[dst])
+        providers = corroborated.sum(axis=1).astype(np.float32)
+
+        features = {
+            "signals": np.minimum(hits, 3) / 3,
+            "recurrence": np.minimum(1.0, np.log2(recurrence) / 3),
+            "access": np.minimum(1.0, np.log1p(access) / np.log1p(ACCESS_SATURATION)),
+            "corroboration": np.minimum(np.maximum(providers - 1, 0), 2) / 2,
+        }
+        recency = 0.5 ** (_ages([r.timestamp for r in records], now) / HALF_LIFE_DAYS)
+        importance = prior + sum(BOOSTS[name] * value for name, value in features.items()) - DECAY * (1 - recency)
+        return np.clip(importance, 0.0, 1.0)
@@ -0,0 +1,119 @@
+"""
+Summarizer — offline, extractive conversation summaries for consolidation.
+
+Fact extraction only looks at user sentences one at a time. This stage
+looks at the whole conversation — both roles — and keeps the few sentences
+that best represent it:
+
+    score(sentence) = centrality   mean document frequency of its content words
+                    × role weight  user 1.0, assistant ASSISTANT_WEIGHT
+
+User sentences that fact extraction stores itself (identity, preference and
+first-person spans) count towards centrality but are never picked: they are
+already memories, under their own ids. The top max_facts of the rest become
+memories tagged "summary" and the role they came from; assistant sentences
+get their own "summary" category. Summary ids are content hashes in their
+own namespace, so an assistant echoing a user's fact never overwrites it.
+
+Pure Python, no model, deterministic — and a pure function of the
+conversation, so Dreamer can fan it out over a process pool and skip
+conversations whose fingerprint hasn't changed since the last run.
+"""
+from __future__ import annotations
+import hashlib
+import math
+import re
+from collections import Counter
+from onememory.models import Conversation
+from onememory.brain.records import MemoryRecord
+from onememory.consolidation.extraction import (
+    MAX_CHUNK_CHARS,
+    MIN_CHUNK_CHARS,
+    _cap,
+    _content_id,
+    classify,
+    iter_sentences,
+)
+
+MAX_FACTS = 5
+ASSISTANT_WEIGHT = 0.6
+MIN_WORDS = 4
+MIN_TERMS = 2
+
+_WORD = re.compile(r"[a-z][a-z'+#.-]*[a-z+#]|[a-z]")
+STOPWORDS = frozenset(
+    "a an and are as at be but by can could did do does for from had has have how i if in into is it its "
+    "just like me more my no not of on or our out so some such than that the their them then there these "
+    "they this to too up very was we were what when where which while who why will with would you your "
+    "yes ok okay sure here also get got let lets can't don't i'm it's you're that's".split()
+)
+
+
+def fingerprint(conversation: Conversation) -> str:
+    """Changes whenever the conversation's messages do — the incremental key."""
+    h = hashlib.md5()
+    for msg in conversation.messages:
+        h.update(msg.role.encode())
+        h.update(b"\0")
+        h.update(msg.content.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _terms(sentence: str) -> list[str]:
+    return [w for w in _WORD.findall(sentence.lower()) if w not in STOPWORDS]
+
+
+def summarize(conversation: Conversation, max_facts: int = MAX_FACTS) -> list[MemoryRecord]:
+    """Condense one conversation into at most `max_facts` summary memories."""
+    candidates: list[tuple[int, str, str, list[str]]] = []  # order, role, sentence, terms
+    for msg in conversation.messages:
+        if msg.role not in ("user", "assistant"):
+            continue
+        for sentence in iter_sentences(msg.content):
+            if sentence.endswith("?"):
+                continue
+            for span in _cap(sentence, MAX_CHUNK_CHARS):
+                terms = _terms(span)
+                if len(span) >= MIN_CHUNK_CHARS and len(terms) >= MIN_TERMS and len(span.split()) >= MIN_WORDS:
+                    candidates.append((len(candidates), msg.role, span, terms))
+    if not candidates:
+        return []
+
+    # Document frequency across sentences: a term the conversation keeps coming back to is central.
+    df: Counter[str] = Counter()
+    for _, _, _, terms in candidates:
+        df.update(set(terms))
+
+    scored = []
+    for order, role, span, terms in candidates:
+        if role == "user" and classify(span) is not None:
+            continue  # extraction stores this one (facts_from_message)
+        unique = set(terms)
+        centrality = sum(df[t] for t in unique) / (len(unique) + 1) / math.log2(len(candidates) + 1)
+        weight = 1.0 if role == "user" else ASSISTANT_WEIGHT
+        scored.append((centrality * weight, order, role, span))
+
+    best = sorted(scored, key=lambda s: (-s[0], s[1]))[:max_facts]
+    facts: list[MemoryRecord] = []
+    seen: set[str] = set()
+    for score, _, role, span in sorted(best, key=lambda s: s[1]):
+        fact_id = _content_id("summary:" + span)
+        if fact_id in seen:
+            continue
+        seen.add(fact_id)
+        facts.append(MemoryRecord(
+            id=fact_id,
+            content=span,
+            category="knowledge" if role == "user" else "summary",
+            source=f"{conversation.provider}:{conversation.model}",
+            tags=[str(conversation.provider), "summary", role],
+            importance=round(min(1.0, 0.3 + score / 4), 2),
+            conversation_id=conversation.id,
+        ))
+    return facts
+
+
+def summarize_batch(batch: list[Conversation], max_facts: int = MAX_FACTS) -> list[list[MemoryRecord]]:
+    """Worker-pool entry point — one pickle round-trip per batch, not per conversation."""
+    return [summarize(c, max_facts) for c in batch]
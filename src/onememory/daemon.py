@@ -0,0 +1,219 @@
+"""
+Daemon — a resident brain served over a local Unix socket.
+
+`onememory daemon` keeps one warm brain (chromadb client, embedding model)
+in memory. CLI commands talk to it first and fall back to building a brain
+in-process when no daemon is running, so the daemon is always optional.
+
+Protocol: one newline-terminated JSON request per connection,
+
+    {"op": "search", "args": {"query": "python", "limit": 10}, "namespace": "work"}
+
+answered with {"ok": true, "result": ...} or {"ok": false, "error": "..."}.
+"namespace" is optional (ONEMEMORY_NAMESPACE, else the default); the
+daemon keeps an LRU BrainPool so one process serves every profile.
+
+This module must stay cheap to import — it's on the path of every CLI
+command. The brain is only imported by `serve()` and the in-process fallback.
+"""
+from __future__ import annotations
+import json
+import os
+import socket
+import socketserver
+import threading
+from pathlib import Path
+from onememory import metrics
+
+CONNECT_TIMEOUT = 0.2
+REQUEST_TIMEOUT = 60.0
+
+
+class DaemonUnavailable(Exception):
+    """No daemon is listening on the socket."""
+
+
+class DaemonError(Exception):
+    """The daemon answered, but the operation failed."""
+
+
+class DaemonRunning(Exception):
+    """serve() found another daemon already answering on the socket."""
+
+
+# ---------------------------------------------------------------------------
+# Operations — shared by the daemon and the in-process fallback
+# ---------------------------------------------------------------------------
+
+def _op_status(brain) -> dict:
+    return brain.status()
+
+
+def _op_context(brain) -> dict:
+    return brain.get_context()
+
+
+def _op_search(brain, query: str, limit: int = 10) -> list[dict]:
+    return [{"entry": r.entry.as_dict(), "score": r.score} for r in brain.search(query, limit)]
+
+
+def _op_memories(brain, category: str = "") -> list[dict]:
+    return [m.as_dict() for m in brain.get_memories(category)]
+
+
+def _op_facts(brain, attribute: str = "") -> list[dict]:
+    return brain.facts(attribute)
+
+
+def _op_recent(brain, limit: int = 20) -> list[dict]:
+    return [c.model_dump(mode="json") for c in brain.get_recent_conversations(limit)]
+
+
+def _op_history(brain, **filters) -> dict:
+    return brain.history(**filters)
+
+
+def _op_remember(brain, content: str, category: str = "general", tags: list[str] | None = None) -> str:
+    return brain.remember(content, category, tags or [])
+
+
+OPS = {
+    "status": _op_status,
+    "context": _op_context,
+    "search": _op_search,
+    "memories": _op_memories,
+    "facts": _op_facts,
+    "recent": _op_recent,
+    "history": _op_history,
+    "remember": _op_remember,
+}
+
+
+def dispatch(brain, op: str, args: dict):
+    if op not in OPS:
+        raise DaemonError(f"unknown op: {op}")
+    return OPS[op](brain, **args)
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+def request(socket_path: Path, op: str, namespace: str = "", **args):
+    """Send one request to the daemon. Raises DaemonUnavailable if nothing is listening."""
+    if not socket_path.exists():
+        raise DaemonUnavailable(str(socket_path))
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(str(socket_path))
+        except OSError as e:
+            raise DaemonUnavailable(str(e)) from e
+        sock.settimeout(REQUEST_TIMEOUT)
+        sock.sendall(json.dumps({"op": op, "args": args, "namespace": namespace}).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    finally:
+        sock.close()
+    if not line:
+        raise DaemonUnavailable("daemon closed the connection")
+    reply = json.loads(line)
+    if not reply.get("ok"):
+        raise DaemonError(reply.get("error", "unknown error"))
+    return reply.get("result")
+
+
+def running(socket_path: Path) -> bool:
+    """Whether a daemon answers on `socket_path` (a stale socket file doesn't count)."""
+    try:
+        request(socket_path, "status")
+    except DaemonUnavailable:
+        return False
+    except DaemonError:
+        pass  # it answered
+    return True
+
+
+def query(op: str, config=None, namespace: str = "", **args):
+    """Run an operation on the daemon if one is running, otherwise in-process."""
+    from onememory.config import Config
+
+    config = config or Config()
+    namespace = namespace or os.environ.get("ONEMEMORY_NAMESPACE", "")
+    try:
+        return request(config.daemon_socket, op, namespace=namespace, **args)
+    except DaemonUnavailable:
+        pass
+    from onememory.brain import QuotaExceededError, create_brain
+    try:
+        brain = create_brain(config.for_namespace(namespace))
+        result = dispatch(brain, op, args)
+        brain.flush()  # a one-shot brain: don't leave a remember() in its write-behind buffer
+        return result
+    except (QuotaExceededError, ValueError) as e:
+        raise DaemonError(f"{type(e).__name__}: {e}") from e  # same error either way
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            req = json.loads(line)
+            op = req.get("op", "")
+            if op == "shutdown":
+                reply = {"ok": True, "result": "bye"}
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else:
+                with self.server.pool.lease(req.get("namespace") or "") as brain:  # concurrently, as in the API and MCP servers
+                    result = dispatch(brain, op, req.get("args") or {})
+                reply = {"ok": True, "result": result}
+        except Exception as e:
+            reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(reply, default=str).encode() + b"\n")
+
+
+class DaemonServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, pool) -> None:
+        self.pool = pool
+        super().__init__(str(socket_path), _Handler)
+
+
+def serve(config=None) -> None:
+    """Build a warm brain pool and serve it on the config's socket until shut down."""
+    from onememory.config import Config
+    from onememory.brain.pool import BrainPool
+
+    config = config or Config()
+    socket_path = config.daemon_socket
+    if socket_path.exists():
+        if running(socket_path):
+            raise DaemonRunning(f"A daemon is already running on {socket_path}")
+        socket_path.unlink()  # stale socket from a crashed daemon
+
+    pool = BrainPool(config)
+    metrics.REGISTRY.persist_to(config.metrics_dir / "daemon.json")
+    with pool.lease() as brain:
+        if brain.cortex.count():  # open chromadb and load the embedding model now, not on the first request
+            brain.cortex.search("warm up", 1)  # not brain.search(): that would log an access for re-scoring
+    umask = os.umask(0o177)  # the socket is owner-only from the moment bind() creates it
+    try:
+        server = DaemonServer(socket_path, pool)
+    finally:
+        os.umask(umask)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        pool.close()
+        if socket_path.exists():
+            socket_path.unlink()
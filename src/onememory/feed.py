@@ -0,0 +1,247 @@
+"""
+Feed — a cross-process change log of captures and memory writes.
+
+Dashboards and other AI clients used to learn about new conversations and
+memories by polling /api/recent and /api/memories, re-reading everything
+each time, and Hippocampus.on_capture only fires in the capturing process.
+Now every capture and every cortex write — by the proxy addon, the API, the
+MCP server or the CLI — appends one event per item to feed/, numbered by a
+sequence that only ever grows:
+
+    {"seq": 42, "ts": "<ISO time>", "kind": "memory", "op": "upsert", "id": "...", "data": {...}}
+
+    kind          op        data
+    conversation  capture   the conversation, as captured
+                  import    the conversation, restored by `onememory import`
+    memory        upsert    the memory, as stored
+                  update    the memory after a metadata change (re-scoring)
+    reset         reset     {"scope": "memories" | "conversations" | "all", ...}:
+                            state was deleted, a synced client starts over
+
+A client remembers the last seq it saw and asks for what came after it
+(read(since=seq)). Writers serialize on a flock, number their events after
+the last one on disk and append them with one write; readers take no lock
+and only look at complete lines. Events are checksummed lines
+(journal.encode) in segments named by their first seq; a new segment starts
+at SEGMENT_BYTES and only the newest SEGMENTS are kept, so a cursor can
+fall behind the retained history — read() then raises CursorExpiredError
+and the client re-downloads state once. Appends are not fsynced: the feed
+describes writes that are durable elsewhere.
+
+Stdlib only — the proxy addon imports this under mitmdump's Python.
+"""
+from __future__ import annotations
+import bisect
+import os
+import re
+import threading
+from collections import Counter, deque
+from datetime import datetime, timezone
+from pathlib import Path
+from onememory import journal, metrics
+
+SEGMENT_BYTES = 8 * 1024 * 1024
+SEGMENTS = 8              # segments kept: roughly the last 64 MB of changes
+READ_LIMIT = 1000         # events per read() unless asked otherwise
+MARK_BYTES = 256 * 1024   # remembered read positions per segment, at most one per this many bytes
+TAIL_MARKS = 16           # ... plus the last few ends seen, where followers resume
+LOCK_NAME = ".feed.lock"
+
+_SEGMENT = re.compile(r"^(\d{20})\.log$")
+
+_APPEND_SECONDS = metrics.histogram("feed_append_seconds", "Change feed append latency")
+_EVENTS = metrics.counter("feed_events_total", "Change feed events appended, by kind")
+_ERRORS = metrics.counter("feed_errors_total", "Change feed appends that failed (the change itself was kept)")
+
+
+class CursorExpiredError(Exception):
+    """A cursor from before the oldest retained event, or past the newest one (the feed was recreated).
+    Also raised for a cursor from before a reset, by readers that need an unbroken history."""
+
+    def __init__(self, since: int, oldest: int, latest: int, reason: str = "outside the change feed") -> None:
+        super().__init__(f"cursor {since} is {reason} (events {oldest}..{latest}): resync")
+        self.since = since
+        self.oldest = oldest
+        self.latest = latest
+
+
+class ChangeFeed:
+    """The sequence-numbered change log of one OneMemory directory."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._root = str(directory)  # os.path joins: this is on every write's path
+        self._file_lock = journal.FileLock(directory / LOCK_NAME)
+        self._cache = threading.Lock()
+        self._marks: dict[str, list[tuple[int, int]]] = {}  # segment → [(seq, offset after it)], ascending
+        self._tails: dict[str, deque] = {}                  # segment → the last TAIL_MARKS ends seen, ascending
+
+    def locked(self) -> journal.FileLock:
+        """Exclusive across threads and processes."""
+        return self._file_lock
+
+    def _segments(self) -> list[tuple[int, str]]:
+        """(first seq, file name) of every segment, oldest first."""
+        try:
+            with os.scandir(self.directory) as entries:
+                return sorted((int(m.group(1)), e.name) for e in entries if (m := _SEGMENT.match(e.name)))
+        except FileNotFoundError:
+            return []
+
+    # -- writes ---------------------------------------------------------------
+
+    def append(self, events: list[dict]) -> int:
+        """Number `events` (dicts with kind, op, id, data) and append them in one write.
+        Returns the seq of the last one."""
+        if not events:
+            return self.latest()
+        with _APPEND_SECONDS.time(), self.locked():
+            segments = self._segments()
+            last = self._last(segments)
+            ts = datetime.now(timezone.utc).isoformat()
+            data = b"".join(journal.encode({"seq": seq, "ts": ts, **e}) for seq, e in enumerate(events, last + 1))
+            name = segments[-1][1] if segments else f"{last + 1:020d}.log"
+            try:
+                full = os.stat(os.path.join(self._root, name)).st_size >= SEGMENT_BYTES
+            except FileNotFoundError:
+                full = False
+            if full:  # start the next segment, dropping the oldest beyond SEGMENTS
+                name = f"{last + 1:020d}.log"
+                for _, old in segments[:max(0, len(segments) - SEGMENTS + 1)]:
+                    try:
+                        os.unlink(os.path.join(self._root, old))
+                    except FileNotFoundError:
+                        pass
+            size = journal.append_lines(os.path.join(self._root, name), data, fsync=False)
+            last += len(events)
+            self._mark(name, last, size, end=True)
+        for kind, n in Counter(e["kind"] for e in events).items():
+            _EVENTS.inc(n, kind=kind)
+        return last
+
+    def publish(self, events: list[dict]) -> None:
+        """append() for writers whose change is already durable: a failure is counted, not raised."""
+        try:
+            self.append(events)
+        except OSError:
+            _ERRORS.inc()
+
+    # -- reads ----------------------------------------------------------------
+
+    def latest(self) -> int:
+        """The seq of the newest event, 0 for an empty feed."""
+        return self._last(self._segments())
+
+    def oldest(self) -> int:
+        """The seq of the oldest retained event (latest() + 1 for an empty feed)."""
+        segments = self._segments()
+        return segments[0][0] if segments else 1
+
+    def read(self, since: int = 0, limit: int = READ_LIMIT, kinds: tuple[str, ...] = ()) -> list[dict]:
+        """Events after seq `since`, oldest first, at most `limit`; only `kinds` if given.
+        Raises CursorExpiredError when events after `since` are no longer retained."""
+        for _ in range(3):  # a writer may drop the segment being read: look again
+            segments = self._segments()
+            latest = self._last(segments)
+            oldest = segments[0][0] if segments else 1
+            if since > latest or since < oldest - 1:
+                raise CursorExpiredError(since, oldest, latest)
+            if since == latest:
+                return []
+            try:
+                return self._read(segments, since, limit, kinds)
+            except FileNotFoundError:
+                continue
+        raise CursorExpiredError(since, self.oldest(), self.latest())
+
+    def _read(self, segments: list[tuple[int, str]], since: int, limit: int, kinds: tuple[str, ...]) -> list[dict]:
+        firsts = [first for first, _ in segments]
+        start = max(0, bisect.bisect_right(firsts, since + 1) - 1)
+        with self._cache:
+            live = {name for _, name in segments}
+            for name in [n for n in self._marks if n not in live]:
+                self._marks.pop(name, None)
+                self._tails.pop(name, None)
+        found: list[dict] = []
+        for first, name in segments[start:]:
+            seq, offset = self._seek(name, since) if first <= since else (first - 1, 0)
+            for event, offset in self._events(name, offset):
+                seq = event["seq"]
+                self._mark(name, seq, offset)
+                if seq > since and (not kinds or event["kind"] in kinds):
+                    found.append(event)
+                    if len(found) >= limit:
+                        return found
+            self._mark(name, seq, offset, end=True)
+        return found
+
+    def _seek(self, name: str, since: int) -> tuple[int, int]:
+        """The furthest remembered (seq, offset) in a segment at or before event `since`."""
+        with self._cache:
+            for mark in reversed(self._tails.get(name, ())):
+                if mark[0] <= since:
+                    return mark
+            marks = self._marks.get(name, [])
+            i = bisect.bisect_right(marks, (since, float("inf")))
+            return marks[i - 1] if i else (0, 0)
+
+    def _mark(self, name: str, seq: int, offset: int, end: bool = False) -> None:
+        with self._cache:
+            marks = self._marks.setdefault(name, [])
+            if not marks or offset // MARK_BYTES > marks[-1][1] // MARK_BYTES:
+                marks.append((seq, offset))
+            tail = self._tails.setdefault(name, deque(maxlen=TAIL_MARKS))
+            if end and (not tail or offset > tail[-1][1]):
+                tail.append((seq, offset))
+
+    def _last(self, segments: list[tuple[int, str]]) -> int:
+        """The last seq in the newest segment, reading only what was appended since the last look."""
+        if not segments:
+            return 0
+        first, name = segments[-1]
+        with self._cache:
+            tail = self._tails.get(name)
+            seq, offset = tail[-1] if tail else (first - 1, 0)
+        try:
+            if os.stat(os.path.join(self._root, name)).st_size > offset:
+                for event, offset in self._events(name, offset):
+                    seq = event["seq"]
+                self._mark(name, seq, offset, end=True)
+        except FileNotFoundError:
+            pass
+        return seq
+
+    def _events(self, name: str, offset: int):
+        """(event, offset after it) for every intact event in a segment from `offset` on,
+        stopping at a line still being written."""
+        with open(os.path.join(self._root, name), "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    return
+                offset += len(line)
+                events, _ = journal.scan(line)
+                if events:
+                    yield events[0], offset
+
+
+# ---------------------------------------------------------------------------
+# Writers
+# ---------------------------------------------------------------------------
+
+def change(kind: str, op: str, item_id: str, data: dict) -> dict:
+    """An event for append() / publish()."""
+    return {"kind": kind, "op": op, "id": item_id, "data": data}
+
+
+_FEEDS: dict[Path, ChangeFeed] = {}
+_FEEDS_LOCK = threading.Lock()
+
+
+def open_feed(directory: Path) -> ChangeFeed:
+    """The process-wide ChangeFeed for a directory, so every writer in a process shares its position."""
+    with _FEEDS_LOCK:
+        feed = _FEEDS.get(directory)
+        if feed is None:
+            feed = _FEEDS[directory] = ChangeFeed(directory)
+        return feed
@@ -1,129 +1,86 @@
 """
-mitmproxy addon — intercepts ChatGPT web conversations and saves to OneMemory.
+mitmproxy addon — intercepts AI chat conversations and saves to OneMemory.
 
-Listens for POST requests to chatgpt.com's conversation endpoint,
-parses the v1 delta-encoded SSE response, and saves both user message
-and assistant reply to ~/.onememory/hippocampus/.
+Each flow is routed once through the parser registry (parsers.py) — ChatGPT
+web, claude.ai, and the OpenAI / Anthropic APIs. Matched responses stream
+through to the client unchanged while their chunks are fed to the
+provider's incremental parser; the user message and assistant reply are
+saved to ~/.onememory/hippocampus/ and published to the change feed
+(~/.onememory/feed/) for clients following it.
 
 After saving, immediately extracts facts and stores them in cortex
 (auto-consolidation — no manual dream needed).
 """
 from __future__ import annotations
 import json
+import sys
+import time
 from pathlib import Path
 from datetime import datetime, timezone
-from mitmproxy import http
+from collections.abc import Sequence
+from mitmproxy import ctx, http, tls
 
-ONEMEMORY_DIR = Path.home() / ".onememory"
-HIPPOCAMPUS_DIR = ONEMEMORY_DIR / "hippocampus"
+# mitmdump may run under its own Python (e.g. a brew install) — make the
+# source tree importable so the stdlib-only onememory modules always load.
+_SRC = Path(__file__).resolve().parents[2]
+if str(_SRC) not in sys.path:
+    sys.path.append(str(_SRC))
 
+from onememory import feed, journal, metrics, profiling  # noqa: E402
+from onememory.interceptor import parsers  # noqa: E402
 
-# ---------------------------------------------------------------------------
-# Matching
-# ---------------------------------------------------------------------------
+ONEMEMORY_DIR = Path.home() / ".onememory"
+HIPPOCAMPUS_DIR = ONEMEMORY_DIR / "hippocampus"
+_JOURNAL = journal.Journal(HIPPOCAMPUS_DIR)
+_FEED = feed.open_feed(ONEMEMORY_DIR / "feed")
 
-def _is_chatgpt_conversation(flow: http.HTTPFlow) -> bool:
-    """Match POST to chatgpt.com/.../f/conversation (the chat endpoint)."""
-    if flow.request.method != "POST":
-        return False
-    if "chatgpt.com" not in flow.request.pretty_host:
-        return False
-    path = flow.request.path.split("?")[0].rstrip("/")
-    return path.endswith("/f/conversation")
+_FLOWS = metrics.counter("proxy_flows_total", "Flows seen by the proxy addon, by kind")
+_CAPTURES = metrics.counter("proxy_captures_total", "Conversations captured by the proxy addon")
+_QUEUE_DEPTH = metrics.gauge("queue_depth", "Items waiting in internal queues")
+_PARSE_SECONDS = metrics.histogram("proxy_parse_seconds", "Request + SSE response parsing latency")
+_SAVE_SECONDS = metrics.histogram("proxy_save_seconds", "Durable capture (WAL append) latency in the addon")
+_CONSOLIDATE_SECONDS = metrics.histogram("proxy_consolidate_seconds", "Auto-consolidation latency in the addon")
+_FACTS = metrics.counter("facts_extracted_total", "Facts extracted from conversations, by source")
 
 
 # ---------------------------------------------------------------------------
 # Extraction
 # ---------------------------------------------------------------------------
 
+_CHATGPT = parsers.PARSERS["chatgpt-web"]
+
+
 def _extract_user_message(request_body: dict) -> str:
     """Pull the user's message text from the ChatGPT request payload."""
-    for msg in reversed(request_body.get("messages", [])):
-        if not isinstance(msg, dict):
-            continue
-        author = msg.get("author", {})
-        role = author.get("role", "") if isinstance(author, dict) else str(author)
-        if role != "user":
-            continue
-        content = msg.get("content", "")
-        if isinstance(content, dict):
-            parts = content.get("parts", [])
-            return " ".join(p for p in parts if isinstance(p, str))
-        elif isinstance(content, str):
-            return content
-    return ""
+    return _CHATGPT.user_message(request_body)
 
 
 def _extract_assistant_response(raw: str) -> tuple[str, str]:
-    """
-    Parse ChatGPT's v1 delta-encoded SSE stream.
-
-    Text chunks arrive as patch arrays:
-        data: {"v": [{"p": "/message/content/parts/0", "o": "append", "v": "Hello"}, ...]}
-
-    Full messages (for model slug extraction):
-        data: {"v": {"message": {..., "metadata": {"model_slug": "gpt-4o"}}}}
-    """
-    appended_text: list[str] = []
-    model = ""
-
-    for line in raw.split("\n"):
-        line = line.strip()
-        if not line.startswith("data: "):
-            continue
-        data_str = line[6:].strip()
-        if data_str == "[DONE]":
-            break
-        try:
-            data = json.loads(data_str)
-        except (json.JSONDecodeError, ValueError):
-            continue
-        if not isinstance(data, dict):
-            continue
-
-        v = data.get("v")
-
-        # Patch array — collect text appends
-        if isinstance(v, list):
-            for patch in v:
-                if not isinstance(patch, dict):
-                    continue
-                if (
-                    patch.get("o") == "append"
-                    and isinstance(patch.get("v"), str)
-                    and "content/parts" in patch.get("p", "")
-                ):
-                    appended_text.append(patch["v"])
-
-        # Full message dict — extract model slug
-        elif isinstance(v, dict):
-            msg = v.get("message")
-            if isinstance(msg, dict):
-                meta = msg.get("metadata", {})
-                if isinstance(meta, dict):
-                    slug = meta.get("model_slug") or meta.get("resolved_model_slug", "")
-                    if slug:
-                        model = slug
-
-    return "".join(appended_text), model
+    """Parse ChatGPT's v1 delta-encoded SSE stream into (text, model slug)."""
+    return _CHATGPT.parse_response(raw)
 
 
 # ---------------------------------------------------------------------------
 # Storage
 # ---------------------------------------------------------------------------
 
-def _save_conversation(user_message: str, assistant_message: str, model: str) -> Path:
-    """Append a conversation to today's daily log file."""
+def _save_conversation(
+    user_message: str,
+    assistant_message: str,
+    model: str,
+    parser: parsers.ProviderParser = _CHATGPT,
+) -> tuple[Path, str]:
+    """Append a conversation to today's write-ahead log. Returns (file, conversation id)."""
     now = datetime.now(timezone.utc)
     conv_id = now.strftime("%H%M%S%f")[:12]
 
     conversation = {
         "id": conv_id,
-        "provider": "openai",
-        "model": model or "chatgpt",
+        "provider": parser.provider,
+        "model": model or parser.default_model,
         "messages": [],
         "timestamp": now.isoformat(),
-        "metadata": {"agent": "chatgpt", "source": "chatgpt-web", "provider": "openai"},
+        "metadata": parser.metadata(),
     }
     if user_message:
         conversation["messages"].append({"role": "user", "content": user_message})
@@ -131,28 +88,9 @@ def _save_conversation(user_message: str, assistant_message: str, model: str) ->
         conversation["messages"].append({"role": "assistant", "content": assistant_message})
 
     today = now.strftime("%Y-%m-%d")
-    filepath = HIPPOCAMPUS_DIR / f"{today}.json"
-
-    # Load existing daily log or create new one
-    if filepath.exists():
-        try:
-            daily_log = json.loads(filepath.read_text())
-        except Exception:
-            daily_log = None
-    else:
-        daily_log = None
-
-    if not daily_log:
-        daily_log = {
-            "date": today,
-            "metadata": {"agent": "chatgpt", "source": "chatgpt-web", "provider": "openai"},
-            "conversations": [],
-        }
-
-    daily_log["conversations"].append(conversation)
-    filepath.write_text(json.dumps(daily_log, indent=2))
-
-    return filepath
+    _JOURNAL.append(today, conversation)  # durable on return; checkpointed into <today>.json in batches
+    _FEED.publish([feed.change("conversation", "capture", conv_id, conversation)])
+    return _JOURNAL.wal_path(today), conv_id
 
 
 # ---------------------------------------------------------------------------
@@ -163,98 +101,190 @@ class OneMemoryAddon:
 
     def __init__(self):
         HIPPOCAMPUS_DIR.mkdir(parents=True, exist_ok=True)
+        report = _JOURNAL.recover()
+        if report["files_repaired"] or report["wal_bad_records"]:
+            print(
+                f"[OneMemory] Recovered hippocampus: {report['files_repaired']} damaged log(s) repaired "
+                f"({report['salvaged']} conversations salvaged), {report['wal_bad_records']} torn WAL record(s) dropped"
+            )
         (ONEMEMORY_DIR / "cortex" / "knowledge").mkdir(parents=True, exist_ok=True)
         (ONEMEMORY_DIR / "amygdala").mkdir(parents=True, exist_ok=True)
+        metrics.REGISTRY.persist_to(ONEMEMORY_DIR / "metrics" / "proxy.json")
+        if profiling.requested():
+            profiling.install("proxy", ONEMEMORY_DIR / "profiles")
+            print("[OneMemory] Profiling enabled (SIGUSR1: sample, SIGUSR2: slowest calls)")
 
         # Init brain for auto-consolidation
         try:
             from onememory.config import Config
             from onememory.brain.cortex import Cortex
-            from onememory.consolidation.dreamer import Dreamer, _content_id
+            from onememory.consolidation.extraction import facts_from_message
             config = Config()
             config.ensure_dirs()
             self._cortex = Cortex(config)
-            self._content_id = _content_id
+            self._facts_from_message = facts_from_message
             print("[OneMemory] Auto-consolidation enabled")
         except Exception as e:
             self._cortex = None
             print(f"[OneMemory] Auto-consolidation disabled: {e}")
 
-        print("[OneMemory] Listening for ChatGPT conversations...")
+        # Incremental response parsers for flows currently streaming, by flow id
+        self._streams: dict[str, parsers.ResponseStream] = {}
+        # Extra hosts to decrypt / hosts never to touch — set through mitmproxy options (load())
+        self._allow: frozenset[str] = frozenset()
+        self._ignore: frozenset[str] = frozenset()
+
+        agents = sorted({p.agent for p in parsers.PARSERS.values()})
+        print(f"[OneMemory] Listening for {', '.join(agents)} conversations...")
 
-    def _auto_consolidate(self, user_message: str, model: str):
-        """Extract facts from user message and store directly in cortex."""
+    def _auto_consolidate(self, user_message: str, model: str, conversation_id: str = "", provider: str = "openai"):
+        """Extract sentence-level facts from the user message and store them directly in cortex."""
         if not self._cortex or not user_message:
             return
-        text = user_message.strip()
-        if len(text) < 10:
-            return
 
         try:
-            from onememory.models import MemoryEntry
-            from onememory.consolidation.dreamer import IDENTITY_SIGNALS, PREFERENCE_SIGNALS
-
-            lower = text.lower()
-            category = "knowledge"
-            if any(sig in lower for sig in IDENTITY_SIGNALS):
-                category = "identity"
-            elif any(sig in lower for sig in PREFERENCE_SIGNALS):
-                category = "preference"
-
-            entry = MemoryEntry(
-                id=self._content_id(text),
-                content=text,
-                category=category,
-                source=f"openai:{model or 'chatgpt'}",
-                tags=["openai"],
-            )
-            self._cortex.store_memory(entry)
-            print(f"[OneMemory] Auto-stored: [{category}] {text[:50]}...")
+            found = self._facts_from_message(user_message, conversation_id, provider, model)
+            facts = list({fact.id: fact for fact in found}.values())  # a repeated sentence is one fact
+            if not facts:
+                return
+            with _CONSOLIDATE_SECONDS.time():  # one embed and upsert for the whole message
+                self._cortex.store_many(facts)
+            _FACTS.inc(len(facts), source="proxy")
+            for fact in facts:
+                print(f"[OneMemory] Auto-stored: [{fact.category}] {fact.content[:50]}...")
         except Exception as e:
             print(f"[OneMemory] Auto-consolidation error: {e}")
 
+    # -- classification: decided once, as early as possible ------------------
+
+    def load(self, loader) -> None:
+        loader.add_option(
+            "onememory_allow_hosts", Sequence[str], [],
+            "Extra hosts to decrypt besides the ones a provider parser claims.",
+        )
+        loader.add_option(
+            "onememory_ignore_hosts", Sequence[str], [],
+            "Hosts never decrypted or captured, even if a provider parser claims them.",
+        )
+
+    def configure(self, updated: set[str]) -> None:
+        if "onememory_allow_hosts" in updated:
+            self._allow = frozenset(h.lower() for h in ctx.options.onememory_allow_hosts)
+        if "onememory_ignore_hosts" in updated:
+            self._ignore = frozenset(h.lower() for h in ctx.options.onememory_ignore_hosts)
+
+    def done(self) -> None:
+        """Clean shutdown: fold today's WAL into the daily log."""
+        _JOURNAL.close()
+
+    def _is_target(self, host: str) -> bool:
+        return host not in self._ignore and (parsers.claims(host) or host in self._allow)
+
+    def tls_clienthello(self, data: tls.ClientHelloData) -> None:
+        """Pass non-target TLS straight through — no MITM decryption, no per-flow hooks."""
+        sni = data.client_hello.sni
+        if not sni or not self._is_target(sni.lower()):
+            data.ignore_connection = True
+            _FLOWS.inc(kind="passthrough")
+
+    def _classify(self, flow: http.HTTPFlow) -> str:
+        """Cache the flow's parser name ("" for none) in flow.metadata."""
+        host = flow.request.pretty_host
+        parser = None
+        if self._is_target(host):
+            parser = parsers.route(host, flow.request.method, flow.request.path)
+        name = parser.name if parser else ""
+        flow.metadata["onememory_parser"] = name
+        return name
+
+    def _parser(self, flow: http.HTTPFlow) -> parsers.ProviderParser | None:
+        name = flow.metadata.get("onememory_parser")
+        if name is None:
+            name = self._classify(flow)
+        return parsers.PARSERS[name] if name else None
+
+    # -- hooks ---------------------------------------------------------------
+
     def requestheaders(self, flow: http.HTTPFlow) -> None:
-        """Suppress non-ChatGPT traffic from mitmproxy logs."""
-        if "chatgpt.com" not in flow.request.pretty_host:
+        """First hook for a request: classify it, and keep unrelated plain-HTTP traffic out of the logs."""
+        if self._classify(flow):
+            _FLOWS.inc(kind="target")
+        else:
             flow.request.is_replay = True
-
-    def request(self, flow: http.HTTPFlow) -> None:
-        if "chatgpt.com" not in flow.request.pretty_host:
-            return
-        path = flow.request.path.split("?")[0].rstrip("/")
-        print(f"[OneMemory] → {flow.request.method} {path}")
+            _FLOWS.inc(kind="other")
 
     def responseheaders(self, flow: http.HTTPFlow) -> None:
-        """Buffer full SSE response instead of streaming through."""
-        if _is_chatgpt_conversation(flow):
+        """Stream matched responses through to the client, parsing chunks as they pass."""
+        parser = self._parser(flow)
+        if parser is None:
+            return
+        flow.metadata["onememory_inflight"] = True
+        _QUEUE_DEPTH.inc(queue="proxy_inflight")
+        if flow.response.headers.get("content-encoding", "identity").lower() not in ("", "identity"):
+            # Compressed chunks can't be parsed as they pass — buffer and decode in response()
             flow.response.stream = False
+            return
+        stream = parser.stream()
+        self._streams[flow.id] = stream
 
-    def response(self, flow: http.HTTPFlow) -> None:
-        if "chatgpt.com" in flow.request.pretty_host:
-            path = flow.request.path.split("?")[0].rstrip("/")
-            status = flow.response.status_code
-            print(f"[OneMemory] ← {status} {flow.request.method} {path}")
+        def tee(chunk: bytes) -> bytes:
+            if chunk:
+                try:
+                    stream.feed(chunk)
+                except Exception as e:
+                    print(f"[OneMemory] Parse error: {e}")
+            return chunk
+
+        flow.response.stream = tee
 
-        if not _is_chatgpt_conversation(flow):
+    def error(self, flow: http.HTTPFlow) -> None:
+        if flow.metadata.pop("onememory_inflight", False):
+            self._streams.pop(flow.id, None)
+            _QUEUE_DEPTH.dec(queue="proxy_inflight")
+
+    def response(self, flow: http.HTTPFlow) -> None:
+        parser = self._parser(flow)
+        if parser is None:
+            return
+        if flow.metadata.pop("onememory_inflight", False):
+            _QUEUE_DEPTH.dec(queue="proxy_inflight")
+        if flow.response.status_code >= 400:
+            self._streams.pop(flow.id, None)
+            print(f"[OneMemory] {parser.name}: HTTP {flow.response.status_code}, not captured")
             return
 
-        try:
-            req_body = json.loads(flow.request.get_text() or "{}")
-            resp_text = flow.response.get_text() or ""
+        with profiling.span("capture", parser=parser.name):
+            self._capture(flow, parser)
 
-            user_message = _extract_user_message(req_body)
-            assistant_message, model = _extract_assistant_response(resp_text)
+    def _capture(self, flow: http.HTTPFlow, parser: parsers.ProviderParser) -> None:
+        stream = self._streams.pop(flow.id, None)
+        try:
+            start = time.perf_counter()
+            with profiling.span("parse"):
+                req_body = json.loads(flow.request.get_text() or "{}")
+                if not isinstance(req_body, dict):
+                    req_body = {}
+                user_message = parser.user_message(req_body)
+                if stream is not None:
+                    assistant_message, model = stream.finish()
+                else:
+                    assistant_message, model = parser.parse_response(flow.response.get_text() or "")
+                model = model or parser.request_model(req_body)
+            _PARSE_SECONDS.observe(time.perf_counter() - start)
 
             if not user_message and not assistant_message:
                 return
 
-            filepath = _save_conversation(user_message, assistant_message, model)
-            print(f"[OneMemory] Captured ({model}): {user_message[:60]}")
+            with _SAVE_SECONDS.time(), profiling.span("save"):
+                filepath, conv_id = _save_conversation(user_message, assistant_message, model, parser)
+            _CAPTURES.inc()
+            print(f"[OneMemory] Captured {parser.name} ({model}): {user_message[:60]}")
             print(f"[OneMemory] Reply: {assistant_message[:60]}")
             print(f"[OneMemory] Saved: {filepath}")
 
             # Auto-consolidate: extract facts → store in cortex immediately
-            self._auto_consolidate(user_message, model)
+            with profiling.span("consolidate"):
+                self._auto_consolidate(user_message, model or parser.default_model, conv_id, parser.provider)
         except Exception as e:
             print(f"[OneMemory] Error: {e}")
 
@@ -0,0 +1,439 @@
+"""
+Parsers — one per AI tool wire format, dispatched by a precompiled routing table.
+
+A ProviderParser knows a single endpoint's format:
+
+    user_message(body)   request JSON → the user's latest message
+    request_model(body)  request JSON → the model asked for (fallback)
+    stream()             a ResponseStream to feed() response bytes as they
+                         arrive; finish() → (assistant text, model)
+
+Both server-sent event streams and plain JSON bodies go through the same
+ResponseStream, which sniffs the first byte, so one parser covers an
+endpoint called with and without ``"stream": true``.
+
+    ChatGPTWeb          chatgpt.com  …/f/conversation        v1 delta-encoded SSE
+    ClaudeWeb           claude.ai    …/chat_conversations/…/completion
+    OpenAIChat          api.openai.com     /v1/chat/completions
+    OpenAIResponses     api.openai.com     /v1/responses
+    AnthropicMessages   api.anthropic.com  /v1/messages
+
+ROUTES maps exact hosts to (method, compiled path regex, parser) and is
+built once at import; route() costs unrelated traffic a single dict miss.
+Stdlib only — mitmdump may load this under its own Python.
+"""
+from __future__ import annotations
+import codecs
+import json
+import re
+
+OPENAI = "openai"        # onememory.models.Provider values; models itself needs pydantic
+ANTHROPIC = "anthropic"
+
+
+class ResponseStream:
+    """Incremental response reader: SSE events or a single JSON body.
+
+    Subclasses override on_event() and on_json() and append to self.parts.
+    """
+
+    def __init__(self) -> None:
+        self.parts: list[str] = []
+        self.model = ""
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._mode = ""  # "", "sse" or "json"
+        self._tail = ""
+        self._body: list[str] = []
+        self._event = ""
+        self._done = False
+
+    def feed(self, chunk: bytes | str) -> None:
+        text = self._decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        if not self._mode:
+            text = text.lstrip()
+            if not text:
+                return
+            self._mode = "json" if text[0] in "{[" else "sse"
+        if self._mode == "json":
+            self._body.append(text)
+            return
+        if self._done:
+            return
+        lines = (self._tail + text).split("\n")
+        self._tail = lines.pop()
+        for line in lines:
+            self._line(line)
+            if self._done:
+                return
+
+    def finish(self) -> tuple[str, str]:
+        rest = self._decoder.decode(b"", final=True)
+        if rest:
+            self.feed(rest)
+        if self._mode == "json":
+            try:
+                body = json.loads("".join(self._body))
+            except (json.JSONDecodeError, ValueError):
+                body = None
+            if isinstance(body, dict):
+                self.on_json(body)
+            self._body = []
+        elif self._tail and not self._done:
+            self._line(self._tail)
+        self._tail = ""
+        return "".join(self.parts), self.model
+
+    def _line(self, line: str) -> None:
+        line = line.strip()
+        if not line:
+            self._event = ""
+        elif line.startswith("data:"):
+            data = line[5:].strip()
+            if data == "[DONE]":
+                self._done = True
+                return
+            try:
+                event = json.loads(data)
+            except (json.JSONDecodeError, ValueError):
+                return
+            if isinstance(event, dict):
+                self.on_event(self._event, event)
+        elif line.startswith("event:"):
+            self._event = line[6:].strip()
+
+    def on_event(self, event: str, data: dict) -> None:
+        pass
+
+    def on_json(self, body: dict) -> None:
+        pass
+
+
+class ProviderParser:
+    """Base class — subclasses set the routing attributes and implement the two parsers."""
+
+    name = ""          # also the conversation's metadata "source"
+    agent = ""
+    provider = ""
+    hosts: tuple[str, ...] = ()
+    method = "POST"
+    path = ""          # regex, searched against the path without query string or trailing slash
+    default_model = ""
+
+    def user_message(self, body: dict) -> str:
+        raise NotImplementedError
+
+    def request_model(self, body: dict) -> str:
+        model = body.get("model")
+        return model if isinstance(model, str) else ""
+
+    def stream(self) -> ResponseStream:
+        raise NotImplementedError
+
+    def parse_response(self, raw: bytes | str) -> tuple[str, str]:
+        """Parse a fully buffered response body."""
+        stream = self.stream()
+        stream.feed(raw)
+        return stream.finish()
+
+    def metadata(self) -> dict:
+        return {"agent": self.agent, "source": self.name, "provider": self.provider}
+
+
+def _text_blocks(content, types: tuple[str, ...] = ("text",)) -> str:
+    """A message content that is either a string or a list of typed blocks."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(
+            block["text"] for block in content
+            if isinstance(block, dict) and block.get("type") in types and isinstance(block.get("text"), str)
+        )
+    return ""
+
+
+def _last_user(messages, types: tuple[str, ...] = ("text",)) -> str:
+    if not isinstance(messages, list):
+        return ""
+    for msg in reversed(messages):
+        if isinstance(msg, dict) and msg.get("role") == "user":
+            return _text_blocks(msg.get("content"), types)
+    return ""
+
+
+# ---------------------------------------------------------------------------
+# ChatGPT web
+# ---------------------------------------------------------------------------
+
+class _ChatGPTStream(ResponseStream):
+    """
+    chatgpt.com's v1 delta encoding. Text arrives as JSON-patch style appends:
+
+        data: {"v": [{"p": "/message/content/parts/0", "o": "append", "v": "Hello"}, ...]}
+        data: {"p": "/message/content/parts/0", "o": "append", "v": "Hel"}
+        data: {"v": "lo"}                  ← same path and op as the previous patch
+
+    Full messages carry the model slug:
+        data: {"v": {"message": {..., "metadata": {"model_slug": "gpt-4o"}}}}
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._path = ""
+        self._op = ""
+
+    def on_event(self, event: str, data: dict) -> None:
+        v = data.get("v")
+        if "p" in data or "o" in data:
+            self._path = data.get("p", "")
+            self._op = data.get("o", "")
+        if isinstance(v, list):
+            self._patches(v)
+        elif isinstance(v, str):
+            self._apply(self._path, self._op, v)
+        elif isinstance(v, dict):
+            msg = v.get("message")
+            if isinstance(msg, dict):
+                meta = msg.get("metadata", {})
+                if isinstance(meta, dict):
+                    slug = meta.get("model_slug") or meta.get("resolved_model_slug", "")
+                    if slug:
+                        self.model = slug
+
+    def _patches(self, patches: list) -> None:
+        for patch in patches:
+            if not isinstance(patch, dict):
+                continue
+            path, op, value = patch.get("p", ""), patch.get("o", ""), patch.get("v")
+            if op == "patch" and isinstance(value, list):
+                self._patches(value)
+            else:
+                self._path, self._op = path, op
+                self._apply(path, op, value)
+
+    def _apply(self, path, op, value) -> None:
+        if op == "append" and isinstance(value, str) and isinstance(path, str) and "content/parts" in path:
+            self.parts.append(value)
+
+
+class ChatGPTWeb(ProviderParser):
+    name = "chatgpt-web"
+    agent = "chatgpt"
+    provider = OPENAI
+    hosts = ("chatgpt.com", "chat.openai.com")
+    path = r"/f/conversation$|^/backend-(?:api|anon)/conversation$"
+    default_model = "chatgpt"
+
+    def user_message(self, body: dict) -> str:
+        for msg in reversed(body.get("messages", [])):
+            if not isinstance(msg, dict):
+                continue
+            author = msg.get("author", {})
+            role = author.get("role", "") if isinstance(author, dict) else str(author)
+            if role != "user":
+                continue
+            content = msg.get("content", "")
+            if isinstance(content, dict):
+                parts = content.get("parts", [])
+                return " ".join(p for p in parts if isinstance(p, str))
+            elif isinstance(content, str):
+                return content
+        return ""
+
+    def request_model(self, body: dict) -> str:
+        model = super().request_model(body)
+        return "" if model == "auto" else model
+
+    def stream(self) -> ResponseStream:
+        return _ChatGPTStream()
+
+
+# ---------------------------------------------------------------------------
+# Anthropic Messages API and claude.ai
+# ---------------------------------------------------------------------------
+
+class _AnthropicStream(ResponseStream):
+    """Messages API: message_start → content_block_delta (text_delta)…, or one JSON message."""
+
+    def on_event(self, event: str, data: dict) -> None:
+        kind = data.get("type", event)
+        if kind == "content_block_delta":
+            delta = data.get("delta")
+            if isinstance(delta, dict) and delta.get("type") == "text_delta" and isinstance(delta.get("text"), str):
+                self.parts.append(delta["text"])
+        elif kind == "message_start":
+            message = data.get("message")
+            if isinstance(message, dict) and isinstance(message.get("model"), str):
+                self.model = message["model"]
+
+    def on_json(self, body: dict) -> None:
+        if isinstance(body.get("model"), str):
+            self.model = body["model"]
+        text = _text_blocks(body.get("content"))
+        if text:
+            self.parts.append(text)
+
+
+class AnthropicMessages(ProviderParser):
+    name = "anthropic-api"
+    agent = "anthropic-api"
+    provider = ANTHROPIC
+    hosts = ("api.anthropic.com",)
+    path = r"^/v1/messages$"
+    default_model = "claude"
+
+    def user_message(self, body: dict) -> str:
+        return _last_user(body.get("messages"))
+
+    def stream(self) -> ResponseStream:
+        return _AnthropicStream()
+
+
+class _ClaudeWebStream(_AnthropicStream):
+    """claude.ai streams Messages API events; older builds send {"type": "completion"} events."""
+
+    def on_event(self, event: str, data: dict) -> None:
+        if data.get("type", event) == "completion":
+            if isinstance(data.get("completion"), str):
+                self.parts.append(data["completion"])
+            if isinstance(data.get("model"), str) and data["model"]:
+                self.model = data["model"]
+        else:
+            super().on_event(event, data)
+
+
+class ClaudeWeb(ProviderParser):
+    name = "claude-web"
+    agent = "claude"
+    provider = ANTHROPIC
+    hosts = ("claude.ai",)
+    path = r"^/api/organizations/[^/]+/chat_conversations/[^/]+/(?:retry_)?completion$"
+    default_model = "claude"
+
+    def user_message(self, body: dict) -> str:
+        prompt = body.get("prompt", "")
+        return prompt if isinstance(prompt, str) else ""
+
+    def stream(self) -> ResponseStream:
+        return _ClaudeWebStream()
+
+
+# ---------------------------------------------------------------------------
+# OpenAI API
+# ---------------------------------------------------------------------------
+
+class _OpenAIChatStream(ResponseStream):
+    """Chat Completions: chunks with choices[0].delta.content, or one JSON completion."""
+
+    def on_event(self, event: str, data: dict) -> None:
+        if not self.model and isinstance(data.get("model"), str):
+            self.model = data["model"]
+        choices = data.get("choices")
+        if isinstance(choices, list) and choices and isinstance(choices[0], dict):
+            delta = choices[0].get("delta")
+            if isinstance(delta, dict) and isinstance(delta.get("content"), str):
+                self.parts.append(delta["content"])
+
+    def on_json(self, body: dict) -> None:
+        if isinstance(body.get("model"), str):
+            self.model = body["model"]
+        choices = body.get("choices")
+        if isinstance(choices, list) and choices and isinstance(choices[0], dict):
+            message = choices[0].get("message")
+            if isinstance(message, dict):
+                text = _text_blocks(message.get("content"))
+                if text:
+                    self.parts.append(text)
+
+
+class OpenAIChat(ProviderParser):
+    name = "openai-api"
+    agent = "openai-api"
+    provider = OPENAI
+    hosts = ("api.openai.com",)
+    path = r"^/v1/chat/completions$"
+    default_model = "openai"
+
+    def user_message(self, body: dict) -> str:
+        return _last_user(body.get("messages"))
+
+    def stream(self) -> ResponseStream:
+        return _OpenAIChatStream()
+
+
+class _OpenAIResponsesStream(ResponseStream):
+    """Responses API: response.output_text.delta events, or one JSON response object."""
+
+    def on_event(self, event: str, data: dict) -> None:
+        kind = data.get("type", event)
+        if kind == "response.output_text.delta":
+            if isinstance(data.get("delta"), str):
+                self.parts.append(data["delta"])
+        elif kind in ("response.created", "response.completed"):
+            response = data.get("response")
+            if isinstance(response, dict) and isinstance(response.get("model"), str):
+                self.model = response["model"]
+
+    def on_json(self, body: dict) -> None:
+        if isinstance(body.get("model"), str):
+            self.model = body["model"]
+        for item in body.get("output") or []:
+            if isinstance(item, dict) and item.get("type") == "message":
+                text = _text_blocks(item.get("content"), ("output_text",))
+                if text:
+                    self.parts.append(text)
+
+
+class OpenAIResponses(ProviderParser):
+    name = "openai-responses"
+    agent = "openai-api"
+    provider = OPENAI
+    hosts = ("api.openai.com",)
+    path = r"^/v1/responses$"
+    default_model = "openai"
+
+    def user_message(self, body: dict) -> str:
+        items = body.get("input")
+        if isinstance(items, str):
+            return items
+        return _last_user(items, ("input_text", "text"))
+
+    def stream(self) -> ResponseStream:
+        return _OpenAIResponsesStream()
+
+
+# ---------------------------------------------------------------------------
+# Routing
+# ---------------------------------------------------------------------------
+
+ROUTES: dict[str, list[tuple[str, re.Pattern, ProviderParser]]] = {}
+PARSERS: dict[str, ProviderParser] = {}
+
+
+def register(parser: ProviderParser) -> ProviderParser:
+    """Add a parser to the routing table (third-party parsers can call this too)."""
+    pattern = re.compile(parser.path)
+    PARSERS[parser.name] = parser
+    for host in parser.hosts:
+        ROUTES.setdefault(host, []).append((parser.method, pattern, parser))
+    return parser
+
+
+def claims(host: str) -> bool:
+    """True if any parser is interested in this host."""
+    return host in ROUTES
+
+
+def route(host: str, method: str, path: str) -> ProviderParser | None:
+    """The parser for a request, or None — one dict lookup for unrelated hosts."""
+    routes = ROUTES.get(host)
+    if routes is None:
+        return None
+    path = path.partition("?")[0].rstrip("/")
+    for route_method, pattern, parser in routes:
+        if route_method == method and pattern.search(path):
+            return parser
+    return None
+
+
+for _parser in (ChatGPTWeb(), ClaudeWeb(), OpenAIChat(), OpenAIResponses(), AnthropicMessages()):
+    register(_parser)
@@ -3,48 +3,299 @@ OneMemory API Server — REST endpoints for querying and managing memories.
 
 This server is optional. The core flow (mitmproxy addon → files → MCP server)
 works without it. This provides REST APIs for dashboards or scripts.
+
+Every /api route is namespaced: pass ?namespace=<name> or the
+X-OneMemory-Namespace header; neither means the default namespace.
+
+Clients keep in sync through the change feed (onememory.feed) instead of
+re-downloading state: GET /api/memories and /api/recent answer with an
+X-OneMemory-Seq header, and given ?since=<that seq> return only what was
+written after it. /api/changes pages through the raw events;
+/api/changes/stream (server-sent events) and /api/changes/ws (WebSocket)
+push them as they happen, whichever process made the change. A cursor the
+feed no longer covers gets 410 Gone (or a "reset" event on a stream): fetch
+everything once, then continue from the new seq.
+
+Routes that touch a brain (chromadb, the embedding model, SQLite) are plain
+`def`s, run in FastAPI's threadpool: on the event loop a search would stall
+every open stream.
 """
 from __future__ import annotations
-from fastapi import FastAPI
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from contextlib import ExitStack, asynccontextmanager
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from onememory.brain import create_brain
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from onememory import metrics, profiling
+from onememory.brain import PrefrontalCortex, QuotaExceededError
+from onememory.brain.pool import BrainPool
+from onememory.feed import READ_LIMIT, CursorExpiredError
+
+SEQ_HEADER = "X-OneMemory-Seq"
+FEED_POLL_SECONDS = 0.25  # how often a stream looks for new changes
+KEEPALIVE_SECONDS = 15.0  # idle time before a stream sends a heartbeat
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    yield
+    pool.close()  # flushes buffered remember() calls
 
-app = FastAPI(title="OneMemory API")
-brain = create_brain()
+
+app = FastAPI(title="OneMemory API", lifespan=_lifespan)
+pool = BrainPool()
+metrics.REGISTRY.persist_to(pool.config.metrics_dir / "api.json")
+if profiling.requested():
+    profiling.install("api", pool.config.profiles_dir)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[SEQ_HEADER],
 )
 
 
+def namespace_name(namespace: str = "", x_onememory_namespace: str = Header("")) -> str:
+    """The request's namespace, checked: an invalid name is a 400, not a brain."""
+    name = namespace or x_onememory_namespace
+    try:
+        pool.config.for_namespace(name)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return name
+
+
+def namespaced_brain(namespace: str = Depends(namespace_name)) -> Iterator[PrefrontalCortex]:
+    """The request's brain, leased from the pool for the request. Streaming routes take their
+    lease inside the stream instead, so it lasts exactly as long as the stream does."""
+    with pool.lease(namespace) as brain:
+        yield brain
+
+
+class NewMemory(BaseModel):
+    content: str
+    category: str = "general"
+    tags: list[str] = []
+
+
 @app.get("/health")
-async def health():
+def health(brain: PrefrontalCortex = Depends(namespaced_brain)):
     return {"status": "ok", "service": "onememory", **brain.status()}
 
 
+@app.get("/api/namespaces")
+async def list_namespaces():
+    return {"namespaces": pool.namespaces(), "open": pool.open_namespaces()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus text exposition of this process's counters and latency histograms."""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/debug/profile")
+async def debug_profile(seconds: float = profiling.PROFILE_SECONDS):
+    """Sample this process for `seconds` and write a collapsed-stack profile."""
+    if not profiling.enabled():
+        raise HTTPException(404, "profiling is off — start with ONEMEMORY_PROFILE=1")
+    path = await asyncio.to_thread(profiling.sample, seconds)
+    if path is None:
+        raise HTTPException(409, "a profile is already running")
+    return {"profile": str(path)}
+
+
+@app.get("/debug/slow")
+async def debug_slow(n: int = profiling.SLOWEST):
+    """Slowest recent traced calls with their stage breakdown (also written to disk)."""
+    if not profiling.enabled():
+        raise HTTPException(404, "profiling is off — start with ONEMEMORY_PROFILE=1")
+    return {"calls": profiling.slowest(n), "dumped_to": str(profiling.dump_slowest(n))}
+
+
 @app.get("/api/memories")
-async def list_memories(category: str = ""):
-    memories = brain.get_all_memories()
-    if category:
-        memories = [m for m in memories if m.category == category]
-    return [m.model_dump() for m in memories]
+def list_memories(
+    response: Response,
+    category: str = "",
+    since: int | None = None,
+    brain: PrefrontalCortex = Depends(namespaced_brain),
+):
+    """Every memory, or one category's; with `since`, only those written after that change feed seq."""
+    if since is None:
+        response.headers[SEQ_HEADER] = str(brain.sequence())  # before reading: a write in between shows up twice, not never
+        return [m.to_entry().model_dump() for m in brain.get_memories(category)]
+    try:
+        memories, cursor = brain.memories_since(since, category)
+    except CursorExpiredError as e:
+        raise HTTPException(410, str(e))
+    response.headers[SEQ_HEADER] = str(cursor)
+    return [m.to_entry().model_dump() for m in memories]
+
+
+@app.post("/api/memories", status_code=201)
+def create_memory(memory: NewMemory, brain: PrefrontalCortex = Depends(namespaced_brain)):
+    try:
+        memory_id = brain.remember(memory.content, memory.category, memory.tags)
+    except QuotaExceededError as e:
+        raise HTTPException(403, str(e))
+    return {"id": memory_id}
 
 
 @app.get("/api/search")
-async def search_memories(q: str, limit: int = 10):
+def search_memories(q: str, limit: int = 10, brain: PrefrontalCortex = Depends(namespaced_brain)):
     results = brain.search(q, limit)
     return [{"content": r.entry.content, "category": r.entry.category, "score": r.score} for r in results]
 
 
 @app.get("/api/context")
-async def get_context():
+def get_context(brain: PrefrontalCortex = Depends(namespaced_brain)):
     return brain.get_context()
 
 
+@app.get("/api/conversations")
+def list_conversations(
+    q: str = "",
+    start: str = "",
+    end: str = "",
+    provider: str = "",
+    model: str = "",
+    limit: int = 50,
+    offset: int = 0,
+    brain: PrefrontalCortex = Depends(namespaced_brain),
+):
+    """Conversation history: full-text `q`, ISO `start`/`end`, `provider`, `model` prefix, paginated."""
+    try:
+        return brain.history(text=q, start=start, end=end, provider=provider, model=model, limit=limit, offset=offset)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+
 @app.get("/api/recent")
-async def recent_conversations(limit: int = 20):
-    convos = brain.get_recent_conversations(limit)
+def recent_conversations(
+    response: Response,
+    limit: int = 20,
+    since: int | None = None,
+    brain: PrefrontalCortex = Depends(namespaced_brain),
+):
+    """Latest conversations; with `since`, only those captured after that change feed seq."""
+    if since is None:
+        response.headers[SEQ_HEADER] = str(brain.sequence())
+        convos = brain.get_recent_conversations(limit)
+    else:
+        try:
+            convos, cursor = brain.conversations_since(since, limit)
+        except CursorExpiredError as e:
+            raise HTTPException(410, str(e))
+        response.headers[SEQ_HEADER] = str(cursor)
     return [c.model_dump() for c in convos]
+
+
+# ---------------------------------------------------------------------------
+# Change feed
+# ---------------------------------------------------------------------------
+
+def _kinds(kind: str) -> tuple[str, ...]:
+    """?kind=memory,conversation → the kinds to send; resets always go out."""
+    kinds = tuple(k for k in kind.split(",") if k)
+    return (*kinds, "reset") if kinds else ()
+
+
+@app.get("/api/changes")
+async def list_changes(
+    since: int = 0,
+    limit: int = READ_LIMIT,
+    kind: str = "",
+    brain: PrefrontalCortex = Depends(namespaced_brain),
+):
+    """Change feed events after seq `since`, oldest first; pass `next` as `since` for the ones after."""
+    try:
+        events, cursor = await asyncio.to_thread(brain.changes, since, max(1, limit), _kinds(kind))
+    except CursorExpiredError as e:
+        raise HTTPException(410, str(e))
+    return {"events": events, "next": cursor}
+
+
+async def _follow(
+    brain: PrefrontalCortex, since: int | None, kinds: tuple[str, ...], gone: Callable[[], Awaitable[bool]],
+) -> AsyncIterator[list[dict]]:
+    """Batches of events after `since` (from now if None) as they are written, until `gone()`.
+    An empty batch is a heartbeat; an expired cursor becomes a "reset" event and the stream
+    continues from the newest change."""
+    cursor = brain.sequence() if since is None else since
+    quiet_since = time.monotonic()
+    while not await gone():
+        if brain.cortex.feed.latest() <= cursor:  # a directory scan and a stat: no thread needed
+            if time.monotonic() - quiet_since >= KEEPALIVE_SECONDS:
+                quiet_since = time.monotonic()
+                yield []
+            await asyncio.sleep(FEED_POLL_SECONDS)
+            continue
+        try:
+            events, cursor = await asyncio.to_thread(brain.changes, cursor, READ_LIMIT, kinds)
+        except CursorExpiredError as e:
+            events, cursor = [{"seq": e.latest, "kind": "reset", "op": "expired", "id": "", "data": {"scope": "all", "reason": str(e)}}], e.latest
+        if events:
+            quiet_since = time.monotonic()
+            yield events
+
+
+@app.get("/api/changes/stream")
+async def stream_changes(
+    request: Request,
+    since: int | None = None,
+    kind: str = "",
+    last_event_id: str = Header(""),
+    namespace: str = Depends(namespace_name),
+):
+    """Server-sent events: one per change after `since` (the browser's Last-Event-ID on reconnect),
+    or from now on without either. The event id is its seq, the event name its kind."""
+    if last_event_id.isdigit():
+        since = int(last_event_id)
+
+    async def events():
+        with ExitStack() as stack:
+            brain = await asyncio.to_thread(stack.enter_context, pool.lease(namespace))  # opening may be slow
+            async for batch in _follow(brain, since, _kinds(kind), request.is_disconnected):
+                if not batch:
+                    yield ": keepalive\n\n"
+                for event in batch:
+                    yield f"id: {event['seq']}\nevent: {event['kind']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.websocket("/api/changes/ws")
+async def changes_socket(websocket: WebSocket, since: int | None = None, kind: str = "", namespace: str = ""):
+    """Every change after `since` (or from now on) as one JSON message each, as it happens."""
+    with ExitStack() as stack:
+        try:
+            lease = pool.lease(namespace or websocket.headers.get("x-onememory-namespace", ""))
+            brain = await asyncio.to_thread(stack.enter_context, lease)
+        except ValueError as e:
+            await websocket.close(code=1008, reason=str(e))
+            return
+        await _stream_socket(websocket, brain, since, kind)
+
+
+async def _stream_socket(websocket: WebSocket, brain: PrefrontalCortex, since: int | None, kind: str) -> None:
+    await websocket.accept()
+    closed = asyncio.ensure_future(websocket.receive())  # the client closing (or saying anything) ends it
+
+    async def gone() -> bool:
+        return closed.done()
+
+    try:
+        async for batch in _follow(brain, since, _kinds(kind), gone):
+            for event in batch:
+                await websocket.send_json(event)
+        await websocket.close()
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # the client already went away
+    finally:
+        closed.cancel()
@@ -0,0 +1,514 @@
+"""
+Journal — crash-safe capture for the hippocampus's daily logs.
+
+Rewriting a whole day's JSON in place on every capture loses the day if the
+process dies mid-write (the `up` command's SIGTERM to mitmdump is enough).
+Captures now go through a write-ahead log instead:
+
+    capture      append one record to hippocampus/<day>.wal and fsync
+    checkpoint   once a WAL passes CHECKPOINT_BYTES (and at startup), fold
+                 its records into <day>.json — written to a temp file,
+                 fsynced and renamed over the old one — then truncate it
+    read         <day>.json plus any records still in <day>.wal
+
+A record is one line, `<crc32 hex> <length> <json>\\n`, so a torn or
+corrupted write is detected and skipped rather than poisoning the file.
+Records carry the conversation id and reads skip ids already in the JSON,
+so a crash between the rename and the truncate replays harmlessly.
+
+Concurrent captures in one process share a single write + fsync (group
+commit); processes (proxy addon, API, CLI import) serialize on a flock.
+
+recover() is the startup pass: it drops stale temp files, rewrites WALs
+without their bad records and checkpoints them, and salvages every complete
+conversation from a daily JSON that fails to parse, keeping the original
+as <day>.json.corrupt-<timestamp>.
+
+The same files and locking — atomic_write, append_lines, read_from (follow a
+log by offset) and FileLock — back the flat store, fact slots and change feed.
+
+Stdlib only — the proxy addon imports this under mitmdump's Python.
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from pathlib import Path
+from onememory import metrics
+
+try:
+    import fcntl
+except ImportError:  # no flock (Windows): single-process locking only
+    fcntl = None
+
+CHECKPOINT_BYTES = 256 * 1024
+STALE_TEMP_SECONDS = 60.0
+LOCK_NAME = ".journal.lock"
+
+_DAY_FILE = re.compile(r"^\d{4}-\d{2}-\d{2}\.(json|wal)$")
+
+_APPEND_SECONDS = metrics.histogram("journal_append_seconds", "WAL append latency, including fsync")
+_GROUP_SIZE = metrics.histogram(
+    "journal_group_commit_records", "Records made durable per fsync", buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+_CHECKPOINTS = metrics.counter("journal_checkpoints_total", "WALs folded into their daily log")
+_REPAIRS = metrics.counter("journal_repairs_total", "Problems fixed by recovery, by kind")
+
+
+# ---------------------------------------------------------------------------
+# Files
+# ---------------------------------------------------------------------------
+
+def atomic_write(path: Path, data: bytes | str) -> None:
+    """Replace `path` with `data` all-or-nothing: temp file, fsync, rename, fsync the directory."""
+    if isinstance(data, str):
+        data = data.encode()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        _write_all(fd, data)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
+    _fsync_dir(path.parent)
+
+
+def append_lines(path: Path | str, data: bytes, fsync: bool = True) -> int:
+    """Append complete lines to a log file in one write; returns its size afterwards.
+
+    If the file ends in a torn line (a writer died mid-append), a newline goes first so the
+    new lines aren't glued onto its remains — scan() then drops just the torn one."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        end = os.fstat(fd).st_size
+        if end and os.pread(fd, 1, end - 1) != b"\n":
+            data = b"\n" + data
+        _write_all(fd, data)
+        if fsync:
+            os.fsync(fd)
+        return os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+
+
+class FileLock:
+    """A flock on `path` plus a thread lock: exclusive across threads and processes,
+    re-entrant within a thread. The lock file is opened on first entry and closed on last exit."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd: int | None = None
+
+    def __enter__(self) -> FileLock:
+        self._lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except BaseException:
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                self._lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._depth -= 1
+        try:
+            if self._depth == 0 and self._fd is not None:
+                fd, self._fd = self._fd, None
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+        finally:
+            self._lock.release()
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _fsync_dir(directory: Path) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# ---------------------------------------------------------------------------
+# Records
+# ---------------------------------------------------------------------------
+
+def encode(record: dict) -> bytes:
+    body = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode()
+    return b"%08x %d " % (zlib.crc32(body), len(body)) + body + b"\n"
+
+
+def scan(data: bytes) -> tuple[list[dict], int]:
+    """Every intact record in a WAL image, and how many lines were torn or corrupt."""
+    records: list[dict] = []
+    bad = 0
+    for line in data.split(b"\n")[:-1] if data.endswith(b"\n") else data.split(b"\n"):
+        if not line:
+            continue
+        try:
+            crc, length, body = line.split(b" ", 2)
+            if len(body) != int(length) or zlib.crc32(body) != int(crc, 16):
+                raise ValueError("checksum")
+            records.append(json.loads(body))
+        except ValueError:
+            bad += 1
+    return records, bad
+
+
+def read_from(path: Path | str, offset: int, size: int) -> tuple[list[dict], int, int]:
+    """The intact records of a growing log between `offset` and `size`, how many lines were bad,
+    and the offset after the last complete line — one still being written is read next time."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(size - offset)
+    end = data.rfind(b"\n") + 1
+    records, bad = scan(data[:end])
+    return records, bad, offset + end
+
+
+def salvage(text: str) -> tuple[dict, int] | None:
+    """A daily log rebuilt from a damaged JSON file: header fields plus every complete conversation."""
+    decoder = json.JSONDecoder()
+    date = re.search(r'"date"\s*:\s*"([^"]*)"', text)
+    meta = re.search(r'"metadata"\s*:\s*', text)
+    metadata = {}
+    if meta:
+        try:
+            metadata, _ = decoder.raw_decode(text, meta.end())
+        except ValueError:
+            metadata = {}
+    start = re.search(r'"conversations"\s*:\s*\[', text)
+    if not start:
+        return None
+    conversations = []
+    pos = start.end()
+    while True:
+        while pos < len(text) and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(text) or text[pos] != "{":
+            break
+        try:
+            item, pos = decoder.raw_decode(text, pos)
+        except ValueError:
+            break
+        if isinstance(item, dict) and "id" in item:
+            conversations.append(item)
+    log = {"date": date.group(1) if date else "", "metadata": metadata, "conversations": conversations}
+    return log, len(conversations)
+
+
+# ---------------------------------------------------------------------------
+# Write-ahead log
+# ---------------------------------------------------------------------------
+
+class WriteAheadLog:
+    """One append-only, checksummed record file with group commit."""
+
+    def __init__(self, path: Path, lock: Journal) -> None:
+        self.path = path
+        self._journal = lock
+        self._cond = threading.Condition()
+        self._queue: list[bytes] = []
+        self._enqueued = 0
+        self._durable = 0
+        self._flushing = False
+        self._size = 0
+        self._failed: dict[int, BaseException] = {}
+
+    def append(self, record: dict) -> int:
+        """Durably append `record`. Returns the WAL size afterwards.
+
+        The first waiting thread becomes the leader and writes everyone's
+        queued records with one write and one fsync."""
+        data = encode(record)
+        with _APPEND_SECONDS.time(), self._cond:
+            self._queue.append(data)
+            self._enqueued += 1
+            mine = self._enqueued
+            while self._durable < mine:
+                if self._flushing:
+                    self._cond.wait()
+                    continue
+                batch, self._queue = self._queue, []
+                upto = self._enqueued
+                self._flushing = True
+                self._cond.release()
+                error = None
+                try:
+                    size = self._write(batch)
+                except BaseException as e:  # every record in the batch fails with it
+                    error = e
+                finally:
+                    self._cond.acquire()
+                    self._flushing = False
+                if error is not None:
+                    for seq in range(upto - len(batch) + 1, upto + 1):
+                        self._failed[seq] = error
+                self._durable = upto
+                self._size = size if error is None else 0
+                self._cond.notify_all()
+                _GROUP_SIZE.observe(len(batch))
+            error = self._failed.pop(mine, None)
+            if error is not None:
+                raise error
+            return self._size
+
+    def _write(self, batch: list[bytes]) -> int:
+        with self._journal.locked():
+            return append_lines(self.path, b"".join(batch))
+
+    def read(self) -> tuple[list[dict], int]:
+        try:
+            return scan(self.path.read_bytes())
+        except FileNotFoundError:
+            return [], 0
+
+
+# ---------------------------------------------------------------------------
+# Journal — the daily logs of one hippocampus directory
+# ---------------------------------------------------------------------------
+
+class Journal:
+    """WAL-backed daily logs: <day>.json (checkpointed) + <day>.wal (pending)."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._wals: dict[str, WriteAheadLog] = {}
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(directory / LOCK_NAME)
+
+    def locked(self) -> FileLock:
+        """Exclusive across threads and processes; re-entrant within a thread."""
+        return self._file_lock
+
+    def json_path(self, day: str) -> Path:
+        return self.directory / f"{day}.json"
+
+    def wal_path(self, day: str) -> Path:
+        return self.directory / f"{day}.wal"
+
+    def _wal(self, day: str) -> WriteAheadLog:
+        with self._lock:
+            wal = self._wals.get(day)
+            if wal is None:
+                wal = self._wals[day] = WriteAheadLog(self.wal_path(day), self)
+            return wal
+
+    def days(self) -> list[str]:
+        """Every day with a log or pending records, oldest first."""
+        try:
+            with os.scandir(self.directory) as entries:
+                return sorted({e.name[:10] for e in entries if _DAY_FILE.match(e.name)})
+        except FileNotFoundError:
+            return []
+
+    def stamps(self) -> dict[str, tuple]:
+        """stamp() of every day, from one directory scan."""
+        stamps: dict[str, list[int]] = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if _DAY_FILE.match(entry.name):
+                        st = entry.stat()
+                        slot = 0 if entry.name.endswith(".json") else 2
+                        stamp = stamps.setdefault(entry.name[:10], [0, 0, 0, 0])
+                        stamp[slot:slot + 2] = [st.st_mtime_ns, st.st_size]
+        except FileNotFoundError:
+            pass
+        return {day: tuple(stamp) for day, stamp in stamps.items()}
+
+    def stamp(self, day: str) -> tuple:
+        """(mtime_ns, size) of the day's JSON and WAL — changes whenever either does."""
+        stamp = []
+        for path in (self.json_path(day), self.wal_path(day)):
+            try:
+                st = path.stat()
+                stamp += [st.st_mtime_ns, st.st_size]
+            except FileNotFoundError:
+                stamp += [0, 0]
+        return tuple(stamp)
+
+    # -- capture ---------------------------------------------------------------
+
+    def append(self, day: str, conversation: dict) -> None:
+        """Durably record a conversation; checkpoint the day once its WAL is big enough."""
+        size = self._wal(day).append({"op": "conversation", "conversation": conversation})
+        if size >= CHECKPOINT_BYTES:
+            self.checkpoint(day)
+
+    def pending(self, day: str) -> list[dict]:
+        """Conversations still in the day's WAL (not yet folded into its JSON)."""
+        records, _ = self._wal(day).read()
+        return [r["conversation"] for r in records if r.get("op") == "conversation"]
+
+    def snapshot(self, day: str) -> tuple[str | None, list[dict]]:
+        """(the day's JSON text or None, its pending conversations). Both are read
+        under the lock, so a concurrent checkpoint can't hide records in between."""
+        with self.locked():
+            try:
+                text = self.json_path(day).read_text()
+            except FileNotFoundError:
+                text = None
+            return text, self.pending(day)
+
+    def _load(self, day: str) -> dict:
+        """The day's checkpointed JSON, salvaging it first if it doesn't parse. Call under the lock."""
+        path = self.json_path(day)
+        try:
+            return json.loads(path.read_text())
+        except FileNotFoundError:
+            return {"date": day, "metadata": {}, "conversations": []}
+        except ValueError:
+            self.repair(day)
+            return self._load(day)
+
+    def checkpoint(self, day: str) -> int:
+        """Fold the day's WAL into its JSON atomically, then empty the WAL. Returns records folded."""
+        with self.locked():
+            records, _ = self._wal(day).read()
+            pending = [r["conversation"] for r in records if r.get("op") == "conversation"]
+            if not pending:
+                if records or self.wal_path(day).exists():
+                    self.wal_path(day).unlink(missing_ok=True)
+                return 0
+            path = self.json_path(day)
+            log = self._load(day)
+            if not path.exists():
+                log["metadata"] = pending[0].get("metadata") or {}
+            atomic_write(path, json.dumps(merge(log, pending), indent=2, ensure_ascii=False))
+            self.wal_path(day).unlink()
+            _fsync_dir(self.directory)
+        _CHECKPOINTS.inc()
+        return len(pending)
+
+    def write(self, day: str, log: dict) -> None:
+        """Replace a whole day (import, dream bench) — pending records are folded in first."""
+        with self.locked():
+            pending = self.pending(day)
+            atomic_write(self.json_path(day), json.dumps(merge(log, pending), indent=2, ensure_ascii=False))
+            self.wal_path(day).unlink(missing_ok=True)
+
+    def drop(self, day: str) -> bool:
+        """Delete a day entirely (`onememory clear`)."""
+        with self.locked():
+            found = False
+            for path in (self.json_path(day), self.wal_path(day)):
+                if path.exists():
+                    path.unlink()
+                    found = True
+            return found
+
+    def close(self) -> None:
+        """Checkpoint everything this process wrote (clean shutdown)."""
+        for day in list(self._wals):
+            try:
+                self.checkpoint(day)
+            except OSError:
+                pass
+
+    # -- recovery --------------------------------------------------------------
+
+    def recover(self, deep: bool = False) -> dict:
+        """Startup repair pass; returns what it found. `deep` fully parses every daily
+        JSON instead of only checking that it looks complete."""
+        report = {"temp_files": 0, "wal_records": 0, "wal_bad_records": 0, "files_repaired": 0, "salvaged": 0}
+        if not self.directory.is_dir():
+            return report
+        with self.locked():
+            now = time.time()
+            for tmp in self.directory.glob(".*.tmp"):
+                try:
+                    if now - tmp.stat().st_mtime > STALE_TEMP_SECONDS:
+                        tmp.unlink()
+                        report["temp_files"] += 1
+                except FileNotFoundError:
+                    pass
+            for day in self.days():
+                path = self.json_path(day)
+                if path.exists() and not _looks_complete(path, deep):
+                    salvaged = self.repair(day)
+                    if salvaged is not None:
+                        report["files_repaired"] += 1
+                        report["salvaged"] += salvaged
+                wal = self.wal_path(day)
+                if wal.exists():
+                    records, bad = self._wal(day).read()
+                    report["wal_records"] += len(records)
+                    if bad:
+                        report["wal_bad_records"] += bad
+                        atomic_write(wal, b"".join(encode(r) for r in records))
+                    self.checkpoint(day)
+        for kind in ("temp_files", "wal_bad_records", "files_repaired"):
+            if report[kind]:
+                _REPAIRS.inc(report[kind], kind=kind)
+        return report
+
+    def repair(self, day: str) -> int | None:
+        """Replace a damaged daily JSON with what salvage() recovers; the original is kept
+        beside it. Returns the number of conversations saved, None if it wasn't damaged."""
+        path = self.json_path(day)
+        try:
+            raw = path.read_bytes()
+            json.loads(raw)
+            return None  # already fine (another reader repaired it first)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            pass
+        backup = path.with_name(f"{path.name}.corrupt-{time.strftime('%Y%m%d%H%M%S')}")
+        os.replace(path, backup)
+        result = salvage(raw.decode("utf-8", errors="replace"))
+        if result is None:
+            return 0
+        log, count = result
+        log["date"] = log["date"] or day
+        atomic_write(path, json.dumps(log, indent=2, ensure_ascii=False))
+        return count
+
+
+def merge(log: dict, pending: list[dict]) -> dict:
+    """`log` with the pending conversations it doesn't already have appended."""
+    if pending:
+        known = {c.get("id") for c in log.get("conversations", [])}
+        log.setdefault("conversations", []).extend(c for c in pending if c.get("id") not in known)
+    return log
+
+
+def _looks_complete(path: Path, deep: bool) -> bool:
+    if deep:
+        try:
+            json.loads(path.read_bytes())
+            return True
+        except ValueError:
+            return False
+    with open(path, "rb") as f:
+        head = f.read(1)
+        try:
+            f.seek(-64, os.SEEK_END)
+        except OSError:
+            f.seek(0)
+        tail = f.read().rstrip()
+    return head == b"{" and tail.endswith(b"}")
@@ -1,7 +1,24 @@
-"""MCP Server — exposes OneMemory to Claude Code and other MCP clients."""
+"""MCP Server — exposes OneMemory to Claude Code and other MCP clients.
+
+One process serves every namespace: tools take an optional `namespace`
+argument, and over the HTTP transports a client can instead pin its
+namespace with the X-OneMemory-Namespace header. Brains come from an LRU
+BrainPool; without either, the server's default namespace is used.
+
+Tools are async: brain calls (chromadb, embedding, file I/O) run on a
+worker pool of `mcp_workers` threads, so one slow recall doesn't stall the
+event loop and concurrent clients on the HTTP transports (SSE or
+streamable HTTP) are served in parallel.
+"""
 from __future__ import annotations
-from mcp.server.fastmcp import FastMCP
-from onememory.brain import create_brain
+import time
+import anyio
+from mcp.server.fastmcp import Context, FastMCP
+from onememory import metrics, profiling
+from onememory.brain import QuotaExceededError
+from onememory.brain.pool import BrainPool
+
+NAMESPACE_HEADER = "x-onememory-namespace"
 
 mcp = FastMCP(
     "OneMemory",
@@ -12,18 +29,61 @@ mcp = FastMCP(
         "When the user shares new personal information, use remember() to store it."
     ),
 )
-brain = create_brain()
+pool = BrainPool()
+
+_TOOL_SECONDS = metrics.histogram("mcp_tool_seconds", "MCP tool call latency, by tool")
+_TOOL_CALLS = metrics.counter("mcp_tool_calls_total", "MCP tool calls, by tool")
+_QUEUE_SECONDS = metrics.histogram("mcp_tool_queue_seconds", "Time a tool call waited for a worker thread, by tool")
+_limiter: anyio.CapacityLimiter | None = None
+
+
+async def _offload(tool: str, fn, *args):
+    """Run a blocking brain call on the worker pool."""
+    global _limiter
+    if _limiter is None:  # created lazily: it must belong to the running event loop
+        _limiter = anyio.CapacityLimiter(pool.config.mcp_workers)
+    queued = time.perf_counter()
+
+    def work():
+        _QUEUE_SECONDS.observe(time.perf_counter() - queued, tool=tool)
+        return fn(*args)
+
+    return await anyio.to_thread.run_sync(work, limiter=_limiter)
+
+
+def _namespace(namespace: str, ctx: Context | None) -> str:
+    """Explicit argument first, then the HTTP request's header; "" → the pool default."""
+    if namespace or ctx is None:
+        return namespace
+    try:
+        request = ctx.request_context.request
+    except (ValueError, AttributeError):
+        return ""
+    return request.headers.get(NAMESPACE_HEADER, "") if request is not None else ""
 
 
 @mcp.tool()
-def recall(query: str = "") -> str:
+async def recall(query: str = "", namespace: str = "", ctx: Context | None = None) -> str:
     """Recall everything you know about the user.
     No query → returns full context (identity, preferences, knowledge, recent activity, stats).
-    With query → adds semantic search results matching the query."""
+    With query → adds semantic search results matching the query.
+    Leave namespace empty unless the user asks for a specific profile."""
+    _TOOL_CALLS.inc(tool="recall")
+    with _TOOL_SECONDS.time(tool="recall"), profiling.span("recall", query=query):
+        return await _offload("recall", _recall, query, _namespace(namespace, ctx))
+
+
+def _recall(query: str, namespace: str = "") -> str:
+    with pool.lease(namespace) as brain:
+        return _recall_from(brain, query)
+
+
+def _recall_from(brain, query: str) -> str:
     parts = []
 
     # Always include full context
-    ctx = brain.get_context()
+    with profiling.span("get_context"):
+        ctx = brain.get_context()
     if ctx["identity"]:
         parts.append("## Identity\n" + "\n".join(f"- {i}" for i in ctx["identity"]))
     if ctx["preferences"]:
@@ -32,7 +92,8 @@ def recall(query: str = "") -> str:
         parts.append("## Knowledge\n" + "\n".join(f"- {k}" for k in ctx["knowledge"]))
 
     # Recent activity
-    recent = brain.get_recent_conversations(5)
+    with profiling.span("recent_conversations"):
+        recent = brain.get_recent_conversations(5)
     if recent:
         lines = []
         for c in recent:
@@ -46,7 +107,8 @@ def recall(query: str = "") -> str:
 
     # If query provided, add semantic search results
     if query:
-        results = brain.search(query, 10)
+        with profiling.span("search"):
+            results = brain.search(query, 10)
         if results:
             search_lines = []
             for r in results:
@@ -59,22 +121,61 @@ def recall(query: str = "") -> str:
 
 
 @mcp.tool()
-def remember(content: str, category: str = "general", tags: str = "") -> str:
+async def remember(
+    content: str, category: str = "general", tags: str = "", namespace: str = "", ctx: Context | None = None,
+) -> str:
     """Store a new memory about the user. Categories: identity, preference, knowledge, general."""
+    _TOOL_CALLS.inc(tool="remember")
     tag_list = [t.strip() for t in tags.split(",") if t.strip()] if tags else []
-    memory_id = brain.remember(content, category, tag_list)
+    with _TOOL_SECONDS.time(tool="remember"), profiling.span("remember", category=category):
+        try:
+            memory_id = await _offload("remember", _remember, content, category, tag_list, _namespace(namespace, ctx))
+        except QuotaExceededError as e:
+            return f"Not stored: {e}"
     return f"Stored memory {memory_id}: {content}"
 
 
-def main(transport: str = "stdio", port: int = 8765):
-    if transport == "sse":
+def _remember(content: str, category: str, tags: list[str], namespace: str = "") -> str:
+    with pool.lease(namespace) as brain:
+        return brain.remember(content, category, tags)
+
+
+async def _debug_profile(request):
+    from starlette.responses import JSONResponse
+    seconds = float(request.query_params.get("seconds", profiling.PROFILE_SECONDS))
+    path = await anyio.to_thread.run_sync(profiling.sample, seconds)
+    if path is None:
+        return JSONResponse({"error": "a profile is already running"}, status_code=409)
+    return JSONResponse({"profile": str(path)})
+
+
+async def _debug_slow(request):
+    from starlette.responses import JSONResponse
+    n = int(request.query_params.get("n", profiling.SLOWEST))
+    return JSONResponse({"calls": profiling.slowest(n), "dumped_to": str(profiling.dump_slowest(n))})
+
+
+def main(transport: str = "stdio", port: int = 8765, profile: bool = False, namespace: str = ""):
+    if namespace:
+        pool.config.for_namespace(namespace)  # validate before serving
+        pool.default = namespace
+    metrics.REGISTRY.persist_to(pool.config.metrics_dir / "mcp.json")
+    if profile or profiling.requested():
+        profiling.install("mcp", pool.config.profiles_dir)
+        # Only registered when profiling is on — the HTTP server is often exposed through ngrok.
+        mcp.custom_route("/debug/profile", methods=["POST"])(_debug_profile)
+        mcp.custom_route("/debug/slow", methods=["GET"])(_debug_slow)
+    if transport in ("sse", "streamable-http"):
         from mcp.server.transport_security import TransportSecuritySettings
         mcp.settings.host = "0.0.0.0"
         mcp.settings.port = port
         mcp.settings.transport_security = TransportSecuritySettings(
             enable_dns_rebinding_protection=False,
         )
-    mcp.run(transport=transport)
+    try:
+        mcp.run(transport=transport)
+    finally:
+        pool.close()  # flushes buffered remember() calls
 
 
 if __name__ == "__main__":
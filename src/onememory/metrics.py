@@ -0,0 +1,238 @@
+"""
+Metrics — lightweight in-process counters, gauges and latency histograms.
+
+No external dependency. Hot paths record into the module-level REGISTRY:
+
+    _SEARCH_SECONDS = metrics.histogram("cortex_search_seconds", "Cortex vector search latency")
+    with _SEARCH_SECONDS.time():
+        ...
+    metrics.counter("captures_total").inc()
+
+The registry renders Prometheus text for the REST API's /metrics endpoint.
+Long-running processes (proxy addon, MCP server, daemon, API) also call
+persist_to() so a snapshot lands in ~/.onememory/metrics/<process>.json every
+few seconds — that's what `onememory stats --perf` reads, since each of those
+processes keeps its own registry.
+"""
+from __future__ import annotations
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+PREFIX = "onememory_"
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FLUSH_INTERVAL = 5.0
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _label_str(key: tuple) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in key) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str = "") -> None:
+        self.name = name
+        self.help = help
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+        REGISTRY.touch()
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> list[tuple[str, tuple, float]]:
+        with self._lock:
+            return [(self.name, key, v) for key, v in self._values.items()]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"kind": self.kind, "help": self.help, "values": [[list(k), v] for k, v in self._values.items()]}
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+        REGISTRY.touch()
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str = "", buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}  # key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+        REGISTRY.touch()
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> list[tuple[str, tuple, float]]:
+        out = []
+        with self._lock:
+            for key, series in self._series.items():
+                cumulative = 0
+                for bound, n in zip(self.buckets, series):
+                    cumulative += n
+                    out.append((f"{self.name}_bucket", key + (("le", repr(bound)),), cumulative))
+                out.append((f"{self.name}_bucket", key + (("le", "+Inf"),), series[-1]))
+                out.append((f"{self.name}_sum", key, series[-2]))
+                out.append((f"{self.name}_count", key, series[-1]))
+        return out
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "help": self.help,
+                "buckets": list(self.buckets),
+                "values": [[list(k), list(s)] for k, s in self._series.items()],
+            }
+
+
+def quantile(buckets: list[float], series: list, q: float) -> float:
+    """Estimate a quantile from histogram buckets (linear within a bucket, like Prometheus)."""
+    count = series[-1]
+    if not count:
+        return 0.0
+    rank = q * count
+    cumulative, lower = 0, 0.0
+    for bound, n in zip(buckets, series):
+        if n and cumulative + n >= rank:
+            return lower + (bound - lower) * ((rank - cumulative) / n)
+        cumulative += n
+        lower = bound
+    return buckets[-1]
+
+
+class Registry:
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+        self._lock = threading.Lock()
+        self._persist_path: Path | None = None
+        self._last_flush = 0.0
+
+    def _get(self, cls, name: str, help: str, **kwargs):
+        full = name if name.startswith(PREFIX) else PREFIX + name
+        metric = self._metrics.get(full)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(full)
+                if metric is None:
+                    metric = self._metrics[full] = cls(full, help, **kwargs)
+        return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get(Counter, name, help)
+
+    def gauge(self, name: str, help: str = "") -> Gauge:
+        return self._get(Gauge, name, help)
+
+    def histogram(self, name: str, help: str = "", buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            if metric.help:
+                lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for sample, key, value in metric.samples():
+                lines.append(f"{sample}{_label_str(key)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        return {name: metric.snapshot() for name, metric in sorted(self._metrics.items())}
+
+    # -- persistence --------------------------------------------------------
+
+    def persist_to(self, path: Path) -> None:
+        """Snapshot to `path` every FLUSH_INTERVAL seconds of activity, and at exit."""
+        self._persist_path = path
+        atexit.register(self.flush)
+        self.flush()  # announce the process (pid) right away, before any activity
+
+    def touch(self) -> None:
+        if self._persist_path is not None and time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._persist_path is None:
+            return
+        self._last_flush = time.monotonic()
+        try:
+            self._persist_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._persist_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"pid": os.getpid(), "updated": time.time(), "metrics": self.snapshot()}))
+            os.replace(tmp, self._persist_path)
+        except OSError:
+            pass
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+
+def timed(name: str, **labels):
+    """Observe the wall time of the block into histogram `name`."""
+    return histogram(name).time(**labels)
+
+
+def load_snapshots(directory: Path) -> dict[str, dict]:
+    """Read every process snapshot in `directory`, keyed by process name."""
+    snapshots = {}
+    if not directory.exists():
+        return snapshots
+    for path in sorted(directory.glob("*.json")):
+        try:
+            snapshots[path.stem] = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+    return snapshots
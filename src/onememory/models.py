@@ -34,6 +34,7 @@ class MemoryEntry(BaseModel):
     tags: list[str] = Field(default_factory=list)
     importance: float = 0.5
     timestamp: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    conversation_id: str = ""
 
 
 class SearchResult(BaseModel):
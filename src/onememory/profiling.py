@@ -0,0 +1,241 @@
+"""
+Profiling — opt-in tracing spans, slow-call log and a sampling profiler.
+
+Off by default; nothing here costs more than a flag check until install()
+is called (the servers do that when started with --profile or with
+ONEMEMORY_PROFILE=1 in the environment). Once installed:
+
+    with profiling.span("recall", query=q):      # root span = one traced call
+        with profiling.span("get_context"):      # nested spans = stages
+            ...
+
+Every finished root span lands in a ring buffer of recent calls.
+
+    SIGUSR1  → sample all threads for PROFILE_SECONDS, write a collapsed-stack
+               file (flamegraph.pl / speedscope) to ~/.onememory/profiles/
+    SIGUSR2  → dump the slowest recent calls with their stage breakdown
+
+The same two actions are exposed over HTTP by the REST API and the MCP
+server's HTTP transports (/debug/profile, /debug/slow).
+
+A process whose handlers are hooked says so in profiles/<process>.pid (its
+pid and start time). Both signals terminate a process that has no handler,
+so `onememory profile` only signals a pid found there that is still the
+same process.
+"""
+from __future__ import annotations
+import atexit
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+
+PROFILE_SECONDS = 30.0
+SAMPLE_INTERVAL = 0.005
+RECENT_CALLS = 2000
+SLOWEST = 25
+
+_enabled = False
+_process = "onememory"
+_profiles_dir = Path.home() / ".onememory" / "profiles"
+_current: ContextVar[_Trace | None] = ContextVar("onememory_trace", default=None)
+_recent: deque[_Trace] = deque(maxlen=RECENT_CALLS)
+_profiler_lock = threading.Lock()
+
+
+class _Trace:
+    __slots__ = ("name", "attrs", "started", "start", "seconds", "stages", "depth")
+
+    def __init__(self, name: str, attrs: dict) -> None:
+        self.name = name
+        self.attrs = attrs
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.seconds = 0.0
+        self.stages: list[tuple[str, int, float, float]] = []  # name, depth, offset, seconds
+        self.depth = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "ms": round(self.seconds * 1000, 3),
+            "started": datetime.fromtimestamp(self.started).isoformat(),
+            "attrs": self.attrs,
+            "stages": [
+                {"stage": name, "depth": depth, "offset_ms": round(offset * 1000, 3), "ms": round(secs * 1000, 3)}
+                for name, depth, offset, secs in self.stages
+            ],
+        }
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Trace a call (outermost span) or one of its stages (nested spans)."""
+    if not _enabled:
+        yield
+        return
+    trace = _current.get()
+    if trace is None:
+        trace = _Trace(name, {k: str(v)[:200] for k, v in attrs.items()})
+        token = _current.set(trace)
+        try:
+            yield
+        finally:
+            trace.seconds = time.perf_counter() - trace.start
+            _current.reset(token)
+            _recent.append(trace)
+        return
+    trace.depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.depth -= 1
+        trace.stages.append((name, trace.depth, start - trace.start, time.perf_counter() - start))
+
+
+def slowest(n: int = SLOWEST) -> list[dict]:
+    """The n slowest calls still in the recent-calls buffer, slowest first."""
+    calls = sorted(list(_recent), key=lambda t: t.seconds, reverse=True)[:n]
+    out = []
+    for trace in calls:
+        d = trace.as_dict()
+        d["stages"].sort(key=lambda s: s["offset_ms"])
+        out.append(d)
+    return out
+
+
+def _output_path(kind: str, suffix: str) -> Path:
+    _profiles_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return _profiles_dir / f"{_process}-{kind}-{stamp}{suffix}"
+
+
+def dump_slowest(n: int = SLOWEST) -> Path:
+    path = _output_path("slow", ".json")
+    path.write_text(json.dumps({"process": _process, "pid": os.getpid(), "calls": slowest(n)}, indent=2))
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Sampling profiler
+# ---------------------------------------------------------------------------
+
+def _stack(frame) -> str:
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+def sample(seconds: float = PROFILE_SECONDS, interval: float = SAMPLE_INTERVAL) -> Path | None:
+    """Sample every thread's stack for `seconds`; write collapsed stacks. Blocks the caller.
+
+    Returns None if a profile is already being taken."""
+    if not _profiler_lock.acquire(blocking=False):
+        return None
+    try:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        stacks: Counter[str] = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stacks[f"{names.get(ident, ident)};{_stack(frame)}"] += 1
+            time.sleep(interval)
+        path = _output_path("profile", ".collapsed")
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in stacks.most_common()))
+        return path
+    finally:
+        _profiler_lock.release()
+
+
+def sample_in_background(seconds: float = PROFILE_SECONDS) -> threading.Thread:
+    thread = threading.Thread(target=sample, args=(seconds,), name="onememory-profiler", daemon=True)
+    thread.start()
+    return thread
+
+
+# ---------------------------------------------------------------------------
+# Install
+# ---------------------------------------------------------------------------
+
+def _on_sigusr1(signum, frame) -> None:
+    sample_in_background()
+
+
+def _on_sigusr2(signum, frame) -> None:
+    threading.Thread(target=dump_slowest, name="onememory-slowdump", daemon=True).start()
+
+
+def requested() -> bool:
+    """True if profiling was asked for through the environment."""
+    return os.environ.get("ONEMEMORY_PROFILE", "") not in ("", "0", "false")
+
+
+def install(process: str, profiles_dir: Path) -> None:
+    """Turn on tracing and hook SIGUSR1/SIGUSR2 (where the platform and thread allow)."""
+    global _enabled, _process, _profiles_dir
+    _enabled = True
+    _process = process
+    _profiles_dir = profiles_dir
+    pidfile = profiles_dir / f"{process}.pid"
+    try:
+        signal.signal(signal.SIGUSR1, _on_sigusr1)
+        signal.signal(signal.SIGUSR2, _on_sigusr2)
+    except (AttributeError, ValueError):
+        # No SIGUSR* on this platform, or not on the main thread — HTTP triggers still work,
+        # but no one may signal this process: a pidfile left by an earlier run would say otherwise.
+        if _owner(pidfile) is None:
+            pidfile.unlink(missing_ok=True)
+        return
+    profiles_dir.mkdir(parents=True, exist_ok=True)
+    pidfile.write_text(json.dumps({"pid": os.getpid(), "start": _start_time(os.getpid())}))
+    atexit.register(_release, pidfile, os.getpid())
+
+
+def _start_time(pid: int) -> str:
+    """When a process started (Linux /proc; "" elsewhere) — tells it apart from a later one reusing its pid."""
+    try:
+        return Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        return ""
+
+
+def _owner(pidfile: Path) -> int | None:
+    """The pid in a profiling pidfile, if that process is still running — the same process, not a reuse."""
+    try:
+        info = json.loads(pidfile.read_text())
+        pid = int(info["pid"])
+        os.kill(pid, 0)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return pid if _start_time(pid) == info.get("start", "") else None
+
+
+def _release(pidfile: Path, pid: int) -> None:
+    try:
+        if json.loads(pidfile.read_text()).get("pid") == pid:
+            pidfile.unlink()
+    except (OSError, ValueError):
+        pass
+
+
+def signal_target(process: str, profiles_dir: Path) -> int | None:
+    """The pid of a running `process` with the profiling signals hooked, or None — safe to SIGUSR1/2."""
+    return _owner(profiles_dir / f"{process}.pid")